@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Parity test for object detector backends
+
+Runs the PyTorch (Ultralytics) detector and an ONNX Runtime backend on the
+same images and checks that they report the same objects.
+
+Usage: python detector_parity_test.py [--backend onnx|openvino] [image ...]
+(defaults to the room photos in tests/sample_images)
+"""
+
+import sys
+import argparse
+import traceback
+from pathlib import Path
+
+import cv2
+
+# Add current directory to path
+sys.path.append(str(Path(__file__).parent))
+
+SAMPLE_IMAGES_DIR = Path(__file__).parent / "tests" / "sample_images"
+
+IOU_THRESHOLD = 0.9
+CONFIDENCE_TOLERANCE = 0.05
+
+def box_iou(a, b):
+    """IoU of two bounding_box dicts"""
+    x1, y1 = max(a['x1'], b['x1']), max(a['y1'], b['y1'])
+    x2, y2 = min(a['x2'], b['x2']), min(a['y2'], b['y2'])
+    intersection = max(0, x2 - x1) * max(0, y2 - y1)
+    area_a = (a['x2'] - a['x1']) * (a['y2'] - a['y1'])
+    area_b = (b['x2'] - b['x1']) * (b['y2'] - b['y1'])
+    union = area_a + area_b - intersection
+    return intersection / union if union > 0 else 0.0
+
+def compare_detections(reference, candidate):
+    """Match candidate objects to reference objects; return a list of mismatch descriptions"""
+    problems = []
+    unmatched = list(candidate['objects'])
+
+    for ref_obj in reference['objects']:
+        match = None
+        for cand_obj in unmatched:
+            if (cand_obj['class_name'] == ref_obj['class_name']
+                    and box_iou(ref_obj['bounding_box'], cand_obj['bounding_box']) >= IOU_THRESHOLD):
+                match = cand_obj
+                break
+
+        if match is None:
+            problems.append(f"missing {ref_obj['class_name']} ({ref_obj['confidence']}) at {ref_obj['bounding_box']}")
+            continue
+
+        unmatched.remove(match)
+        if abs(match['confidence'] - ref_obj['confidence']) > CONFIDENCE_TOLERANCE:
+            problems.append(f"{ref_obj['class_name']} confidence {ref_obj['confidence']} vs {match['confidence']}")
+        if match['size_category'] != ref_obj['size_category']:
+            problems.append(f"{ref_obj['class_name']} size {ref_obj['size_category']} vs {match['size_category']}")
+
+    for cand_obj in unmatched:
+        problems.append(f"extra {cand_obj['class_name']} ({cand_obj['confidence']}) at {cand_obj['bounding_box']}")
+
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare object detector backends")
+    parser.add_argument("--backend", default="onnx", choices=["onnx", "openvino"])
+    parser.add_argument("images", nargs="*",
+                        default=[str(path) for path in sorted(SAMPLE_IMAGES_DIR.glob("*.jpg"))])
+    args = parser.parse_args()
+
+    print("Object Detector Backend Parity Test")
+    print("=" * 40)
+
+    try:
+        from modules.object_detector import ObjectDetector
+        reference_detector = ObjectDetector(backend="pytorch")
+        candidate_detector = ObjectDetector(backend=args.backend)
+        if candidate_detector.backend != args.backend:
+            print(f"✗ {args.backend} backend could not be loaded")
+            return 1
+        print(f"✓ Detectors initialized (pytorch vs {args.backend})")
+    except Exception as e:
+        print(f"✗ Detector initialization failed: {e}")
+        traceback.print_exc()
+        return 1
+
+    failures = 0
+    tested = 0
+    for image_path in args.images:
+        image = cv2.imread(image_path)
+        if image is None:
+            print(f"⚠ Test image not found: {image_path}")
+            continue
+
+        tested += 1
+        reference = reference_detector.detect_objects_in_image(image, source=image_path)
+        candidate = candidate_detector.detect_objects_in_image(image, source=image_path)
+        problems = compare_detections(reference, candidate)
+
+        if problems:
+            failures += 1
+            print(f"✗ {image_path}: {len(problems)} mismatch(es)")
+            for problem in problems:
+                print(f"    - {problem}")
+        else:
+            print(f"✓ {image_path}: {len(reference['objects'])} objects match")
+
+    print(f"\nParity test completed: {tested - failures}/{tested} images match")
+    return 1 if failures or not tested else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
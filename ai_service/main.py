@@ -11,28 +11,39 @@ This service implements a 4-stage collaborative AI pipeline:
 Security: All API keys are loaded from environment variables.
 """
 
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, BackgroundTasks
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 import uvicorn
 import os
 import tempfile
 import logging
 import json
 import uuid
+import time
 import asyncio
-from typing import Dict, Any
+import threading
+import functools
+from typing import Dict, Any, List, AsyncIterator
 from datetime import datetime
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor
 
 # Load environment variables
 load_dotenv()
 
+from modules.image_context import ImageContext
 from modules.object_detector import ObjectDetector
 from modules.spatial_analyzer import SpatialAnalyzer
 from modules.visual_processor import VisualProcessor
 from modules.rule_engine import EnhancedRuleEngine
+from modules.object_index import ObjectIndex
 from modules.conceptual_generator import ConceptualImageGenerator
+from modules.job_store import ImageGenerationJob, JobStoreFullError, create_job_store
+from modules.job_scheduler import GenerationScheduler, JobFailedError, QueueFullError
+from modules.result_cache import ResultCache, image_fingerprint, analysis_fingerprint
+from modules.model_warmup import ReadinessTracker
+from modules.progress_events import ProgressEventBus, TERMINAL_EVENTS
+from modules.analysis_pool import AnalysisPool
 
 # Configure logging
 log_level = os.getenv('LOG_LEVEL', 'INFO')
@@ -70,53 +81,163 @@ rule_engine = None
 conceptual_generator = None
 
 # Job management system for asynchronous image generation
-image_generation_jobs = {}
-executor = ThreadPoolExecutor(max_workers=2)  # Limit concurrent Stable Diffusion jobs
-
-class ImageGenerationJob:
-    def __init__(self, job_id: str):
-        self.job_id = job_id
-        self.status = "pending"  # pending, processing, completed, failed
-        self.created_at = datetime.now()
-        self.completed_at = None
-        self.image_url = None
-        self.image_path = None
-        self.error_message = None
-        self.generation_metadata = {}
-        
-    def to_dict(self):
-        return {
-            "job_id": self.job_id,
-            "status": self.status,
-            "created_at": self.created_at.isoformat(),
-            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
-            "image_url": self.image_url,
-            "image_path": self.image_path,
-            "error_message": self.error_message,
-            "generation_metadata": self.generation_metadata
-        }
+# JOB_STORE_BACKEND=sqlite shares job state between uvicorn workers on the same host
+job_store = create_job_store(
+    os.getenv('JOB_STORE_BACKEND', 'memory'),
+    db_path=os.getenv('JOB_STORE_PATH', 'image_generation_jobs.db'),
+    max_jobs=int(os.getenv('JOB_STORE_MAX_JOBS', '1000')),
+    ttl_seconds=float(os.getenv('JOB_TTL_SECONDS', '86400'))
+)
+# Admission control and dedicated diffusion worker pool, created at startup once the device is known
+generation_scheduler = None
+# Dedicated executor and request limit for Stage 1-2 analysis, created at startup
+analysis_pool = None
+
+# Per-component load state behind /health/ready
+readiness = ReadinessTracker()
+
+# Stage and diffusion step events streamed by /events/{channel_id}
+progress_events = ProgressEventBus(
+    history_size=int(os.getenv('PROGRESS_EVENTS_HISTORY', '200')),
+    max_channels=int(os.getenv('PROGRESS_EVENTS_MAX_CHANNELS', '1000')),
+    ttl_seconds=float(os.getenv('PROGRESS_EVENTS_TTL_SECONDS', '3600'))
+)
+progress_heartbeat_seconds = float(os.getenv('PROGRESS_EVENTS_HEARTBEAT_SECONDS', '15'))
+
+# Uploads are downscaled once at decode so the longer side is at most this many pixels (0 = full size)
+analysis_max_long_edge = int(os.getenv('ANALYSIS_MAX_LONG_EDGE', '1024'))
+
+# Finished generations reused for repeated submissions (RESULT_CACHE_ENABLED=false disables it)
+result_cache = None
+if os.getenv('RESULT_CACHE_ENABLED', 'true').lower() == 'true':
+    result_cache = ResultCache(
+        db_path=os.getenv('RESULT_CACHE_PATH', 'concept_result_cache.db'),
+        max_entries=int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '500')),
+        max_bytes=int(float(os.getenv('RESULT_CACHE_MAX_MB', '2048')) * 1024 * 1024),
+        delete_evicted_images=os.getenv('RESULT_CACHE_DELETE_EVICTED_IMAGES', 'false').lower() == 'true'
+    )
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize AI components on startup"""
-    global object_detector, spatial_analyzer, visual_processor, rule_engine, conceptual_generator
+    global object_detector, spatial_analyzer, visual_processor, rule_engine, conceptual_generator, generation_scheduler
+    global analysis_pool
     
     try:
         logger.info("Initializing AI components...")
         
         # Initialize components
-        object_detector = ObjectDetector()
+        readiness.register("stable_diffusion", required=False)
+        
         spatial_analyzer = SpatialAnalyzer()
         visual_processor = VisualProcessor()
         rule_engine = EnhancedRuleEngine()
         conceptual_generator = ConceptualImageGenerator()
         
+        # Size the diffusion worker pool for the device (DIFFUSION_CONCURRENCY_CPU / DIFFUSION_CONCURRENCY_CUDA);
+        # by default it is large enough to keep every configured diffusion worker busy and fill a micro-batch
+        device = conceptual_generator.resolve_device()
+        concurrency_setting = f'DIFFUSION_CONCURRENCY_{device.upper()}'
+        required_concurrency = conceptual_generator.required_concurrency()
+        concurrency = int(os.getenv(concurrency_setting, max(2 if device == 'cuda' else 1, required_concurrency)))
+        if concurrency < required_concurrency:
+            logger.warning(f"{concurrency_setting}={concurrency} is lower than the {required_concurrency} concurrent jobs "
+                           f"needed for DIFFUSION_WORKER_PROCESSES={conceptual_generator.worker_processes} and "
+                           f"DIFFUSION_BATCH_MAX_SIZE={conceptual_generator.batch_max_size}; workers will idle "
+                           f"or batches will not fill")
+        generation_scheduler = GenerationScheduler(
+            concurrency=concurrency,
+            max_queue_size=int(os.getenv('GENERATION_QUEUE_MAX_SIZE', '20')),
+            default_job_seconds=float(os.getenv('GENERATION_DEFAULT_JOB_SECONDS', '45'))
+        )
+        generation_scheduler.start()
+        
+        # Stage 1-2 work runs on a dedicated pool (ANALYSIS_EXECUTION=thread|process) instead of the event loop
+        analysis_pool = AnalysisPool(
+            components=lambda: {
+                "object_detector": object_detector,
+                "spatial_analyzer": spatial_analyzer,
+                "visual_processor": visual_processor,
+                "rule_engine": rule_engine
+            },
+            mode=os.getenv('ANALYSIS_EXECUTION', 'thread').lower(),
+            workers=int(os.getenv('ANALYSIS_WORKERS', '2')),
+            max_concurrent_requests=int(os.getenv('ANALYSIS_MAX_CONCURRENT_REQUESTS', '4'))
+        )
+        analysis_pool.start()
+        
+        # In process mode every analysis worker loads its own detector, so the API process does not;
+        # readiness then waits for the workers instead
+        if analysis_pool.mode == "process":
+            readiness.register("analysis_workers", required=True)
+            threading.Thread(target=wait_for_analysis_workers, name="analysis-workers-warmup", daemon=True).start()
+        else:
+            readiness.register("object_detector", required=True)
+        
+        # MODEL_WARMUP=true loads the models in the background and runs a dummy inference for each;
+        # /health/ready reports ready once they are hot
+        if os.getenv('MODEL_WARMUP', 'true').lower() == 'true':
+            threading.Thread(target=warm_up_models, name="model-warmup", daemon=True).start()
+        else:
+            if analysis_pool.mode == "thread":
+                started = time.perf_counter()
+                object_detector = ObjectDetector()
+                readiness.mark_ready("object_detector", load_seconds=round(time.perf_counter() - started, 3))
+            readiness.mark_skipped("stable_diffusion")
+        
         logger.info("AI service initialized successfully")
         
     except Exception as e:
         logger.error(f"Failed to initialize AI service: {e}")
         raise
 
+def warm_up_models():
+    """Load and warm up the models in the background"""
+    global object_detector
+    
+    if analysis_pool.mode == "thread":
+        object_detector = readiness.run(
+            "object_detector",
+            ObjectDetector,
+            warm_up=lambda detector: detector.warm_up()
+        )
+    
+    # Stable Diffusion is optional: without it the generator falls back to placeholder images
+    if os.getenv('WARMUP_DIFFUSION', 'true').lower() == 'true':
+        readiness.run(
+            "stable_diffusion",
+            lambda: conceptual_generator,
+            warm_up=lambda generator: generator.warm_up()
+        )
+    else:
+        readiness.mark_skipped("stable_diffusion")
+
+def wait_for_analysis_workers():
+    """Mark the analysis workers ready once every worker process has loaded and warmed up its detector"""
+    readiness.run("analysis_workers", analysis_pool.wait_until_ready)
+
+def detection_available() -> bool:
+    """Whether object detection can serve requests: the API process's detector, or the ready analysis workers"""
+    if analysis_pool is not None and analysis_pool.mode == "process":
+        return readiness.state("analysis_workers") == "ready"
+    return object_detector is not None
+
+def detection_confidence_threshold() -> float:
+    """Confidence threshold of the detector that serves requests, for response metadata"""
+    if object_detector is not None:
+        return object_detector.confidence_threshold
+    return analysis_pool.confidence_threshold
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the generation scheduler and analysis pool and close pooled Gemini connections"""
+    if generation_scheduler:
+        await generation_scheduler.shutdown()
+    if analysis_pool:
+        analysis_pool.shutdown()
+    if conceptual_generator and conceptual_generator.gemini_client:
+        await conceptual_generator.gemini_client.aclose()
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -126,27 +247,126 @@ async def root():
         "version": "1.0.0"
     }
 
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive", "uptime_seconds": round(time.time() - readiness.started_at, 1)}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: 200 once the required models are loaded and warmed up, 503 before"""
+    report = readiness.snapshot()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
 @app.get("/health")
 async def health_check():
     """Detailed health check"""
     return {
-        "status": "healthy",
+        "status": "healthy" if readiness.is_ready() else "warming_up",
         "components": {
-            "object_detector": object_detector is not None,
+            "object_detector": detection_available(),
             "spatial_analyzer": spatial_analyzer is not None,
             "visual_processor": visual_processor is not None,
             "rule_engine": rule_engine is not None,
             "conceptual_generator": conceptual_generator is not None
-        }
+        },
+        "job_store": job_store.stats(),
+        "generation_queue": generation_scheduler.stats() if generation_scheduler else None,
+        "analysis_pool": analysis_pool.stats() if analysis_pool else None,
+        "diffusion_workers": (
+            conceptual_generator.process_pool.stats()
+            if conceptual_generator and conceptual_generator.process_pool else None
+        ),
+        "gemini_cache": (
+            conceptual_generator.description_cache.stats()
+            if conceptual_generator and conceptual_generator.description_cache else None
+        ),
+        "gemini_client": (
+            conceptual_generator.gemini_client.stats()
+            if conceptual_generator and conceptual_generator.gemini_client else None
+        ),
+        "diffusion_batching": (
+            conceptual_generator.batcher.stats()
+            if conceptual_generator and conceptual_generator.batcher else None
+        ),
+        "result_cache": result_cache.stats() if result_cache else None,
+        "progress_events": progress_events.stats()
     }
 
+def analysis_progress(progress_id: str):
+    """Publisher for an /analyze-room progress channel, or a no-op without a progress_id"""
+    if progress_id:
+        return progress_events.publisher(progress_id)
+    return lambda event, data=None: None
+
+@app.get("/events/{channel_id}")
+async def stream_progress_events(channel_id: str, request: Request):
+    """
+    Server-Sent Events stream of pipeline progress
+    
+    channel_id is a /generate-concept job_id or the progress_id sent with
+    /analyze-room. Events: queued, processing, detection, spatial, visual,
+    rules, description, diffusion_step (with a latent preview every
+    DIFFUSION_PREVIEW_EVERY steps), then completed or failed, after which the
+    stream ends. Events already published are replayed on connect; reconnecting
+    clients resume after the Last-Event-ID header.
+    """
+    try:
+        last_event_id = int(request.headers.get('last-event-id') or 0)
+    except ValueError:
+        last_event_id = 0
+    
+    if progress_events.has_channel(channel_id) or not job_store.get(channel_id):
+        events = sse_progress_stream(channel_id, last_event_id)
+    else:
+        # Job known to the store but not to this worker: another worker runs it or its channel expired
+        events = sse_job_status_stream(channel_id)
+    
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def sse_progress_stream(channel_id: str, last_event_id: int) -> AsyncIterator[str]:
+    async for event in progress_events.subscribe(channel_id, last_event_id, heartbeat_seconds=progress_heartbeat_seconds):
+        yield event.to_sse() if event else ": keep-alive\n\n"
+
+async def sse_job_status_stream(job_id: str, poll_seconds: float = 1.0) -> AsyncIterator[str]:
+    """Stream job store status changes, for jobs whose events are published in another process"""
+    last_status = None
+    event_id = 0
+    idle = 0.0
+    while True:
+        job = job_store.get(job_id)
+        if job is None:
+            return
+        if job.status != last_status:
+            last_status = job.status
+            event_id += 1
+            idle = 0.0
+            event = "queued" if job.status == "pending" else job.status
+            yield f"id: {event_id}\nevent: {event}\ndata: {json.dumps(job.to_dict(), default=str)}\n\n"
+            if event in TERMINAL_EVENTS:
+                return
+        elif idle >= progress_heartbeat_seconds:
+            idle = 0.0
+            yield ": keep-alive\n\n"
+        await asyncio.sleep(poll_seconds)
+        idle += poll_seconds
+
 @app.post("/analyze-room")
 async def analyze_room(
+    request: Request,
     image: UploadFile = File(...),
     room_type: str = Form(...),
     improvement_notes: str = Form(default=""),
     existing_features: str = Form(default="{}"),
-    generate_concept: bool = Form(default=True)
+    generate_concept: bool = Form(default=True),
+    use_cache: bool = Form(default=True),
+    progress_id: str = Form(default=""),
+    user_id: str = Form(default=""),
+    priority: int = Form(default=5)
 ):
     """
     Comprehensive room analysis with collaborative AI pipeline
@@ -156,166 +376,239 @@ async def analyze_room(
     2. Reasoning: Rule-based spatial guidance + improvement suggestions
     3. Language: Gemini-powered design description generation
     4. Visualization: Diffusion-based conceptual image synthesis
+    
+    Stages 1-2 run before the response is returned. With generate_concept,
+    stages 3-4 are queued as a /generate-concept job and the response carries
+    its job_id; poll /image-status/{job_id} or stream /events/{job_id}.
+    
+    A repeated submission (same photo, room type and notes) reuses the stored
+    Stage 1-2 result unless use_cache is false. With a client-chosen
+    progress_id, stage results are streamed on /events/{progress_id} as they
+    complete.
     """
-    try:
-        # Validate inputs
-        if not image.content_type.startswith('image/'):
-            raise HTTPException(status_code=400, detail="File must be an image")
-        
-        # Save uploaded image temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as temp_file:
-            content = await image.read()
-            temp_file.write(content)
-            temp_image_path = temp_file.name
-        
+    if not detection_available():
+        raise HTTPException(status_code=503, detail="Models are still loading, retry shortly")
+    
+    progress = analysis_progress(progress_id)
+    async with analysis_pool.request_slot():
         try:
+            # Validate inputs
+            if not image.content_type.startswith('image/'):
+                raise HTTPException(status_code=400, detail="File must be an image")
+            
+            # Decode uploaded image once; every stage shares the decoded pixels
+            image_bytes = await image.read()
+            try:
+                image_context = await analysis_pool.run(
+                    "decode_image",
+                    image_bytes, source=image.filename or "uploaded image", max_long_edge=analysis_max_long_edge
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            
             # Parse existing features
             try:
                 existing_visual_features = json.loads(existing_features) if existing_features else {}
             except json.JSONDecodeError:
                 existing_visual_features = {}
             
-            # Stage 1: Vision Analysis
-            logger.info("Stage 1: Vision Analysis - Object detection and visual processing")
-            
-            # Object detection
-            object_detection_result = object_detector.detect_objects(temp_image_path)
-            
-            # Spatial analysis
-            spatial_analysis_result = spatial_analyzer.analyze_spatial_zones(
-                temp_image_path, object_detection_result
-            )
-            
-            # Visual processing enhancement
-            enhanced_visual_features = visual_processor.enhance_visual_analysis(
-                temp_image_path, existing_visual_features
-            )
-            
-            # Stage 2: Rule-Based Reasoning
-            logger.info("Stage 2: Rule-Based Reasoning - Spatial guidance generation")
-            
-            spatial_guidance_result = rule_engine.generate_spatial_guidance(
-                object_detection_result,
-                spatial_analysis_result,
-                room_type,
-                improvement_notes
-            )
+            result = None
+            cache_key = None
+            if result_cache and use_cache:
+                cache_key = analysis_fingerprint(
+                    image=image_fingerprint(image_context.image),
+                    room_type=room_type,
+                    improvement_notes=improvement_notes,
+                    existing_features=existing_visual_features
+                )
+                result = result_cache.get(cache_key, "analysis")
+                if result:
+                    logger.info(f"Returning cached room analysis for fingerprint {cache_key[:12]}")
+                    result["analysis_metadata"]["cache_hit"] = True
             
-            # Prepare comprehensive improvement suggestions structure for Stage 3 & 4
-            # Extract detailed suggestions from spatial guidance
-            lighting_suggestions = []
-            color_suggestions = []
-            furniture_suggestions = []
-            
-            # Extract from improvement_suggestions
-            for suggestion in spatial_guidance_result.get('improvement_suggestions', []):
-                if isinstance(suggestion, dict):
-                    suggestion_text = suggestion.get('suggestion', '')
-                    category = suggestion.get('category', 'general')
-                    
-                    if 'light' in suggestion_text.lower() or category == 'lighting':
-                        lighting_suggestions.append(suggestion_text)
-                    elif 'color' in suggestion_text.lower() or 'paint' in suggestion_text.lower() or category == 'color':
-                        color_suggestions.append(suggestion_text)
-                    elif 'furniture' in suggestion_text.lower() or 'layout' in suggestion_text.lower() or category == 'furniture':
-                        furniture_suggestions.append(suggestion_text)
-                    else:
-                        furniture_suggestions.append(suggestion_text)  # Default to furniture
-                elif isinstance(suggestion, str):
-                    # Handle string suggestions
-                    if 'light' in suggestion.lower():
-                        lighting_suggestions.append(suggestion)
-                    elif 'color' in suggestion.lower() or 'paint' in suggestion.lower():
-                        color_suggestions.append(suggestion)
-                    else:
-                        furniture_suggestions.append(suggestion)
-            
-            # Extract from placement_guidance
-            for guidance in spatial_guidance_result.get('placement_guidance', []):
-                if isinstance(guidance, dict):
-                    recommendation = guidance.get('recommendation', '')
-                    if recommendation:
-                        furniture_suggestions.append(recommendation)
-            
-            # Extract from layout_recommendations
-            for layout_rec in spatial_guidance_result.get('layout_recommendations', []):
-                if isinstance(layout_rec, dict):
-                    recommendation = layout_rec.get('recommendation', '')
-                    if recommendation:
-                        furniture_suggestions.append(recommendation)
-                elif isinstance(layout_rec, str):
-                    furniture_suggestions.append(layout_rec)
-            
-            # Create structured improvement suggestions for AI generation
-            improvement_suggestions = {
-                "lighting": ' '.join(lighting_suggestions[:3]) if lighting_suggestions else f"Optimize lighting for {room_type} functionality and ambiance",
-                "color_ambience": ' '.join(color_suggestions[:3]) if color_suggestions else f"Enhance color scheme to improve {room_type} atmosphere",
-                "furniture_layout": ' '.join(furniture_suggestions[:4]) if furniture_suggestions else f"Improve {room_type} layout for better functionality and flow"
-            }
+            if not result:
+                result = await analyze_room_stages(
+                    image_context, room_type, improvement_notes, existing_visual_features, progress
+                )
+                if cache_key:
+                    result_cache.put(cache_key, "analysis", result)
             
-            # Stage 3 & 4: Collaborative Conceptual Generation
+            # Stage 3 & 4: Collaborative Conceptual Generation, queued on the generation scheduler
             conceptual_result = {"success": False, "error": "Conceptual generation disabled"}
             
-            if generate_concept:
-                logger.info("Stage 3 & 4: Collaborative AI Pipeline - Gemini + Diffusion")
-                
-                # Determine output directory based on analysis type
-                # Room improvement analyses go to room_improvements
-                # Exterior/architectural analyses go to conceptual_images
-                if room_type in ['bedroom', 'living_room', 'kitchen', 'dining_room', 'bathroom', 'office', 'other']:
-                    output_dir = "uploads/room_improvements"
-                else:
-                    output_dir = "uploads/conceptual_images"
-                
-                conceptual_result = conceptual_generator.generate_collaborative_concept(
-                    improvement_suggestions,
-                    object_detection_result,
-                    enhanced_visual_features,
-                    spatial_guidance_result,
-                    room_type,
-                    output_dir=output_dir
-                )
+            if generate_concept and not generation_scheduler:
+                conceptual_result = {"success": False, "error": "Conceptual generator not initialized"}
+            elif generate_concept:
+                logger.info("Stage 3 & 4: Queueing collaborative concept job - Gemini + Diffusion")
+                vision_results = result["collaborative_pipeline_results"]["stage_1_vision_analysis"]
+                reasoning_results = result["collaborative_pipeline_results"]["stage_2_rule_based_reasoning"]
+                try:
+                    concept_job = await queue_concept_job(
+                        request,
+                        reasoning_results["improvement_suggestions"],
+                        vision_results["detected_objects"],
+                        vision_results["enhanced_visual_features"],
+                        reasoning_results["spatial_guidance"],
+                        room_type,
+                        user_id=user_id,
+                        priority=priority,
+                        use_cache=use_cache
+                    )
+                    conceptual_result = dict(
+                        concept_job,
+                        success=True,
+                        status_url=f"/image-status/{concept_job['job_id']}",
+                        events_url=f"/events/{concept_job['job_id']}"
+                    )
+                except QueueFullError as e:
+                    logger.warning(f"Concept job for room analysis rejected: {e}")
+                    conceptual_result = {
+                        "success": False,
+                        "error": f"{e}. Please retry later.",
+                        "retry_after_seconds": e.retry_after
+                    }
             
-            # Combine all results
-            result = {
-                "success": True,
-                "collaborative_pipeline_results": {
-                    "stage_1_vision_analysis": {
-                        "detected_objects": object_detection_result,
-                        "spatial_zones": spatial_analysis_result,
-                        "enhanced_visual_features": enhanced_visual_features
-                    },
-                    "stage_2_rule_based_reasoning": {
-                        "spatial_guidance": spatial_guidance_result,
-                        "improvement_suggestions": improvement_suggestions
-                    },
-                    "stage_3_4_conceptual_generation": conceptual_result
-                },
-                "analysis_metadata": {
-                    "pipeline_type": "collaborative_ai_hybrid",
-                    "room_type": room_type,
-                    "improvement_notes": improvement_notes,
-                    "stages_completed": 4 if conceptual_result.get('success') else 2,
-                    "analysis_timestamp": datetime.now().isoformat(),
-                    "gemini_api_available": bool(os.getenv('GEMINI_API_KEY')),
-                    "diffusion_device": conceptual_generator.device if conceptual_generator else "unknown"
-                }
-            }
+            result["collaborative_pipeline_results"]["stage_3_4_conceptual_generation"] = conceptual_result
+            result["analysis_metadata"]["concept_job_id"] = conceptual_result.get("job_id")
             
+            progress("completed", {
+                "stage": "completed",
+                "cache_hit": result["analysis_metadata"].get("cache_hit", False),
+                "stages_completed": result["analysis_metadata"]["stages_completed"],
+                "concept_job_id": conceptual_result.get("job_id")
+            })
             return result
             
-        finally:
-            # Clean up temporary file
-            try:
-                os.unlink(temp_image_path)
-            except:
-                pass
-                
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Room analysis failed: {e}")
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+        except HTTPException as e:
+            progress("failed", {"stage": "failed", "error": str(e.detail)})
+            raise
+        except Exception as e:
+            logger.error(f"Room analysis failed: {e}")
+            progress("failed", {"stage": "failed", "error": str(e)})
+            raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+async def analyze_room_stages(image_context: ImageContext,
+                              room_type: str,
+                              improvement_notes: str,
+                              existing_visual_features: Dict[str, Any],
+                              progress) -> Dict[str, Any]:
+    """Run Stages 1-2 of /analyze-room on the analysis pool and assemble their results"""
+    # Stage 1: Vision Analysis
+    logger.info("Stage 1: Vision Analysis - Object detection and visual processing")
+    
+    # Object detection
+    object_detection_result = image_context.map_detections_to_original(
+        await analysis_pool.run("detect_objects", image_context.image)
+    )
+    progress("detection", {"stage": "detection", "detected_objects": object_detection_result})
+    
+    # Spatial analysis (the object index is shared with the rule engine)
+    object_index = ObjectIndex(object_detection_result.get('objects', []))
+    spatial_analysis_result = await analysis_pool.run(
+        "analyze_spatial_zones",
+        image_context.image, object_detection_result, image_dimensions=image_context.original_dimensions,
+        object_index=object_index
+    )
+    progress("spatial", {"stage": "spatial", "spatial_zones": spatial_analysis_result})
+    
+    # Visual processing enhancement
+    enhanced_visual_features = await analysis_pool.run(
+        "enhance_visual_analysis", image_context.image, existing_visual_features
+    )
+    progress("visual", {"stage": "visual", "enhanced_visual_features": enhanced_visual_features})
+    
+    # Stage 2: Rule-Based Reasoning
+    logger.info("Stage 2: Rule-Based Reasoning - Spatial guidance generation")
+    
+    spatial_guidance_result = await analysis_pool.run(
+        "generate_spatial_guidance",
+        object_detection_result,
+        spatial_analysis_result,
+        room_type,
+        improvement_notes,
+        object_index=object_index
+    )
+    
+    # Prepare comprehensive improvement suggestions structure for Stage 3 & 4
+    # Extract detailed suggestions from spatial guidance
+    lighting_suggestions = []
+    color_suggestions = []
+    furniture_suggestions = []
+    
+    # Extract from improvement_suggestions
+    for suggestion in spatial_guidance_result.get('improvement_suggestions', []):
+        if isinstance(suggestion, dict):
+            suggestion_text = suggestion.get('suggestion', '')
+            category = suggestion.get('category', 'general')
+            
+            if 'light' in suggestion_text.lower() or category == 'lighting':
+                lighting_suggestions.append(suggestion_text)
+            elif 'color' in suggestion_text.lower() or 'paint' in suggestion_text.lower() or category == 'color':
+                color_suggestions.append(suggestion_text)
+            elif 'furniture' in suggestion_text.lower() or 'layout' in suggestion_text.lower() or category == 'furniture':
+                furniture_suggestions.append(suggestion_text)
+            else:
+                furniture_suggestions.append(suggestion_text)  # Default to furniture
+        elif isinstance(suggestion, str):
+            # Handle string suggestions
+            if 'light' in suggestion.lower():
+                lighting_suggestions.append(suggestion)
+            elif 'color' in suggestion.lower() or 'paint' in suggestion.lower():
+                color_suggestions.append(suggestion)
+            else:
+                furniture_suggestions.append(suggestion)
+    
+    # Extract from placement_guidance
+    for guidance in spatial_guidance_result.get('placement_guidance', []):
+        if isinstance(guidance, dict):
+            recommendation = guidance.get('recommendation', '')
+            if recommendation:
+                furniture_suggestions.append(recommendation)
+    
+    # Extract from layout_recommendations
+    for layout_rec in spatial_guidance_result.get('layout_recommendations', []):
+        if isinstance(layout_rec, dict):
+            recommendation = layout_rec.get('recommendation', '')
+            if recommendation:
+                furniture_suggestions.append(recommendation)
+        elif isinstance(layout_rec, str):
+            furniture_suggestions.append(layout_rec)
+    
+    # Create structured improvement suggestions for AI generation
+    improvement_suggestions = {
+        "lighting": ' '.join(lighting_suggestions[:3]) if lighting_suggestions else f"Optimize lighting for {room_type} functionality and ambiance",
+        "color_ambience": ' '.join(color_suggestions[:3]) if color_suggestions else f"Enhance color scheme to improve {room_type} atmosphere",
+        "furniture_layout": ' '.join(furniture_suggestions[:4]) if furniture_suggestions else f"Improve {room_type} layout for better functionality and flow"
+    }
+    progress("rules", {
+        "stage": "rules",
+        "spatial_guidance": spatial_guidance_result,
+        "improvement_suggestions": improvement_suggestions
+    })
+    
+    return {
+        "success": True,
+        "collaborative_pipeline_results": {
+            "stage_1_vision_analysis": {
+                "detected_objects": object_detection_result,
+                "spatial_zones": spatial_analysis_result,
+                "enhanced_visual_features": enhanced_visual_features
+            },
+            "stage_2_rule_based_reasoning": {
+                "spatial_guidance": spatial_guidance_result,
+                "improvement_suggestions": improvement_suggestions
+            }
+        },
+        "analysis_metadata": {
+            "pipeline_type": "collaborative_ai_hybrid",
+            "room_type": room_type,
+            "improvement_notes": improvement_notes,
+            "stages_completed": 2,
+            "analysis_timestamp": datetime.now().isoformat(),
+            "gemini_api_available": bool(os.getenv('GEMINI_API_KEY')),
+            "diffusion_device": conceptual_generator.device if conceptual_generator else "unknown"
+        }
+    }
 
 @app.post("/generate-collaborative-concept")
 async def generate_collaborative_concept(
@@ -370,21 +663,25 @@ async def analyze_room_legacy(
     to enhance the existing rule-based system.
     """
     
-    if not all([object_detector, spatial_analyzer, visual_processor, rule_engine]):
+    if not detection_available() or not all([spatial_analyzer, visual_processor, rule_engine]):
         raise HTTPException(status_code=503, detail="AI service not properly initialized")
     
     # Validate image file
     if not image.content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="File must be an image")
     
-    try:
-        # Save uploaded image temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as temp_file:
-            content = await image.read()
-            temp_file.write(content)
-            temp_path = temp_file.name
-        
+    async with analysis_pool.request_slot():
         try:
+            # Decode uploaded image once; every stage shares the decoded pixels
+            image_bytes = await image.read()
+            try:
+                image_context = await analysis_pool.run(
+                    "decode_image",
+                    image_bytes, source=image.filename or "uploaded image", max_long_edge=analysis_max_long_edge
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            
             # Parse existing features from PHP system
             import json
             try:
@@ -394,22 +691,30 @@ async def analyze_room_legacy(
             
             # Stage 1: Object Detection
             logger.info("Starting object detection...")
-            detected_objects = object_detector.detect_objects(temp_path)
+            detected_objects = image_context.map_detections_to_original(
+                await analysis_pool.run("detect_objects", image_context.image)
+            )
             
             # Stage 2: Spatial Analysis
             logger.info("Analyzing spatial relationships...")
-            spatial_zones = spatial_analyzer.analyze_spatial_zones(temp_path, detected_objects)
+            object_index = ObjectIndex(detected_objects.get('objects', []))
+            spatial_zones = await analysis_pool.run(
+                "analyze_spatial_zones",
+                image_context.image, detected_objects, image_dimensions=image_context.original_dimensions,
+                object_index=object_index
+            )
             
             # Stage 3: Visual Processing Enhancement
             logger.info("Processing visual attributes...")
-            enhanced_visual_features = visual_processor.enhance_visual_analysis(
-                temp_path, existing_visual_features
+            enhanced_visual_features = await analysis_pool.run(
+                "enhance_visual_analysis", image_context.image, existing_visual_features
             )
             
             # Stage 4: Rule-Based Spatial Reasoning
             logger.info("Applying spatial reasoning rules...")
-            spatial_guidance = rule_engine.generate_spatial_guidance(
-                detected_objects, spatial_zones, room_type, improvement_notes
+            spatial_guidance = await analysis_pool.run(
+                "generate_spatial_guidance",
+                detected_objects, spatial_zones, room_type, improvement_notes, object_index=object_index
             )
             
             # Stage 5: Conceptual Image Generation (if requested)
@@ -451,7 +756,7 @@ async def analyze_room_legacy(
                         "processing_timestamp": visual_processor.get_timestamp(),
                         "ai_method": "hybrid_cv_rules_generation",
                         "model_version": "yolov8n_coco_sd1.5",
-                        "confidence_threshold": object_detector.confidence_threshold,
+                        "confidence_threshold": detection_confidence_threshold(),
                         "conceptual_generation_enabled": generate_concept and conceptual_generator is not None
                     }
                 },
@@ -470,14 +775,11 @@ async def analyze_room_legacy(
             logger.info("Room analysis with conceptual generation completed successfully")
             return response
             
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
-                
-    except Exception as e:
-        logger.error(f"Error during room analysis: {e}")
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error during room analysis: {e}")
+            raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 @app.post("/test-upload")
 async def test_upload(image: UploadFile = File(...)):
@@ -507,24 +809,28 @@ async def test_upload(image: UploadFile = File(...)):
 async def detect_objects_only(image: UploadFile = File(...)):
     """Endpoint for object detection only"""
     
-    if not object_detector:
+    if not detection_available():
         raise HTTPException(status_code=503, detail="Object detector not initialized")
     
     if not image.content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="File must be an image")
     
-    try:
-        logger.info(f"Processing object detection for image: {image.filename}")
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as temp_file:
-            content = await image.read()
-            temp_file.write(content)
-            temp_path = temp_file.name
-        
-        logger.info(f"Temporary file created: {temp_path}")
-        
+    async with analysis_pool.request_slot():
         try:
-            detected_objects = object_detector.detect_objects(temp_path)
+            logger.info(f"Processing object detection for image: {image.filename}")
+            
+            image_bytes = await image.read()
+            try:
+                image_context = await analysis_pool.run(
+                    "decode_image",
+                    image_bytes, source=image.filename or "uploaded image", max_long_edge=analysis_max_long_edge
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            
+            detected_objects = image_context.map_detections_to_original(
+                await analysis_pool.run("detect_objects", image_context.image)
+            )
             logger.info(f"Object detection completed successfully")
             
             return {
@@ -532,44 +838,121 @@ async def detect_objects_only(image: UploadFile = File(...)):
                 "detected_objects": detected_objects,
                 "metadata": {
                     "model": "yolov8n",
-                    "confidence_threshold": object_detector.confidence_threshold
+                    "confidence_threshold": detection_confidence_threshold()
                 }
             }
-        finally:
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
-                logger.info(f"Temporary file cleaned up: {temp_path}")
-                
-    except Exception as e:
-        logger.error(f"Object detection error: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Detection failed: {str(e)}")
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Object detection error: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=f"Detection failed: {str(e)}")
+
+@app.post("/detect-objects/batch")
+async def detect_objects_batch(images: List[UploadFile] = File(...)):
+    """
+    Endpoint for object detection on several images in one request
+    
+    Images are run through YOLO in batched forward passes. Each entry of the
+    response carries the /detect-objects result schema for one uploaded file.
+    """
+    
+    if not detection_available():
+        raise HTTPException(status_code=503, detail="Object detector not initialized")
+    
+    max_files = int(os.getenv('DETECTION_BATCH_MAX_FILES', '64'))
+    if len(images) > max_files:
+        raise HTTPException(status_code=400, detail=f"At most {max_files} images per batch")
+    
+    async with analysis_pool.request_slot():
+        try:
+            logger.info(f"Processing batched object detection for {len(images)} images")
+            
+            # Undecodable files get a per-image error instead of failing the whole batch
+            decoded = []
+            errors = {}
+            for index, upload in enumerate(images):
+                source = upload.filename or f"image {index}"
+                try:
+                    if not (upload.content_type or '').startswith('image/'):
+                        raise ValueError(f"{source} is not an image")
+                    upload_bytes = await upload.read()
+                    decoded.append(await analysis_pool.run(
+                        "decode_image", upload_bytes, source=source, max_long_edge=analysis_max_long_edge
+                    ))
+                except ValueError as e:
+                    decoded.append(None)
+                    errors[index] = str(e)
+            
+            batch_results = await analysis_pool.run(
+                "detect_objects_batch",
+                [context.image if context else None for context in decoded],
+                batch_size=int(os.getenv('DETECTION_BATCH_SIZE', '16'))
+            )
+            batch_results = [
+                context.map_detections_to_original(detected) if context else detected
+                for context, detected in zip(decoded, batch_results)
+            ]
+            
+            results = []
+            for index, (upload, detected_objects) in enumerate(zip(images, batch_results)):
+                entry = {
+                    "filename": upload.filename,
+                    "success": index not in errors and "error" not in detected_objects["detection_metadata"],
+                    "detected_objects": detected_objects
+                }
+                if index in errors:
+                    entry["error"] = errors[index]
+                results.append(entry)
+            
+            logger.info(f"Batched object detection completed successfully")
+            
+            return {
+                "success": True,
+                "results": results,
+                "metadata": {
+                    "model": "yolov8n",
+                    "confidence_threshold": detection_confidence_threshold(),
+                    "images_received": len(images),
+                    "images_processed": sum(1 for entry in results if entry["success"])
+                }
+            }
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Batched object detection error: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=f"Detection failed: {str(e)}")
 
 @app.post("/generate-concept")
 async def start_conceptual_image_generation(
-    background_tasks: BackgroundTasks,
+    request: Request,
     improvement_suggestions: str = Form(...),
     detected_objects: str = Form(default="{}"),
     visual_features: str = Form(default="{}"),
     spatial_guidance: str = Form(default="{}"),
     room_type: str = Form(...),
-    save_image: bool = Form(default=True)
+    save_image: bool = Form(default=True),
+    user_id: str = Form(default=""),
+    priority: int = Form(default=5),
+    use_cache: bool = Form(default=True)
 ):
     """
     Start asynchronous real AI conceptual image generation using Stable Diffusion
     
     Returns immediately with a job_id for status polling.
-    The actual image generation runs in the background.
+    The job is queued on the generation scheduler; when the queue is full the
+    request is rejected with 429 and a Retry-After header. When an identical
+    request was generated before (and use_cache is true) the job is completed
+    immediately with the stored image.
     """
     
-    if not conceptual_generator:
+    if not conceptual_generator or not generation_scheduler:
         raise HTTPException(status_code=503, detail="Conceptual generator not initialized")
     
     try:
         import json
         
-        # Generate unique job ID
-        job_id = str(uuid.uuid4())
-        
         # Parse input data with defensive handling
         try:
             suggestions_data = json.loads(improvement_suggestions)
@@ -602,29 +985,21 @@ async def start_conceptual_image_generation(
         except json.JSONDecodeError as e:
             raise HTTPException(status_code=400, detail=f"Invalid JSON data: {str(e)}")
         
-        # Create job record
-        job = ImageGenerationJob(job_id)
-        image_generation_jobs[job_id] = job
-        
-        # Start background image generation
-        background_tasks.add_task(
-            generate_image_background,
-            job_id,
-            suggestions_data,
-            objects_data,
-            features_data,
-            spatial_data,
-            room_type
-        )
-        
-        logger.info(f"Started asynchronous image generation job: {job_id}")
+        try:
+            concept_job = await queue_concept_job(
+                request, suggestions_data, objects_data, features_data, spatial_data, room_type,
+                user_id=user_id, priority=priority, use_cache=use_cache
+            )
+        except QueueFullError as e:
+            raise HTTPException(
+                status_code=429,
+                detail=f"{e}. Please retry later.",
+                headers={"Retry-After": str(e.retry_after)}
+            )
         
         return {
             "success": True,
-            "job_id": job_id,
-            "status": "pending",
-            "message": "Image generation started. Use /image-status/{job_id} to check progress.",
-            "estimated_completion_time": "30-60 seconds",
+            **concept_job,
             "endpoint_metadata": {
                 "endpoint": "generate-concept",
                 "room_type": room_type,
@@ -633,29 +1008,165 @@ async def start_conceptual_image_generation(
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to start asynchronous image generation: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to start image generation: {str(e)}")
 
 
+def save_new_job(job: ImageGenerationJob):
+    """
+    Store a newly created job, reporting a store full of unfinished jobs like a full queue
+    
+    Raises:
+        QueueFullError: If no finished job can be evicted to make room
+    """
+    try:
+        job_store.save(job)
+    except JobStoreFullError as e:
+        logger.warning(f"Rejected image generation job {job.job_id}: {e}")
+        raise QueueFullError(generation_scheduler.retry_after_seconds(), job_store.count()) from e
+
+
+async def queue_concept_job(request: Request,
+                            suggestions_data: dict,
+                            objects_data: dict,
+                            features_data: dict,
+                            spatial_data: dict,
+                            room_type: str,
+                            user_id: str = "",
+                            priority: int = 5,
+                            use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Create an image generation job for Stages 3-4 and queue it on the generation scheduler
+    
+    An identical earlier generation completes the job immediately from the
+    result cache.
+    
+    Raises:
+        QueueFullError: If the generation queue or the job store is full
+    """
+    job_id = str(uuid.uuid4())
+    
+    # Create job record
+    job = ImageGenerationJob(job_id)
+    
+    cache_key = None
+    if result_cache and use_cache:
+        cache_key = analysis_fingerprint(
+            room_type=room_type,
+            improvement_suggestions=suggestions_data,
+            detected_objects=objects_data,
+            visual_features=features_data,
+            spatial_guidance=spatial_data
+        )
+        cached_concept = result_cache.get(cache_key, "concept")
+        if cached_concept:
+            job.status = "completed"
+            job.completed_at = datetime.now()
+            job.image_url = cached_concept.get('image_url')
+            job.image_path = cached_concept.get('image_path')
+            job.generation_metadata = dict(cached_concept.get('generation_metadata') or {}, cache_hit=True)
+            save_new_job(job)
+            progress_events.publish(job_id, "completed", job.to_dict())
+            logger.info(f"Completed image generation job {job_id} from cache")
+            
+            return {
+                "job_id": job_id,
+                "status": "completed",
+                "message": "Identical request generated before; returning the stored image.",
+                "cache_hit": True,
+                "queue_position": 0,
+                "estimated_completion_seconds": 0,
+                "estimated_completion_time": "completed"
+            }
+    
+    save_new_job(job)
+    
+    # Stage 3 is pure network wait: start it on the event loop now so the description
+    # is usually ready by the time a diffusion worker picks the job up
+    description_task = asyncio.create_task(
+        conceptual_generator.generate_design_description_async(
+            suggestions_data, objects_data, features_data, spatial_data, room_type
+        )
+    )
+    
+    # Queue image generation (priority 0 is most urgent; fairness is per user)
+    try:
+        queue_position = await generation_scheduler.submit(
+            job_id,
+            functools.partial(
+                generate_image_background,
+                job_id,
+                description_task,
+                suggestions_data,
+                objects_data,
+                features_data,
+                spatial_data,
+                room_type,
+                cache_key
+            ),
+            user_id=user_id or (request.client.host if request.client else "anonymous"),
+            priority=max(0, min(priority, 9))
+        )
+    except QueueFullError as e:
+        description_task.cancel()
+        job_store.delete(job_id)
+        logger.warning(f"Rejected image generation job {job_id}: {e}")
+        raise
+    
+    estimated_seconds = generation_scheduler.estimate_seconds(job_id)
+    progress_events.publish(job_id, "queued", dict(
+        job.to_dict(), queue_position=queue_position, estimated_completion_seconds=estimated_seconds
+    ))
+    logger.info(f"Queued asynchronous image generation job: {job_id} (position {queue_position})")
+    
+    return {
+        "job_id": job_id,
+        "status": "pending",
+        "message": "Image generation started. Stream /events/{job_id} or poll /image-status/{job_id} for progress.",
+        "queue_position": queue_position,
+        "estimated_completion_seconds": estimated_seconds,
+        "estimated_completion_time": f"about {estimated_seconds} seconds" if estimated_seconds is not None else "unknown"
+    }
+
+
 async def generate_image_background(
     job_id: str,
+    description_task: "asyncio.Task",
     suggestions_data: dict,
     objects_data: dict,
     features_data: dict,
     spatial_data: dict,
-    room_type: str
-):
+    room_type: str,
+    cache_key: str = None
+) -> bool:
     """
-    Background task for generating real AI images with Stable Diffusion
+    Scheduled job for generating real AI images with Stable Diffusion
+    
+    Progress is published on the job's /events channel: processing, description,
+    one diffusion_step per denoising step, then completed or failed.
+    
+    Returns:
+        True if the image came from a real diffusion run, so the scheduler only
+        averages those durations into its ETA
+    
+    Raises:
+        JobFailedError: After the job has been recorded and published as failed
     """
-    job = image_generation_jobs.get(job_id)
+    job = job_store.get(job_id)
     if not job:
         logger.error(f"Job {job_id} not found in background task")
-        return
+        description_task.cancel()
+        progress_events.publish(job_id, "failed", {"job_id": job_id, "status": "failed", "error_message": "Job not found"})
+        raise JobFailedError(f"Job {job_id} not found")
     
+    progress = progress_events.publisher(job_id)
     try:
         job.status = "processing"
+        job_store.save(job)
+        progress("processing", job.to_dict())
         logger.info(f"Starting background image generation for job {job_id}")
         
         # Determine output directory based on analysis type
@@ -666,17 +1177,21 @@ async def generate_image_background(
         else:
             output_dir = "C:/xampp/htdocs/buildhub/uploads/conceptual_images"
         
-        # Run the collaborative conceptual generation in thread pool
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            executor,
-            conceptual_generator.generate_collaborative_concept,
+        # Stage 3 was started on the event loop at submission; only Stage 4 needs a worker thread
+        design_description = await description_task
+        progress("description", conceptual_generator.description_progress(design_description))
+        
+        # Run Stable Diffusion on the diffusion worker pool (step events are published from the worker thread)
+        result = await generation_scheduler.run_blocking(
+            conceptual_generator.generate_concept_from_description,
+            design_description,
             suggestions_data,
             objects_data,
             features_data,
             spatial_data,
             room_type,
-            output_dir
+            output_dir,
+            progress
         )
         
         if result and result.get('success'):
@@ -696,17 +1211,39 @@ async def generate_image_background(
             if job.image_path and os.path.exists(job.image_path):
                 logger.info(f"🔍 [DEBUG] - File size: {os.path.getsize(job.image_path)} bytes")
             
+            if cache_key and job.generation_metadata.get('generation_type') == 'real_stable_diffusion':
+                result_cache.put(
+                    cache_key,
+                    "concept",
+                    {
+                        "image_url": job.image_url,
+                        "image_path": job.image_path,
+                        "generation_metadata": job.generation_metadata
+                    },
+                    image_path=job.image_path
+                )
+            
         else:
             job.status = "failed"
             job.completed_at = datetime.now()
             job.error_message = result.get('error', 'Unknown error during image generation')
             logger.error(f"🔍 [DEBUG] Background image generation failed for job {job_id}: {job.error_message}")
+        
+        job_store.save(job)
+        progress(job.status, job.to_dict())
             
     except Exception as e:
         job.status = "failed"
         job.completed_at = datetime.now()
         job.error_message = str(e)
+        job_store.save(job)
+        progress("failed", job.to_dict())
         logger.error(f"Background image generation error for job {job_id}: {e}", exc_info=True)
+        raise JobFailedError(job.error_message) from e
+    
+    if job.status == "failed":
+        raise JobFailedError(job.error_message)
+    return job.generation_metadata.get('generation_type') == 'real_stable_diffusion'
 
 
 @app.get("/image-status/{job_id}")
@@ -720,7 +1257,7 @@ async def get_image_generation_status(job_id: str):
     - error_message: when failed
     """
     
-    job = image_generation_jobs.get(job_id)
+    job = job_store.get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
     
@@ -751,16 +1288,21 @@ async def get_image_generation_status(job_id: str):
             "fallback_message": "Real AI image generation failed"
         })
     elif job.status == "processing":
-        # Calculate estimated remaining time
-        elapsed = (datetime.now() - job.created_at).total_seconds()
-        estimated_remaining = max(0, 45 - elapsed)  # Estimate 45 seconds total
+        # Estimate from measured job durations; jobs started by another worker fall back to 45 seconds
+        estimated_remaining = generation_scheduler.estimate_seconds(job_id) if generation_scheduler else None
+        if estimated_remaining is None:
+            elapsed = (datetime.now() - job.created_at).total_seconds()
+            estimated_remaining = max(0, 45 - elapsed)
         response.update({
             "estimated_remaining_seconds": int(estimated_remaining),
             "progress_message": "Generating real AI image with Stable Diffusion..."
         })
     else:  # pending
+        queue_position = generation_scheduler.position(job_id) if generation_scheduler else None
         response.update({
-            "progress_message": "Image generation queued..."
+            "queue_position": queue_position,
+            "estimated_remaining_seconds": generation_scheduler.estimate_seconds(job_id) if generation_scheduler else None,
+            "progress_message": f"Image generation queued (position {queue_position})..." if queue_position else "Image generation queued..."
         })
     
     return response
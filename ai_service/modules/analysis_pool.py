@@ -0,0 +1,230 @@
+"""
+Analysis Pool Module
+Runs CPU-bound Stage 1-2 analysis off the asyncio event loop.
+
+Image decoding, object detection, spatial analysis, visual processing and
+rule-based spatial guidance are dispatched by task name to a dedicated executor:
+1. thread: a bounded thread pool calling the API process's analyzers
+   (OpenCV, NumPy, PyTorch and ONNX Runtime release the GIL while they work)
+2. process: worker processes that each load their own analyzers once
+
+An asyncio semaphore bounds how many analysis requests run at the same time;
+requests beyond the limit wait for a slot, and both waiting requests and
+queued tasks are reported as queue depth.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+import multiprocessing
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+def _decode_image(components: Dict[str, Any], data: bytes, source: str = "uploaded image", max_long_edge: int = 0):
+    from .image_context import ImageContext
+    return ImageContext.from_bytes(data, source=source, max_long_edge=max_long_edge)
+
+def _detect_objects(components: Dict[str, Any], image):
+    return components["object_detector"].detect_objects_in_image(image)
+
+def _detect_objects_batch(components: Dict[str, Any], images, batch_size: int = 16):
+    return components["object_detector"].detect_objects_batch(images, batch_size=batch_size)
+
+def _analyze_spatial_zones(components: Dict[str, Any], image, detected_objects, image_dimensions=None, object_index=None):
+    return components["spatial_analyzer"].analyze_spatial_zones_in_image(
+        image, detected_objects, image_dimensions=image_dimensions, object_index=object_index
+    )
+
+def _enhance_visual_analysis(components: Dict[str, Any], image, existing_features):
+    return components["visual_processor"].enhance_visual_analysis_in_image(image, existing_features)
+
+def _generate_spatial_guidance(components: Dict[str, Any], detected_objects, spatial_zones, room_type: str,
+                               improvement_notes: str, object_index=None):
+    return components["rule_engine"].generate_spatial_guidance(
+        detected_objects, spatial_zones, room_type, improvement_notes, object_index=object_index
+    )
+
+ANALYSIS_TASKS = {
+    "decode_image": _decode_image,
+    "detect_objects": _detect_objects,
+    "detect_objects_batch": _detect_objects_batch,
+    "analyze_spatial_zones": _analyze_spatial_zones,
+    "enhance_visual_analysis": _enhance_visual_analysis,
+    "generate_spatial_guidance": _generate_spatial_guidance
+}
+
+# Analyzers of a process-mode worker, created once by _init_worker
+_worker_components: Dict[str, Any] = {}
+
+def _init_worker(confidence_threshold: float):
+    """Initializer of a process-mode worker: load and warm up the analyzers"""
+    from .object_detector import ObjectDetector
+    from .spatial_analyzer import SpatialAnalyzer
+    from .visual_processor import VisualProcessor
+    from .rule_engine import EnhancedRuleEngine
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    detector = ObjectDetector(confidence_threshold=confidence_threshold)
+    detector.warm_up()
+    _worker_components.update(
+        object_detector=detector,
+        spatial_analyzer=SpatialAnalyzer(),
+        visual_processor=VisualProcessor(),
+        rule_engine=EnhancedRuleEngine()
+    )
+    logger.info(f"Analysis worker {multiprocessing.current_process().name} ready")
+
+def _run_in_worker(task: str, args: tuple, kwargs: Dict[str, Any]):
+    return ANALYSIS_TASKS[task](_worker_components, *args, **kwargs)
+
+def _worker_pid() -> int:
+    # Held briefly so the start-up pings spread over all workers instead of the first one ready
+    time.sleep(0.05)
+    return os.getpid()
+
+class AnalysisPool:
+    """Dedicated executor and request limit for Stage 1-2 analysis"""
+
+    def __init__(self, components: Callable[[], Dict[str, Any]], mode: str = "thread",
+                 workers: int = 2, max_concurrent_requests: int = 4, confidence_threshold: float = 0.5):
+        """
+        Initialize analysis pool
+
+        Args:
+            components: Returns the API process's analyzers by name (thread mode)
+            mode: "thread" or "process"
+            workers: Number of worker threads or processes
+            max_concurrent_requests: Analysis requests allowed to run at once; others wait
+            confidence_threshold: Detector confidence threshold of process-mode workers
+        """
+        self.components = components
+        self.mode = mode if mode in ("thread", "process") else "thread"
+        self.workers = max(1, int(workers))
+        self.max_concurrent_requests = max(1, int(max_concurrent_requests))
+        self.confidence_threshold = confidence_threshold
+
+        if self.mode == "process":
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(confidence_threshold,)
+            )
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="analysis")
+
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        self._lock = threading.Lock()
+        self.active_requests = 0
+        self.waiting_requests = 0
+        self.tasks_in_flight = 0
+        self.tasks_completed = 0
+        self.tasks_failed = 0
+        self._task_seconds = 0.0
+
+    def start(self):
+        """Spawn the worker processes now so their models load before the first request"""
+        if self.mode == "process":
+            for _ in range(self.workers):
+                self.executor.submit(_worker_pid)
+
+    def wait_until_ready(self, poll_seconds: float = 0.5) -> int:
+        """
+        Block until every worker process has loaded and warmed up its analyzers
+
+        Returns immediately in thread mode, where the API process's analyzers are used.
+
+        Returns:
+            Number of ready worker processes
+
+        Raises:
+            BrokenProcessPool: If a worker failed to initialize
+        """
+        if self.mode != "process":
+            return 0
+        ready = set()
+        while True:
+            futures = [self.executor.submit(_worker_pid) for _ in range(self.workers)]
+            ready.update(future.result() for future in futures)
+            if len(ready) >= self.workers:
+                return len(ready)
+            time.sleep(poll_seconds)
+
+    @asynccontextmanager
+    async def request_slot(self):
+        """Hold one of the max_concurrent_requests analysis slots for the duration of a request"""
+        self.waiting_requests += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting_requests -= 1
+        self.active_requests += 1
+        try:
+            yield
+        finally:
+            self.active_requests -= 1
+            self._semaphore.release()
+
+    async def run(self, task: str, *args, **kwargs):
+        """
+        Run one analysis task on the pool
+
+        Args:
+            task: Name in ANALYSIS_TASKS, e.g. "detect_objects"
+            *args, **kwargs: Task arguments (must be picklable in process mode)
+
+        Returns:
+            The analyzer's result
+        """
+        loop = asyncio.get_running_loop()
+        if self.mode == "process":
+            call = (_run_in_worker, task, args, kwargs)
+        else:
+            call = (self._run_local, task, args, kwargs)
+
+        with self._lock:
+            self.tasks_in_flight += 1
+        started = time.monotonic()
+        try:
+            result = await loop.run_in_executor(self.executor, *call)
+        except Exception:
+            with self._lock:
+                self.tasks_failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.tasks_in_flight -= 1
+        with self._lock:
+            self.tasks_completed += 1
+            self._task_seconds += time.monotonic() - started
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool statistics for health reporting"""
+        with self._lock:
+            queued_tasks = max(0, self.tasks_in_flight - self.workers)
+            return {
+                "mode": self.mode,
+                "workers": self.workers,
+                "max_concurrent_requests": self.max_concurrent_requests,
+                "active_requests": self.active_requests,
+                "waiting_requests": self.waiting_requests,
+                "tasks_in_flight": self.tasks_in_flight,
+                "queued_tasks": queued_tasks,
+                "queue_depth": self.waiting_requests + queued_tasks,
+                "tasks_completed": self.tasks_completed,
+                "tasks_failed": self.tasks_failed,
+                "average_task_ms": round(self._task_seconds / self.tasks_completed * 1000, 1) if self.tasks_completed else 0
+            }
+
+    def shutdown(self):
+        """Stop the workers; queued tasks are cancelled"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run_local(self, task: str, args: tuple, kwargs: Dict[str, Any]):
+        return ANALYSIS_TASKS[task](self.components(), *args, **kwargs)
@@ -12,15 +12,47 @@ Security: All API keys are loaded from environment variables.
 """
 
 import os
+import asyncio
 import logging
-import requests
 import json
-from typing import Dict, Any, Optional, List
+import base64
+from typing import Dict, Any, Optional, List, Callable
 from datetime import datetime
 import tempfile
+import threading
+
+from .diffusion_worker import DiffusionProcessPool, load_stable_diffusion_pipeline
+from .diffusion_batcher import DiffusionBatcher
+from .description_cache import DescriptionCache
+from .gemini_client import GeminiClient, DEFAULT_BASE_URL
 
 logger = logging.getLogger(__name__)
 
+# Linear approximation of the SD v1.5 VAE decoder: latent channels -> RGB in [-1, 1]
+LATENT_RGB_FACTORS = [
+    [0.3512, 0.2297, 0.3227],
+    [0.3250, 0.4974, 0.2350],
+    [-0.2829, 0.1762, 0.2721],
+    [-0.2120, -0.2616, -0.7177]
+]
+
+def latents_to_preview(latents) -> Optional[str]:
+    """Approximate RGB preview of one image's latents as a JPEG data URL, without running the VAE"""
+    try:
+        import numpy as np
+        import cv2
+        values = latents.detach().float().cpu().numpy() if hasattr(latents, 'detach') else np.asarray(latents, dtype=np.float32)
+        rgb = np.einsum('khw,kc->hwc', values, np.asarray(LATENT_RGB_FACTORS, dtype=np.float32))
+        rgb = np.clip((rgb + 1.0) * 127.5, 0, 255).astype(np.uint8)
+        preview = cv2.resize(rgb[:, :, ::-1], (rgb.shape[1] * 2, rgb.shape[0] * 2), interpolation=cv2.INTER_LINEAR)
+        ok, encoded = cv2.imencode('.jpg', preview, [cv2.IMWRITE_JPEG_QUALITY, 70])
+        if not ok:
+            return None
+        return "data:image/jpeg;base64," + base64.b64encode(encoded.tobytes()).decode('ascii')
+    except Exception as e:
+        logger.debug(f"Latent preview failed: {e}")
+        return None
+
 def convert_numpy_types(obj):
     """Convert NumPy types to native Python types for JSON serialization"""
     try:
@@ -44,6 +76,35 @@ def convert_numpy_types(obj):
 class ConceptualImageGenerator:
     """Generates real AI conceptual visualization images using Stable Diffusion"""
     
+    GEMINI_MODEL = "gemini-1.5-flash"
+    
+    GEMINI_GENERATION_CONFIG = {
+        "temperature": 0.7,
+        "topK": 40,
+        "topP": 0.95,
+        "maxOutputTokens": 400,
+        "stopSequences": []
+    }
+    
+    GEMINI_SAFETY_SETTINGS = [
+        {
+            "category": "HARM_CATEGORY_HARASSMENT",
+            "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+        },
+        {
+            "category": "HARM_CATEGORY_HATE_SPEECH",
+            "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+        },
+        {
+            "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+            "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+        },
+        {
+            "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
+            "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+        }
+    ]
+    
     def __init__(self, model_id: str = "runwayml/stable-diffusion-v1-5"):
         """Initialize the conceptual image generator"""
         self.model_id = model_id
@@ -51,51 +112,106 @@ class ConceptualImageGenerator:
         self.is_initialized = False
         self.device = "cpu"  # Default device for compatibility
         
+        # DIFFUSION_EXECUTION=process runs inference in long-lived worker processes
+        self.execution_mode = os.getenv('DIFFUSION_EXECUTION', 'thread').lower()
+        self.worker_processes = int(os.getenv('DIFFUSION_WORKER_PROCESSES', '1'))
+        self.process_pool = None
+        
+        # DIFFUSION_BATCH_MAX_SIZE > 1 denoises concurrently queued prompts in one pipeline call
+        self.batch_max_size = int(os.getenv('DIFFUSION_BATCH_MAX_SIZE', '1'))
+        self.batch_wait_seconds = float(os.getenv('DIFFUSION_BATCH_WAIT_MS', '250')) / 1000.0
+        self.batcher = None
+        self._init_lock = threading.Lock()
+        
+        # Latent previews are attached to every Nth diffusion_step progress event (0 disables)
+        self.preview_every = int(os.getenv('DIFFUSION_PREVIEW_EVERY', '5'))
+        
         # Load Gemini API key from environment
         self.gemini_api_key = os.getenv('GEMINI_API_KEY')
         if not self.gemini_api_key:
             logger.warning("GEMINI_API_KEY not found in environment variables")
         
+        # One pooled client shared by every generation job
+        self.gemini_client = None
+        if self.gemini_api_key:
+            self.gemini_client = GeminiClient(
+                self.gemini_api_key,
+                model=self.GEMINI_MODEL,
+                base_url=os.getenv('GEMINI_API_BASE_URL', DEFAULT_BASE_URL),
+                timeout=float(os.getenv('GEMINI_TIMEOUT_SECONDS', '30')),
+                max_concurrency=int(os.getenv('GEMINI_MAX_CONCURRENCY', '4')),
+                max_retries=int(os.getenv('GEMINI_MAX_RETRIES', '3')),
+                failure_threshold=int(os.getenv('GEMINI_CIRCUIT_FAILURE_THRESHOLD', '5')),
+                reset_timeout=float(os.getenv('GEMINI_CIRCUIT_RESET_SECONDS', '60'))
+            )
+        
+        # Identical structured input yields a cached description instead of a new Gemini call
+        self.description_cache = None
+        if os.getenv('GEMINI_CACHE_ENABLED', 'true').lower() == 'true':
+            self.description_cache = DescriptionCache(
+                cache_dir=os.getenv('GEMINI_CACHE_DIR', 'gemini_cache') or None,
+                max_entries=int(os.getenv('GEMINI_CACHE_MAX_ENTRIES', '256')),
+                ttl_seconds=float(os.getenv('GEMINI_CACHE_TTL_SECONDS', '604800'))
+            )
+        
         logger.info("ConceptualImageGenerator initialized for real AI image generation")
     
+    def resolve_device(self) -> str:
+        """Detect the device Stable Diffusion will run on without loading the pipeline"""
+        try:
+            import torch
+            return "cuda" if torch.cuda.is_available() else "cpu"
+        except ImportError:
+            return "cpu"
+    
+    def required_concurrency(self) -> int:
+        """Concurrent generation jobs needed to keep every worker process busy and fill a full batch"""
+        worker_processes = max(1, self.worker_processes) if self.execution_mode == "process" else 1
+        return max(worker_processes, self.batch_max_size)
+    
     def _initialize_diffusion_pipeline(self):
         """Initialize Stable Diffusion pipeline for real image generation"""
-        if self.is_initialized:
-            return
-        
+        # Several diffusion worker threads may reach this at the same time
+        with self._init_lock:
+            if not self.is_initialized:
+                self._load_diffusion_pipeline()
+    
+    def _load_diffusion_pipeline(self):
         try:
             logger.info("Loading Stable Diffusion pipeline for real AI image generation...")
             
             # Try to import diffusion libraries
             import torch
-            from diffusers import StableDiffusionPipeline
+            import diffusers
             
             # Detect device
-            self.device = "cuda" if torch.cuda.is_available() else "cpu"
+            self.device = self.resolve_device()
             logger.info(f"Using device: {self.device}")
             
-            # Load pipeline with optimizations
-            if self.device == "cuda":
-                self.pipeline = StableDiffusionPipeline.from_pretrained(
+            if self.execution_mode == "process":
+                # Each worker process loads its own copy of the pipeline
+                self.process_pool = DiffusionProcessPool(
                     self.model_id,
-                    torch_dtype=torch.float16,
-                    safety_checker=None,
-                    requires_safety_checker=False
+                    device=self.device,
+                    num_processes=self.worker_processes,
+                    request_timeout=float(os.getenv('DIFFUSION_WORKER_TIMEOUT', '900'))
                 )
-                self.pipeline = self.pipeline.to(self.device)
-                self.pipeline.enable_attention_slicing()
+                if not self.process_pool.start():
+                    self.process_pool = None
+                    raise RuntimeError("No diffusion worker process could load the pipeline")
             else:
-                # CPU optimization
-                self.pipeline = StableDiffusionPipeline.from_pretrained(
-                    self.model_id,
-                    torch_dtype=torch.float32,
-                    safety_checker=None,
-                    requires_safety_checker=False
+                # Load pipeline with optimizations
+                self.pipeline = load_stable_diffusion_pipeline(self.model_id, self.device)
+            
+            if self.batch_max_size > 1:
+                self.batcher = DiffusionBatcher(
+                    self._run_diffusion_batch,
+                    max_batch_size=self.batch_max_size,
+                    max_wait_seconds=self.batch_wait_seconds
                 )
-                self.pipeline = self.pipeline.to(self.device)
             
             self.is_initialized = True
-            logger.info("✅ Stable Diffusion pipeline loaded successfully for real AI image generation")
+            logger.info(f"✅ Stable Diffusion pipeline loaded successfully for real AI image generation ({self.execution_mode} mode)")
             
         except ImportError as e:
             logger.error(f"❌ Failed to import diffusion libraries: {e}")
@@ -106,31 +222,118 @@ class ConceptualImageGenerator:
             logger.info("Falling back to placeholder generation")
             self.is_initialized = False
     
+    def warm_up(self):
+        """
+        Load the diffusion pipeline and run a single-step dummy generation
+        
+        Raises:
+            RuntimeError: If the pipeline could not be loaded
+        """
+        self._initialize_diffusion_pipeline()
+        if not self.is_initialized:
+            raise RuntimeError("Stable Diffusion pipeline unavailable, placeholder images will be used")
+        
+        # Same resolution as real requests so the kernels that get initialized are the ones used
+        self._run_diffusion_batch({
+            "prompt": "modern interior room",
+            "num_inference_steps": 1,
+            "guidance_scale": 8.0,
+            "width": 512,
+            "height": 512
+        })
+    
     def generate_collaborative_concept(self, 
                                      improvement_suggestions: Dict[str, Any],
                                      detected_objects: Dict[str, Any],
                                      visual_features: Dict[str, Any],
                                      spatial_guidance: Dict[str, Any],
                                      room_type: str,
-                                     output_dir: str = None) -> Dict[str, Any]:
+                                     output_dir: str = None,
+                                     progress: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """
         Generate real AI conceptual visualization using collaborative AI pipeline:
         1. Vision analysis (already done - passed as parameters)
         2. Rule-based reasoning (already done - passed as improvement_suggestions)
         3. Gemini-based design description generation
         4. Real Stable Diffusion-based conceptual image synthesis
+        
+        progress(event, data) is called when the description is ready and after each diffusion step.
+        """
+        logger.info("🎨 Starting collaborative AI pipeline for REAL AI image generation")
+        
+        # Step 3: Generate design description using Gemini
+        design_description = self._generate_design_description_with_gemini(
+            improvement_suggestions, detected_objects, visual_features, spatial_guidance, room_type
+        )
+        if progress:
+            progress("description", self.description_progress(design_description))
+        
+        return self.generate_concept_from_description(
+            design_description, improvement_suggestions, detected_objects, visual_features,
+            spatial_guidance, room_type, output_dir, progress
+        )
+    
+    @staticmethod
+    def description_progress(design_description: Dict[str, Any]) -> Dict[str, Any]:
+        """Payload of the Stage 3 progress event"""
+        return {
+            "stage": "description",
+            "success": bool(design_description.get('success')),
+            "model_used": design_description.get('model_used'),
+            "description": design_description.get('description', '')
+        }
+    
+    async def generate_design_description_async(self,
+                                                improvement_suggestions: Dict[str, Any],
+                                                detected_objects: Dict[str, Any],
+                                                visual_features: Dict[str, Any],
+                                                spatial_guidance: Dict[str, Any],
+                                                room_type: str) -> Dict[str, Any]:
+        """
+        Stage 3 on the event loop: the Gemini call is awaited instead of holding a worker thread
         """
         try:
-            logger.info("🎨 Starting collaborative AI pipeline for REAL AI image generation")
+            if not self.gemini_api_key:
+                logger.warning("Gemini API key not available, using fallback description")
+                return self._generate_fallback_description(improvement_suggestions, room_type)
             
-            # Step 3: Generate design description using Gemini
-            design_description = self._generate_design_description_with_gemini(
+            structured_input = self._prepare_structured_input_for_gemini(
                 improvement_suggestions, detected_objects, visual_features, spatial_guidance, room_type
             )
             
+            cache_key, cached = self._lookup_cached_description(structured_input)
+            if cached:
+                return cached
+            
+            gemini_response = await self.gemini_client.generate_content_async(
+                structured_input, self.GEMINI_GENERATION_CONFIG, self.GEMINI_SAFETY_SETTINGS
+            )
+            return self._description_from_gemini_response(
+                gemini_response, cache_key, improvement_suggestions, room_type
+            )
+            
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Gemini description generation failed: {e}")
+            return self._generate_fallback_description(improvement_suggestions, room_type)
+    
+    def generate_concept_from_description(self,
+                                          design_description: Dict[str, Any],
+                                          improvement_suggestions: Dict[str, Any],
+                                          detected_objects: Dict[str, Any],
+                                          visual_features: Dict[str, Any],
+                                          spatial_guidance: Dict[str, Any],
+                                          room_type: str,
+                                          output_dir: str = None,
+                                          progress: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Run Stage 4 (Stable Diffusion) for an existing design description and assemble the pipeline result
+        """
+        try:
             # Step 4: Generate REAL conceptual visualization using Stable Diffusion
             conceptual_image_result = self._generate_real_ai_image(
-                design_description, room_type, output_dir
+                design_description, room_type, output_dir, progress
             )
             
             # Combine results
@@ -211,25 +414,53 @@ class ConceptualImageGenerator:
                 improvement_suggestions, detected_objects, visual_features, spatial_guidance, room_type
             )
             
+            cache_key, cached = self._lookup_cached_description(structured_input)
+            if cached:
+                return cached
+            
             # Call Gemini API
             gemini_response = self._call_gemini_api(structured_input)
-            
-            if gemini_response.get('success'):
-                return {
-                    "success": True,
-                    "description": gemini_response['description'],
-                    "model_used": "gemini-pro",
-                    "input_tokens": gemini_response.get('input_tokens', 0),
-                    "output_tokens": gemini_response.get('output_tokens', 0)
-                }
-            else:
-                logger.warning(f"Gemini API call failed: {gemini_response.get('error')}")
-                return self._generate_fallback_description(improvement_suggestions, room_type)
+            return self._description_from_gemini_response(
+                gemini_response, cache_key, improvement_suggestions, room_type
+            )
                 
         except Exception as e:
             logger.error(f"Gemini description generation failed: {e}")
             return self._generate_fallback_description(improvement_suggestions, room_type)
     
+    def _lookup_cached_description(self, structured_input: str):
+        """Return (cache_key, cached description or None) for a Gemini prompt"""
+        if not self.description_cache:
+            return None, None
+        cache_key = self.description_cache.make_key(structured_input, self._gemini_request_config())
+        cached = self.description_cache.get(cache_key)
+        if cached:
+            logger.info("Using cached Gemini design description")
+            return cache_key, dict(cached, cache_hit=True)
+        return cache_key, None
+    
+    def _description_from_gemini_response(self,
+                                          gemini_response: Dict[str, Any],
+                                          cache_key: Optional[str],
+                                          improvement_suggestions: Dict[str, Any],
+                                          room_type: str) -> Dict[str, Any]:
+        """Turn a Gemini API response into a design description, falling back on failure"""
+        if gemini_response.get('success'):
+            description = {
+                "success": True,
+                "description": gemini_response['description'],
+                "model_used": "gemini-pro",
+                "input_tokens": gemini_response.get('input_tokens', 0),
+                "output_tokens": gemini_response.get('output_tokens', 0)
+            }
+            # Only real Gemini output is cached; fallbacks are cheap to rebuild
+            if cache_key:
+                self.description_cache.put(cache_key, description)
+            return description
+        
+        logger.warning(f"Gemini API call failed: {gemini_response.get('error')}")
+        return self._generate_fallback_description(improvement_suggestions, room_type)
+    
     def _prepare_structured_input_for_gemini(self, 
                                            improvement_suggestions: Dict[str, Any],
                                            detected_objects: Dict[str, Any],
@@ -311,75 +542,20 @@ Generate a design description that captures the complete transformation vision b
 
         return prompt
     
+    def _gemini_request_config(self) -> Dict[str, Any]:
+        """Everything besides the prompt that shapes the Gemini response"""
+        return {
+            "model": self.GEMINI_MODEL,
+            "generationConfig": self.GEMINI_GENERATION_CONFIG,
+            "safetySettings": self.GEMINI_SAFETY_SETTINGS
+        }
+    
     def _call_gemini_api(self, prompt: str) -> Dict[str, Any]:
         """Call Gemini API to generate design description"""
         try:
-            # Gemini API endpoint - Updated to use correct model
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={self.gemini_api_key}"
-            
-            headers = {
-                'Content-Type': 'application/json',
-            }
-            
-            data = {
-                "contents": [{
-                    "parts": [{
-                        "text": prompt
-                    }]
-                }],
-                "generationConfig": {
-                    "temperature": 0.7,
-                    "topK": 40,
-                    "topP": 0.95,
-                    "maxOutputTokens": 400,
-                    "stopSequences": []
-                },
-                "safetySettings": [
-                    {
-                        "category": "HARM_CATEGORY_HARASSMENT",
-                        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                    },
-                    {
-                        "category": "HARM_CATEGORY_HATE_SPEECH",
-                        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                    },
-                    {
-                        "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                    },
-                    {
-                        "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                    }
-                ]
-            }
-            
-            response = requests.post(url, headers=headers, json=data, timeout=30)
-            
-            if response.status_code == 200:
-                result = response.json()
-                
-                if 'candidates' in result and len(result['candidates']) > 0:
-                    candidate = result['candidates'][0]
-                    if 'content' in candidate and 'parts' in candidate['content']:
-                        description = candidate['content']['parts'][0]['text']
-                        
-                        return {
-                            "success": True,
-                            "description": description.strip(),
-                            "input_tokens": result.get('usageMetadata', {}).get('promptTokenCount', 0),
-                            "output_tokens": result.get('usageMetadata', {}).get('candidatesTokenCount', 0)
-                        }
-                
-                return {
-                    "success": False,
-                    "error": "No valid content in Gemini response"
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": f"Gemini API error: {response.status_code} - {response.text}"
-                }
+            return self.gemini_client.generate_content(
+                prompt, self.GEMINI_GENERATION_CONFIG, self.GEMINI_SAFETY_SETTINGS
+            )
                 
         except Exception as e:
             return {
@@ -408,7 +584,8 @@ Generate a design description that captures the complete transformation vision b
     def _generate_real_ai_image(self, 
                                design_description: Dict[str, Any], 
                                room_type: str, 
-                               output_dir: str = None) -> Dict[str, Any]:
+                               output_dir: str = None,
+                               progress: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """Generate REAL AI conceptual visualization using Stable Diffusion"""
         try:
             if not design_description.get('success'):
@@ -431,16 +608,14 @@ Generate a design description that captures the complete transformation vision b
             # Generate REAL AI image using Stable Diffusion
             logger.info("🎨 Generating REAL AI conceptual visualization with Stable Diffusion...")
             
-            import torch
-            with torch.no_grad():
-                image = self.pipeline(
-                    prompt=image_prompt,
-                    negative_prompt="blurry, low quality, distorted, unrealistic, cartoon, anime, sketch, drawing, text, watermark",
-                    num_inference_steps=25,  # Good quality vs speed balance
-                    guidance_scale=8.0,      # Strong prompt adherence
-                    width=512,
-                    height=512
-                ).images[0]
+            image = self._run_diffusion({
+                "prompt": image_prompt,
+                "negative_prompt": "blurry, low quality, distorted, unrealistic, cartoon, anime, sketch, drawing, text, watermark",
+                "num_inference_steps": 25,  # Good quality vs speed balance
+                "guidance_scale": 8.0,      # Strong prompt adherence
+                "width": 512,
+                "height": 512
+            }, on_step=self._step_reporter(progress, 25))
             
             # Add disclaimer overlay
             labeled_image = self._add_disclaimer_overlay(image)
@@ -458,7 +633,8 @@ Generate a design description that captures the complete transformation vision b
             
             logger.info(f"🔍 [DEBUG] Using absolute output directory: {output_dir}")
             
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            # Microseconds keep images from the same batch from overwriting each other
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
             filename = f"real_ai_{room_type}_{timestamp}.png"
             image_path = os.path.join(output_dir, filename)
             
@@ -497,7 +673,8 @@ Generate a design description that captures the complete transformation vision b
                     "generation_time": datetime.now().isoformat(),
                     "file_size_bytes": file_size,
                     "generation_type": "real_stable_diffusion",
-                    "device": self.device
+                    "device": self.device,
+                    "execution_mode": self.execution_mode
                 }
             }
             
@@ -506,6 +683,68 @@ Generate a design description that captures the complete transformation vision b
             logger.info("🔄 Falling back to enhanced placeholder")
             return self._generate_enhanced_placeholder(design_description, room_type, output_dir)
     
+    def _step_reporter(self, progress: Optional[Callable[[str, Dict[str, Any]], None]],
+                       total_steps: int) -> Optional[Callable]:
+        """Step callback publishing diffusion_step progress events, with a latent preview every preview_every steps"""
+        if progress is None:
+            return None
+        
+        def on_step(step: int, latents):
+            step_number = step + 1
+            preview = None
+            if self.preview_every > 0 and (step_number % self.preview_every == 0 or step_number == total_steps):
+                preview = latents_to_preview(latents)
+            progress("diffusion_step", {
+                "stage": "diffusion",
+                "step": step_number,
+                "total_steps": total_steps,
+                "preview": preview
+            })
+        
+        return on_step
+    
+    def _run_diffusion(self, params: Dict[str, Any], on_step: Optional[Callable] = None):
+        """Generate one image, through the micro-batcher when batching is enabled"""
+        if self.batcher is not None:
+            return self.batcher.submit(params, on_step)
+        return self._run_diffusion_batch(params, [on_step])[0]
+    
+    def _run_diffusion_batch(self, params: Dict[str, Any],
+                             step_callbacks: Optional[List[Optional[Callable]]] = None) -> List[Any]:
+        """
+        Run one Stable Diffusion call in-process or on the worker process pool
+        
+        step_callbacks holds one optional callback(step, latents) per prompt; worker
+        processes cannot report steps, so they are only invoked in thread mode.
+        """
+        if self.process_pool is not None:
+            return self.process_pool.generate_batch(params)
+        
+        import torch
+        if step_callbacks and any(step_callbacks):
+            params = dict(params,
+                          callback_on_step_end=self._step_end_callback(step_callbacks),
+                          callback_on_step_end_tensor_inputs=["latents"])
+        with torch.no_grad():
+            return self.pipeline(**params).images
+    
+    @staticmethod
+    def _step_end_callback(step_callbacks: List[Optional[Callable]]) -> Callable:
+        """diffusers callback_on_step_end fanning the latents of each prompt out to its callback"""
+        def callback(pipeline, step: int, timestep, callback_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+            latents = callback_kwargs["latents"]
+            # With classifier-free guidance the latents are not duplicated, one row per prompt
+            for i, on_step in enumerate(step_callbacks):
+                if on_step is None or i >= latents.shape[0]:
+                    continue
+                try:
+                    on_step(step, latents[i])
+                except Exception as e:
+                    logger.debug(f"Diffusion step callback failed: {e}")
+            return callback_kwargs
+        
+        return callback
+    
     def _prepare_optimized_prompt(self, description_text: str, room_type: str) -> str:
         """Prepare optimized prompt for Stable Diffusion image generation using specific room analysis"""
         
@@ -800,6 +1039,16 @@ Generate a design description that captures the complete transformation vision b
     
     def cleanup(self):
         """Clean up resources"""
+        self.batcher = None
+        
+        if self.gemini_client:
+            self.gemini_client.close()
+        
+        if self.process_pool:
+            self.process_pool.shutdown()
+            self.process_pool = None
+            self.is_initialized = False
+        
         if self.pipeline:
             del self.pipeline
             self.pipeline = None
@@ -0,0 +1,159 @@
+"""
+Description Cache Module
+Content-addressed cache for Gemini design descriptions.
+
+Entries are keyed by a canonical hash of the prompt plus the generation config
+and kept in two tiers:
+1. An in-memory LRU tier for repeat requests within the process
+2. An on-disk JSON tier that survives restarts and is shared by uvicorn workers
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class DescriptionCache:
+    """Two-tier (memory LRU + disk) cache with TTL expiry"""
+
+    # Expired files are swept from disk once every this many writes
+    PURGE_INTERVAL = 100
+
+    def __init__(self, cache_dir: Optional[str] = "gemini_cache", max_entries: int = 256,
+                 ttl_seconds: float = 604800):
+        """
+        Initialize description cache
+
+        Args:
+            cache_dir: Directory of the on-disk tier, None to keep entries in memory only
+            max_entries: Maximum number of entries kept in the memory tier
+            ttl_seconds: Entries older than this are treated as misses
+        """
+        self.cache_dir = os.path.abspath(cache_dir) if cache_dir else None
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()  # key -> (value, created_at)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(prompt: str, config: Dict[str, Any]) -> str:
+        """Canonical sha256 of the prompt and everything else that shapes the response"""
+        canonical = json.dumps({"prompt": prompt, "config": config}, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value, or None on a miss or expired entry"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+        entry = self._read_disk(key)
+        if entry is not None and now - entry["created_at"] <= self.ttl_seconds:
+            with self._lock:
+                self._remember(key, entry["value"], entry["created_at"])
+                self.disk_hits += 1
+            return entry["value"]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """Store a value in both tiers"""
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, value, created_at)
+            self._writes += 1
+            purge = self._writes % self.PURGE_INTERVAL == 0
+
+        if self.cache_dir:
+            self._write_disk(key, {"created_at": created_at, "value": value})
+            if purge:
+                self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """Remove expired entries from both tiers and return how many files were removed"""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            for key in [key for key, (_, created_at) in self._memory.items() if created_at < cutoff]:
+                del self._memory[key]
+
+        removed = 0
+        if not self.cache_dir:
+            return removed
+        for filename in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, filename)
+            try:
+                if filename.endswith(".json") and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache statistics for health reporting"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_dir": self.cache_dir,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0
+            }
+
+    def _remember(self, key: str, value: Dict[str, Any], created_at: float):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable description cache entry {key}: {e}")
+            return None
+
+    def _write_disk(self, key: str, entry: Dict[str, Any]):
+        # Write to a temp file and rename so readers never see a partial entry
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(temp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"Could not write description cache entry {key}: {e}")
@@ -0,0 +1,135 @@
+"""
+Diffusion Batcher Module
+Micro-batches concurrent Stable Diffusion requests into one pipeline call.
+
+Jobs waiting on the diffusion stage submit their pipeline parameters here. A
+collector thread groups requests that share the same generation settings, waits
+up to a short window for more to arrive, denoises the whole group with a list
+of prompts, and fans the images back out to the waiting callers.
+"""
+
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, List, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Parameters that may differ between requests of the same batch
+PER_REQUEST_PARAMS = ("prompt", "negative_prompt")
+
+class _BatchRequest:
+    """One pending pipeline request"""
+
+    def __init__(self, params: Dict[str, Any], on_step: Optional[Callable] = None):
+        self.params = params
+        self.on_step = on_step
+        self.future = Future()
+        self.key = tuple(sorted(
+            (name, value) for name, value in params.items() if name not in PER_REQUEST_PARAMS
+        ))
+
+class DiffusionBatcher:
+    """Collects pending prompts and runs them as batched pipeline calls"""
+
+    def __init__(self, run_batch: Callable[[Dict[str, Any], List[Optional[Callable]]], List[Any]],
+                 max_batch_size: int = 4, max_wait_seconds: float = 0.25):
+        """
+        Initialize diffusion batcher
+
+        Args:
+            run_batch: Runs one pipeline call whose prompt and negative_prompt are lists
+                       and returns one image per prompt; the second argument holds the
+                       per-prompt step callbacks
+            max_batch_size: Maximum number of prompts denoised together
+            max_wait_seconds: How long the first request of a batch waits for companions
+        """
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_seconds = max_wait_seconds
+        self._queue = queue.Queue()
+        self._deferred: List[_BatchRequest] = []
+        self._thread = threading.Thread(target=self._collect_loop, name="diffusion-batcher", daemon=True)
+        self._thread.start()
+        self.batches_run = 0
+        self.images_generated = 0
+
+    def submit(self, params: Dict[str, Any], on_step: Optional[Callable] = None):
+        """
+        Queue one pipeline request and block until its image is ready
+
+        Args:
+            params: Keyword arguments for a single-prompt pipeline call
+            on_step: Optional callback(step, latents) for this request's denoising steps
+
+        Returns:
+            Generated PIL image
+        """
+        request = _BatchRequest(params, on_step)
+        self._queue.put(request)
+        return request.future.result()
+
+    def stats(self) -> Dict[str, Any]:
+        """Batching statistics for health reporting"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": int(self.max_wait_seconds * 1000),
+            "batches_run": self.batches_run,
+            "images_generated": self.images_generated,
+            "average_batch_size": round(self.images_generated / self.batches_run, 2) if self.batches_run else 0
+        }
+
+    def _next_request(self, timeout: float = None):
+        if self._deferred:
+            return self._deferred.pop(0)
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _collect_loop(self):
+        while True:
+            first = self._next_request()
+            batch = [first]
+            deferred = []
+            deadline = time.monotonic() + self.max_wait_seconds
+
+            # Gather compatible requests until the batch is full or the window closes
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                request = self._next_request(timeout=remaining)
+                if request is None:
+                    break
+                if request.key == first.key:
+                    batch.append(request)
+                else:
+                    deferred.append(request)
+
+            self._deferred.extend(deferred)
+            self._run(batch)
+
+    def _run(self, batch: List[_BatchRequest]):
+        params = dict(batch[0].params)
+        for name in PER_REQUEST_PARAMS:
+            if name in params:
+                params[name] = [request.params.get(name) for request in batch]
+
+        try:
+            started = time.monotonic()
+            images = self.run_batch(params, [request.on_step for request in batch])
+            if len(images) != len(batch):
+                raise RuntimeError(f"Pipeline returned {len(images)} images for {len(batch)} prompts")
+            logger.info(f"Generated diffusion batch of {len(batch)} in {time.monotonic() - started:.1f}s")
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        self.batches_run += 1
+        self.images_generated += len(batch)
+        for request, image in zip(batch, images):
+            request.future.set_result(image)
@@ -0,0 +1,355 @@
+"""
+Diffusion Worker Module
+Runs Stable Diffusion inference in long-lived worker processes.
+
+Each worker process loads the pipeline once and then serves generation requests
+received over a multiprocessing queue, so CPU-bound denoising never competes
+with the API process for the GIL and a stuck generation cannot starve request
+handling or health checks.
+"""
+
+import io
+import os
+import time
+import uuid
+import queue
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+# Crashed workers are restarted with exponential backoff; a slot is given up after
+# this many consecutive restarts that never got the pipeline loaded again
+MAX_CONSECUTIVE_RESTARTS = 5
+RESTART_BACKOFF_BASE = 2.0
+RESTART_BACKOFF_MAX = 300.0
+
+def load_stable_diffusion_pipeline(model_id: str, device: str):
+    """Load a Stable Diffusion pipeline with the device-specific optimizations"""
+    import torch
+    from diffusers import StableDiffusionPipeline
+
+    if device == "cuda":
+        pipeline = StableDiffusionPipeline.from_pretrained(
+            model_id,
+            torch_dtype=torch.float16,
+            safety_checker=None,
+            requires_safety_checker=False
+        )
+        pipeline = pipeline.to(device)
+        pipeline.enable_attention_slicing()
+    else:
+        # CPU optimization
+        pipeline = StableDiffusionPipeline.from_pretrained(
+            model_id,
+            torch_dtype=torch.float32,
+            safety_checker=None,
+            requires_safety_checker=False
+        )
+        pipeline = pipeline.to(device)
+
+    return pipeline
+
+def _worker_main(worker_index: int, model_id: str, device: str, torch_threads: int,
+                 requests_queue, results_queue):
+    """Entry point of a diffusion worker process"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    worker_logger = logging.getLogger(f"{__name__}.worker{worker_index}")
+
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+        pipeline = load_stable_diffusion_pipeline(model_id, device)
+        results_queue.put(("ready", worker_index, None))
+        worker_logger.info(f"Diffusion worker {worker_index} ready on {device} with {torch_threads} thread(s)")
+    except Exception as e:
+        results_queue.put(("ready", worker_index, str(e)))
+        return
+
+    while True:
+        request = requests_queue.get()
+        if request is None:
+            break
+
+        request_id, params = request
+        results_queue.put(("started", worker_index, request_id))
+        try:
+            with torch.no_grad():
+                images = pipeline(**params).images
+            encoded = []
+            for image in images:
+                buffer = io.BytesIO()
+                image.save(buffer, format="PNG")
+                encoded.append(buffer.getvalue())
+            results_queue.put(("result", request_id, encoded))
+        except Exception as e:
+            worker_logger.error(f"Diffusion worker {worker_index} failed request {request_id}: {e}")
+            results_queue.put(("error", request_id, str(e)))
+
+class DiffusionProcessPool:
+    """Pool of worker processes that each hold a loaded Stable Diffusion pipeline"""
+
+    def __init__(self, model_id: str, device: str = "cpu", num_processes: int = 1,
+                 startup_timeout: float = 900, request_timeout: float = 900):
+        """
+        Initialize diffusion process pool
+
+        Args:
+            model_id: Hugging Face model id of the diffusion pipeline
+            device: Device the workers run inference on
+            num_processes: Number of worker processes
+            startup_timeout: Seconds to wait for the workers to load the pipeline
+            request_timeout: Seconds to wait for a single generation
+        """
+        self.model_id = model_id
+        self.device = device
+        self.num_processes = max(1, int(num_processes))
+        self.startup_timeout = startup_timeout
+        self.request_timeout = request_timeout
+        # Split the cores between workers so they do not oversubscribe the CPU
+        self.torch_threads = max(1, (os.cpu_count() or 1) // self.num_processes)
+
+        self._context = multiprocessing.get_context("spawn")
+        self._requests = self._context.Queue()
+        self._results = self._context.Queue()
+        self._processes: Dict[int, Any] = {}
+        self._pending: Dict[str, Future] = {}
+        self._in_progress: Dict[int, str] = {}  # worker index -> request id
+        self._failed_slots: Dict[int, str] = {}  # worker index -> why the slot was given up
+        self._restart_attempts: Dict[int, int] = {}  # consecutive restarts without a successful load
+        self._restart_at: Dict[int, float] = {}  # earliest monotonic time of the next restart
+        self._lock = threading.Lock()
+        self._collector = None
+        self._running = False
+        self.ready_workers = 0
+        self.restarts = 0
+        self.timeouts = 0
+
+    def start(self) -> bool:
+        """Start the worker processes and wait until they have loaded the pipeline"""
+        for index in range(self.num_processes):
+            self._spawn_worker(index)
+
+        # Wait for every worker to report whether the pipeline loaded
+        errors = []
+        for _ in range(self.num_processes):
+            try:
+                kind, index, error = self._results.get(timeout=self.startup_timeout)
+            except queue.Empty:
+                errors.append("timed out loading pipeline")
+                break
+            if error:
+                errors.append(f"worker {index}: {error}")
+                # The pipeline will not load on a retry either; leave the slot empty
+                self._failed_slots[index] = error
+            else:
+                self.ready_workers += 1
+
+        for error in errors:
+            logger.error(f"Diffusion worker failed to start: {error}")
+
+        if self.ready_workers == 0:
+            self.shutdown()
+            return False
+
+        self._running = True
+        self._collector = threading.Thread(target=self._collect_results, name="diffusion-results", daemon=True)
+        self._collector.start()
+        logger.info(f"Diffusion process pool ready with {self.ready_workers}/{self.num_processes} worker(s)")
+        return True
+
+    def generate(self, params: Dict[str, Any]):
+        """
+        Run one pipeline call in a worker process
+
+        Args:
+            params: Keyword arguments for the diffusion pipeline call
+
+        Returns:
+            Generated PIL image
+        """
+        return self.generate_batch(params)[0]
+
+    def generate_batch(self, params: Dict[str, Any]) -> List[Any]:
+        """
+        Run one pipeline call in a worker process and return every image
+
+        Args:
+            params: Keyword arguments for the diffusion pipeline call; prompt may be a list
+
+        Returns:
+            Generated PIL images, one per prompt
+        """
+        from PIL import Image
+
+        with self._lock:
+            if len(self._failed_slots) >= self.num_processes:
+                raise RuntimeError("No diffusion worker available: " + "; ".join(self._failed_slots.values()))
+
+        request_id = str(uuid.uuid4())
+        future = Future()
+        with self._lock:
+            self._pending[request_id] = future
+        self._requests.put((request_id, params))
+
+        try:
+            encoded = future.result(timeout=self.request_timeout)
+        except FutureTimeoutError:
+            self._stop_stuck_worker(request_id)
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(request_id, None)
+
+        images = []
+        for png_bytes in encoded:
+            image = Image.open(io.BytesIO(png_bytes))
+            image.load()
+            images.append(image)
+        return images
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool statistics for health reporting"""
+        with self._lock:
+            return {
+                "processes": self.num_processes,
+                "alive": sum(1 for process in self._processes.values() if process.is_alive()),
+                "busy": len(self._in_progress),
+                "pending_requests": len(self._pending),
+                "failed_workers": dict(self._failed_slots),
+                "restarts": self.restarts,
+                "timeouts": self.timeouts,
+                "torch_threads_per_process": self.torch_threads
+            }
+
+    def shutdown(self):
+        """Stop all worker processes"""
+        self._running = False
+        for _ in self._processes:
+            self._requests.put(None)
+        for process in self._processes.values():
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self._processes.clear()
+
+        with self._lock:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("Diffusion process pool shut down"))
+            self._pending.clear()
+
+    def _spawn_worker(self, index: int):
+        process = self._context.Process(
+            target=_worker_main,
+            args=(index, self.model_id, self.device, self.torch_threads, self._requests, self._results),
+            name=f"diffusion-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        self._processes[index] = process
+
+    def _collect_results(self):
+        while self._running:
+            try:
+                message = self._results.get(timeout=1.0)
+            except queue.Empty:
+                self._check_workers()
+                continue
+
+            kind = message[0]
+            with self._lock:
+                if kind == "started":
+                    _, index, request_id = message
+                    self._in_progress[index] = request_id
+                    continue
+                if kind == "ready":
+                    _, index, error = message
+                    if error:
+                        # A respawned worker could not load the pipeline: give the slot up
+                        logger.error(f"Diffusion worker {index} failed to load the pipeline, not restarting: {error}")
+                        self._failed_slots[index] = error
+                    else:
+                        self._restart_attempts.pop(index, None)
+                    continue
+
+                _, request_id, payload = message
+                for index, active_request in list(self._in_progress.items()):
+                    if active_request == request_id:
+                        del self._in_progress[index]
+                future = self._pending.get(request_id)
+
+            if future is None or future.done():
+                continue
+            if kind == "result":
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(payload))
+
+    def _stop_stuck_worker(self, request_id: str):
+        """Terminate the worker still running a timed-out request; _check_workers respawns it"""
+        with self._lock:
+            index = next((i for i, active in self._in_progress.items() if active == request_id), None)
+            process = self._processes.get(index) if index is not None else None
+        self.timeouts += 1
+        if process is None:
+            # Never picked up; a worker that takes it later runs it and the result is dropped
+            logger.warning(f"Diffusion request {request_id} timed out before a worker started it")
+            return
+        logger.error(f"Diffusion request {request_id} timed out after {self.request_timeout:.0f}s, "
+                     f"terminating worker {index}")
+        process.terminate()
+
+    def _check_workers(self):
+        # Fail the request of a dead worker and replace the process, backing off on repeated crashes
+        now = time.monotonic()
+        for index, process in list(self._processes.items()):
+            if process.is_alive() or not self._running:
+                continue
+
+            with self._lock:
+                request_id = self._in_progress.pop(index, None)
+                future = self._pending.get(request_id) if request_id else None
+                failed = index in self._failed_slots
+            if future is not None and not future.done():
+                future.set_exception(RuntimeError(f"Diffusion worker {index} exited with code {process.exitcode}"))
+
+            if failed:
+                self._processes.pop(index, None)
+                self._fail_pending_if_no_workers()
+                continue
+
+            attempts = self._restart_attempts.get(index, 0)
+            if attempts >= MAX_CONSECUTIVE_RESTARTS:
+                logger.error(f"Diffusion worker {index} crashed {attempts} times in a row, giving the slot up")
+                with self._lock:
+                    self._failed_slots[index] = f"crashed {attempts} times in a row"
+                self._processes.pop(index, None)
+                self._fail_pending_if_no_workers()
+                continue
+
+            restart_at = self._restart_at.setdefault(
+                index, now + min(RESTART_BACKOFF_MAX, RESTART_BACKOFF_BASE * (2 ** attempts) if attempts else 0)
+            )
+            if now < restart_at:
+                continue
+
+            logger.error(f"Diffusion worker {index} exited with code {process.exitcode}, restarting "
+                         f"(attempt {attempts + 1}/{MAX_CONSECUTIVE_RESTARTS})")
+            self._restart_at.pop(index, None)
+            self._restart_attempts[index] = attempts + 1
+            self.restarts += 1
+            self._spawn_worker(index)
+
+    def _fail_pending_if_no_workers(self):
+        # Queued requests would otherwise wait out the full request timeout
+        with self._lock:
+            if len(self._failed_slots) < self.num_processes:
+                return
+            futures = list(self._pending.values())
+        for future in futures:
+            if not future.done():
+                future.set_exception(RuntimeError("No diffusion worker available"))
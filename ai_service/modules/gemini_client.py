@@ -0,0 +1,357 @@
+"""
+Gemini Client Module
+Shared HTTP client for the Gemini generateContent API.
+
+The client keeps a pooled keep-alive session and wraps every call with:
+1. A concurrency limit so bursts do not open unbounded connections
+2. Jittered exponential backoff on 429/5xx and network errors, honouring Retry-After
+3. A circuit breaker that fails fast while Gemini keeps failing, so callers can
+   switch to their fallback without waiting out the request timeout
+
+Blocking callers use generate_content; code running on the event loop awaits
+generate_content_async, which goes through a pooled httpx.AsyncClient instead.
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, List, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+
+# Responses worth retrying; other 4xx errors will not succeed on a second attempt
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a half-open trial call"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        """
+        Initialize circuit breaker
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial call is allowed
+        """
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = reset_timeout
+        self.state = "closed"  # closed, open, half_open
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Whether a call may be attempted right now"""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                # Let exactly one trial call through
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+
+    def abandon_trial(self):
+        """Release a half-open trial whose call never completed (e.g. cancelled)"""
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "open"
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"Gemini circuit opened after {self.consecutive_failures} consecutive failures")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+class GeminiClient:
+    """Pooled, rate-limited Gemini API client with retries and a circuit breaker"""
+
+    def __init__(self, api_key: str, model: str = "gemini-1.5-flash", base_url: str = DEFAULT_BASE_URL,
+                 timeout: float = 30.0, max_concurrency: int = 4, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 20.0,
+                 failure_threshold: int = 5, reset_timeout: float = 60.0):
+        """
+        Initialize Gemini client
+
+        Args:
+            api_key: Gemini API key
+            model: Gemini model name
+            base_url: API base URL; point it at a local stub server for testing
+            timeout: Per-attempt request timeout in seconds
+            max_concurrency: Maximum number of requests in flight
+            max_retries: Retries after the first attempt for retryable failures
+            backoff_base: Base delay of the exponential backoff in seconds
+            backoff_max: Upper bound of a single backoff delay in seconds
+            failure_threshold: Consecutive failed calls that open the circuit
+            reset_timeout: Seconds before an open circuit allows a trial call
+        """
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+
+        # Created on first async use so they bind to the serving event loop
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_semaphore: Optional[asyncio.Semaphore] = None
+
+        self.requests_sent = 0
+        self.retries = 0
+        self.short_circuited = 0
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/models/{self.model}:generateContent"
+
+    def generate_content(self, prompt: str, generation_config: Dict[str, Any],
+                         safety_settings: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Generate text for a prompt
+
+        Args:
+            prompt: Prompt text
+            generation_config: Gemini generationConfig
+            safety_settings: Gemini safetySettings
+
+        Returns:
+            Dictionary with success flag and description or error
+        """
+        if not self.breaker.allow_request():
+            self.short_circuited += 1
+            return {
+                "success": False,
+                "error": "Gemini circuit open, skipping call",
+                "circuit_open": True
+            }
+
+        try:
+            result = self._post_with_retries(self._request_body(prompt, generation_config, safety_settings))
+        except BaseException:
+            # Never leave a half-open trial dangling, or the circuit would stay closed to all calls
+            self.breaker.abandon_trial()
+            raise
+        return self._record_outcome(result)
+
+    async def generate_content_async(self, prompt: str, generation_config: Dict[str, Any],
+                                     safety_settings: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Generate text for a prompt without blocking the event loop
+
+        Args:
+            prompt: Prompt text
+            generation_config: Gemini generationConfig
+            safety_settings: Gemini safetySettings
+
+        Returns:
+            Dictionary with success flag and description or error
+        """
+        if not self.breaker.allow_request():
+            self.short_circuited += 1
+            return {
+                "success": False,
+                "error": "Gemini circuit open, skipping call",
+                "circuit_open": True
+            }
+
+        try:
+            result = await self._post_with_retries_async(self._request_body(prompt, generation_config, safety_settings))
+        except BaseException:
+            # Cancelled or unexpected error: release a half-open trial so later calls are not locked out
+            self.breaker.abandon_trial()
+            raise
+        return self._record_outcome(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Client statistics for health reporting"""
+        return {
+            "base_url": self.base_url,
+            "model": self.model,
+            "circuit_state": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "requests_sent": self.requests_sent,
+            "retries": self.retries,
+            "short_circuited": self.short_circuited,
+            "max_concurrency": self.max_concurrency
+        }
+
+    def close(self):
+        self.session.close()
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    @staticmethod
+    def _request_body(prompt: str, generation_config: Dict[str, Any],
+                      safety_settings: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": generation_config,
+            "safetySettings": safety_settings
+        }
+
+    def _record_outcome(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        if result.get("success") or not result.get("retryable"):
+            # Non-retryable errors (bad request, bad key) say nothing about Gemini's health
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        result.pop("retryable", None)
+        return result
+
+    def _post_with_retries(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        result = {}
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self._semaphore:
+                    self.requests_sent += 1
+                    response = self.session.post(
+                        self.url, params={"key": self.api_key}, json=data, timeout=self.timeout
+                    )
+            except requests.RequestException as e:
+                result, retry_after = {"success": False, "error": f"Gemini API call failed: {str(e)}", "retryable": True}, None
+            else:
+                result, retry_after = self._result_from_response(response)
+
+            if not result.get("retryable") or attempt == self.max_retries:
+                break
+            delay = self._backoff_delay(attempt, retry_after, result["error"])
+            if delay is None:
+                break
+            time.sleep(delay)
+
+        return result
+
+    async def _post_with_retries_async(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                timeout=self.timeout,
+                headers={"Content-Type": "application/json"},
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency)
+            )
+            self._async_semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        result = {}
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._async_semaphore:
+                    self.requests_sent += 1
+                    response = await self._async_client.post(self.url, params={"key": self.api_key}, json=data)
+            except httpx.HTTPError as e:
+                result, retry_after = {"success": False, "error": f"Gemini API call failed: {str(e)}", "retryable": True}, None
+            else:
+                result, retry_after = self._result_from_response(response)
+
+            if not result.get("retryable") or attempt == self.max_retries:
+                break
+            delay = self._backoff_delay(attempt, retry_after, result["error"])
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+
+        return result
+
+    def _result_from_response(self, response):
+        # Works for both requests and httpx responses
+        if response.status_code == 200:
+            try:
+                body = response.json()
+            except ValueError:
+                # A 200 that is not JSON (truncated body, proxy error page) is a server-side failure
+                return {
+                    "success": False,
+                    "error": f"Gemini API returned a non-JSON response: {response.text[:200]}",
+                    "retryable": True
+                }, None
+            return self._parse_response(body), None
+        result = {
+            "success": False,
+            "error": f"Gemini API error: {response.status_code} - {response.text}",
+            "retryable": response.status_code in RETRYABLE_STATUS_CODES
+        }
+        return result, self._retry_after_seconds(response.headers.get("Retry-After"))
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[float], error: str) -> Optional[float]:
+        # Full jitter, but never earlier than the server asked for; None gives up when the
+        # server asks for a longer wait than a single backoff allows
+        if retry_after is not None and retry_after > self.backoff_max:
+            logger.warning(f"{error[:200]}; Retry-After {retry_after:.1f}s exceeds the {self.backoff_max:.1f}s "
+                           f"backoff limit, not retrying")
+            return None
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        self.retries += 1
+        logger.warning(f"{error[:200]}; retrying in {delay:.1f}s (attempt {attempt + 2}/{self.max_retries + 1})")
+        return delay
+
+    def _parse_response(self, result: Any) -> Dict[str, Any]:
+        try:
+            candidates = result.get('candidates') or []
+            if candidates:
+                candidate = candidates[0]
+                if 'content' in candidate and 'parts' in candidate['content']:
+                    description = candidate['content']['parts'][0]['text']
+
+                    return {
+                        "success": True,
+                        "description": description.strip(),
+                        "input_tokens": result.get('usageMetadata', {}).get('promptTokenCount', 0),
+                        "output_tokens": result.get('usageMetadata', {}).get('candidatesTokenCount', 0)
+                    }
+        except (AttributeError, KeyError, IndexError, TypeError) as e:
+            return {
+                "success": False,
+                "error": f"Malformed Gemini response: {type(e).__name__}: {e}",
+                "retryable": True
+            }
+
+        return {
+            "success": False,
+            "error": "No valid content in Gemini response",
+            "retryable": False
+        }
+
+    @staticmethod
+    def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+        # Retry-After is either delta-seconds or an HTTP date
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
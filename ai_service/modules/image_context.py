@@ -0,0 +1,116 @@
+"""
+Image Context Module
+Decodes an uploaded room image once and shares the pixels across all Stage-1 analyzers.
+
+The upload buffer is decoded straight from memory with OpenCV, so no temporary
+files are written and every analyzer works on the same decoded array. Large
+uploads can be downscaled once at decode time to a bounded analysis resolution;
+detections are then mapped back to the original image coordinates.
+"""
+
+import cv2
+import numpy as np
+import logging
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+class ImageContext:
+    """In-memory decoded image shared by the vision analysis stages"""
+
+    def __init__(self, image: np.ndarray, source: str = "uploaded image", max_long_edge: int = 0):
+        """
+        Initialize image context
+
+        Args:
+            image: Decoded BGR image
+            source: Human-readable origin of the image, used in log and error messages
+            max_long_edge: Downscale so the longer side is at most this many pixels (0 keeps full size)
+        """
+        if image is None or image.size == 0:
+            raise ValueError(f"Could not load image from {source}")
+
+        self.source = source
+        self.original_height, self.original_width = image.shape[:2]
+
+        long_edge = max(self.original_width, self.original_height)
+        if max_long_edge and long_edge > max_long_edge:
+            # Aspect-preserving resize, so relative positions are unchanged
+            factor = max_long_edge / long_edge
+            size = (max(1, round(self.original_width * factor)), max(1, round(self.original_height * factor)))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+            logger.info(f"Downscaled {source} from {self.original_width}x{self.original_height} to {size[0]}x{size[1]} for analysis")
+
+        self.image = image
+        self.height, self.width = image.shape[:2]
+        self.scale_x = self.original_width / self.width
+        self.scale_y = self.original_height / self.height
+
+    @classmethod
+    def from_bytes(cls, data: bytes, source: str = "uploaded image", max_long_edge: int = 0) -> "ImageContext":
+        """
+        Decode an encoded image (JPEG, PNG, ...) from an in-memory buffer
+
+        Args:
+            data: Raw bytes of the encoded image
+            source: Human-readable origin of the image
+            max_long_edge: Analysis resolution limit for the longer side (0 keeps full size)
+
+        Returns:
+            ImageContext holding the decoded image
+        """
+        if not data:
+            raise ValueError(f"Could not load image from {source}: empty upload")
+
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError(f"Could not decode image from {source}")
+
+        return cls(image, source, max_long_edge)
+
+    @classmethod
+    def from_path(cls, image_path: str, max_long_edge: int = 0) -> "ImageContext":
+        """Decode an image stored on disk"""
+        return cls(cv2.imread(image_path), image_path, max_long_edge)
+
+    @property
+    def is_downscaled(self) -> bool:
+        return (self.width, self.height) != (self.original_width, self.original_height)
+
+    @property
+    def dimensions(self) -> Dict[str, Any]:
+        """Analysis image dimensions in the format used by the analysis results"""
+        return {"width": self.width, "height": self.height}
+
+    @property
+    def original_dimensions(self) -> Dict[str, Any]:
+        """Dimensions of the uploaded image"""
+        return {"width": self.original_width, "height": self.original_height}
+
+    def map_detections_to_original(self, detection_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Scale pixel bounding boxes from the analysis resolution back to the uploaded image
+
+        Relative positions and sizes are resolution independent and left as they are.
+
+        Args:
+            detection_result: Output of ObjectDetector for self.image
+
+        Returns:
+            The same result, updated in place
+        """
+        if not self.is_downscaled:
+            return detection_result
+
+        for obj in detection_result.get('objects', []):
+            box = obj['bounding_box']
+            box['x1'] = min(int(round(box['x1'] * self.scale_x)), self.original_width)
+            box['x2'] = min(int(round(box['x2'] * self.scale_x)), self.original_width)
+            box['y1'] = min(int(round(box['y1'] * self.scale_y)), self.original_height)
+            box['y2'] = min(int(round(box['y2'] * self.scale_y)), self.original_height)
+
+        if detection_result.get('image_dimensions', {}).get('width'):
+            detection_result['image_dimensions'] = self.original_dimensions
+            detection_result.setdefault('detection_metadata', {})['analysis_dimensions'] = self.dimensions
+        return detection_result
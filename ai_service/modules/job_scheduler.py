@@ -0,0 +1,240 @@
+"""
+Job Scheduler Module
+Admission control and dispatch for asynchronous conceptual image generation jobs.
+
+The scheduler keeps a bounded priority queue in front of a dedicated diffusion
+worker pool:
+1. Jobs are ordered by priority, then by a per-user round so one user's burst
+   cannot starve everybody else (start-time fair queuing)
+2. Submissions beyond the queue limit are rejected with a retry hint
+3. Queue position and ETA are derived from measured durations of successful jobs
+
+A job reports failure by raising (JobFailedError once it has recorded the
+failure itself), and may return False to keep a completed run that skipped
+the expensive work out of the duration average.
+"""
+
+import math
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+    def __init__(self, retry_after: int, queue_depth: int):
+        super().__init__(f"Generation queue is full ({queue_depth} jobs waiting)")
+        self.retry_after = retry_after
+        self.queue_depth = queue_depth
+
+class JobFailedError(Exception):
+    """Raised by a job whose failure has already been recorded and logged"""
+
+class _QueuedJob:
+    """Queue entry for one job"""
+
+    def __init__(self, job_id: str, run: Callable[[], Awaitable[Any]], user_id: str, priority: int, user_round: int):
+        self.job_id = job_id
+        self.run = run
+        self.user_id = user_id
+        self.priority = priority
+        self.user_round = user_round
+        self.enqueued_at = time.monotonic()
+
+class GenerationScheduler:
+    """Bounded, fair priority queue feeding a fixed number of diffusion workers"""
+
+    def __init__(self, concurrency: int = 1, max_queue_size: int = 20,
+                 default_job_seconds: float = 45.0, duration_window: int = 20):
+        """
+        Initialize the generation scheduler
+
+        Args:
+            concurrency: Number of jobs executed at the same time (diffusion workers)
+            max_queue_size: Maximum number of jobs waiting to start
+            default_job_seconds: Job duration assumed until real durations are measured
+            duration_window: Number of recent job durations used for the ETA estimate
+        """
+        self.concurrency = max(1, int(concurrency))
+        self.max_queue_size = max(1, int(max_queue_size))
+        self.default_job_seconds = default_job_seconds
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="diffusion")
+
+        self._heap = []
+        self._queued: Dict[str, _QueuedJob] = {}
+        self._running: Dict[str, float] = {}  # job_id -> start time
+        self._durations = deque(maxlen=duration_window)
+        self._user_rounds: Dict[str, int] = {}
+        self._current_round = 0
+        self._sequence = itertools.count()
+        self._workers = []
+        self._wakeup: Optional[asyncio.Condition] = None
+        self.completed_jobs = 0
+        self.failed_jobs = 0
+        self.rejected_jobs = 0
+
+    def start(self):
+        """Start the worker tasks on the running event loop"""
+        if self._workers:
+            return
+        self._wakeup = asyncio.Condition()
+        self._workers = [
+            asyncio.create_task(self._worker_loop(index)) for index in range(self.concurrency)
+        ]
+        logger.info(f"Generation scheduler started with {self.concurrency} worker(s), queue limit {self.max_queue_size}")
+
+    async def shutdown(self):
+        """Stop the worker tasks and release the worker pool"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self.executor.shutdown(wait=False)
+
+    async def submit(self, job_id: str, run: Callable[[], Awaitable[Any]],
+                     user_id: str = "anonymous", priority: int = 5) -> int:
+        """
+        Queue a job for execution
+
+        Args:
+            job_id: Identifier of the job
+            run: Coroutine function executed when the job is dispatched; it raises on failure and
+                returns False if its duration should not count towards the ETA
+            user_id: Submitting user, used for fair ordering between users
+            priority: Lower values are dispatched first
+
+        Returns:
+            1-based position of the job in the queue
+
+        Raises:
+            QueueFullError: If the queue is at capacity
+        """
+        if not self._workers:
+            self.start()
+
+        if len(self._queued) >= self.max_queue_size:
+            self.rejected_jobs += 1
+            raise QueueFullError(self.retry_after_seconds(), len(self._queued))
+
+        # Users whose rounds have all been served no longer need tracking
+        if len(self._user_rounds) > 1000:
+            self._user_rounds = {
+                user: next_round for user, next_round in self._user_rounds.items() if next_round > self._current_round
+            }
+
+        # Each user's n-th waiting job lands in round n, so users are served round-robin
+        user_round = max(self._current_round, self._user_rounds.get(user_id, 0))
+        self._user_rounds[user_id] = user_round + 1
+
+        entry = _QueuedJob(job_id, run, user_id, priority, user_round)
+        self._queued[job_id] = entry
+        heapq.heappush(self._heap, (priority, user_round, next(self._sequence), job_id))
+
+        async with self._wakeup:
+            self._wakeup.notify()
+
+        return self.position(job_id)
+
+    async def run_blocking(self, func: Callable, *args):
+        """Run a blocking function on the dedicated diffusion worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based queue position, 0 while running, None if unknown to this scheduler"""
+        if job_id in self._running:
+            return 0
+        if job_id not in self._queued:
+            return None
+        order = sorted(item for item in self._heap if item[3] in self._queued)
+        for index, item in enumerate(order):
+            if item[3] == job_id:
+                return index + 1
+        return None
+
+    def average_job_seconds(self) -> float:
+        """Mean duration of recently completed jobs that reported a representative run"""
+        if not self._durations:
+            return self.default_job_seconds
+        return sum(self._durations) / len(self._durations)
+
+    def estimate_seconds(self, job_id: str) -> Optional[int]:
+        """Estimated seconds until the job completes, None if unknown to this scheduler"""
+        average = self.average_job_seconds()
+        now = time.monotonic()
+
+        if job_id in self._running:
+            return int(math.ceil(max(0.0, average - (now - self._running[job_id]))))
+
+        position = self.position(job_id)
+        if position is None:
+            return None
+
+        # Simulate the workers draining the queue ahead of this job
+        slot_free_at = [max(0.0, average - (now - started)) for started in self._running.values()]
+        slot_free_at.extend([0.0] * (self.concurrency - len(slot_free_at)))
+        heapq.heapify(slot_free_at)
+        for _ in range(position - 1):
+            heapq.heappush(slot_free_at, heapq.heappop(slot_free_at) + average)
+        return int(math.ceil(heapq.heappop(slot_free_at) + average))
+
+    def stats(self) -> Dict[str, Any]:
+        """Scheduler statistics for health reporting"""
+        return {
+            "concurrency": self.concurrency,
+            "queue_depth": len(self._queued),
+            "max_queue_size": self.max_queue_size,
+            "running": len(self._running),
+            "average_job_seconds": round(self.average_job_seconds(), 1),
+            "completed_jobs": self.completed_jobs,
+            "failed_jobs": self.failed_jobs,
+            "rejected_jobs": self.rejected_jobs
+        }
+
+    def retry_after_seconds(self) -> int:
+        """Roughly the time until a worker frees up and the queue shrinks by one"""
+        return max(1, int(math.ceil(self.average_job_seconds() / self.concurrency)))
+
+    def _pop_next(self) -> Optional[_QueuedJob]:
+        while self._heap:
+            _, user_round, _, job_id = heapq.heappop(self._heap)
+            entry = self._queued.pop(job_id, None)
+            if entry is not None:
+                self._current_round = max(self._current_round, user_round)
+                return entry
+        return None
+
+    async def _worker_loop(self, index: int):
+        while True:
+            async with self._wakeup:
+                await self._wakeup.wait_for(lambda: bool(self._queued))
+                entry = self._pop_next()
+            if entry is None:
+                continue
+
+            started = time.monotonic()
+            self._running[entry.job_id] = started
+            logger.info(f"Worker {index} started job {entry.job_id} (user {entry.user_id}, "
+                        f"waited {started - entry.enqueued_at:.1f}s)")
+            try:
+                representative = await entry.run()
+                if representative is not False:
+                    self._durations.append(time.monotonic() - started)
+                self.completed_jobs += 1
+            except asyncio.CancelledError:
+                raise
+            except JobFailedError as e:
+                self.failed_jobs += 1
+                logger.warning(f"Scheduled job {entry.job_id} failed: {e}")
+            except Exception as e:
+                self.failed_jobs += 1
+                logger.error(f"Scheduled job {entry.job_id} failed: {e}", exc_info=True)
+            finally:
+                self._running.pop(entry.job_id, None)
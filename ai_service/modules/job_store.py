@@ -0,0 +1,351 @@
+"""
+Job Store Module
+Persists asynchronous image generation jobs behind a pluggable storage interface.
+
+Two backends are provided:
+1. InMemoryJobStore: process-local store with TTL expiry and LRU eviction of finished jobs
+2. SQLiteJobStore: SQLite (WAL mode) store shared by every uvicorn worker on the host,
+   with TTL expiry and a row cap that evicts the oldest finished jobs
+
+Only finished (completed / failed) jobs are ever expired or evicted: pending and
+processing jobs are still referenced by the scheduler. A new job saved while the
+store is full of unfinished jobs is refused with JobStoreFullError.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Jobs in these states may be evicted; pending and processing jobs are still referenced by the scheduler
+FINISHED_STATUSES = ("completed", "failed")
+FINISHED_PLACEHOLDERS = ", ".join("?" * len(FINISHED_STATUSES))
+
+class JobStoreFullError(Exception):
+    """Raised when a new job is saved while the store is full of unfinished jobs"""
+
+    def __init__(self, max_jobs: int):
+        super().__init__(f"Job store is full ({max_jobs} unfinished jobs)")
+        self.max_jobs = max_jobs
+
+class ImageGenerationJob:
+    """State of one asynchronous conceptual image generation job"""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.status = "pending"  # pending, processing, completed, failed
+        self.created_at = datetime.now()
+        self.completed_at = None
+        self.image_url = None
+        self.image_path = None
+        self.error_message = None
+        self.generation_metadata = {}
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "created_at": self.created_at.isoformat(),
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "image_url": self.image_url,
+            "image_path": self.image_path,
+            "error_message": self.error_message,
+            "generation_metadata": self.generation_metadata
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ImageGenerationJob":
+        """Rebuild a job from its to_dict() representation"""
+        job = cls(data["job_id"])
+        job.status = data.get("status", "pending")
+        job.created_at = datetime.fromisoformat(data["created_at"]) if data.get("created_at") else datetime.now()
+        job.completed_at = datetime.fromisoformat(data["completed_at"]) if data.get("completed_at") else None
+        job.image_url = data.get("image_url")
+        job.image_path = data.get("image_path")
+        job.error_message = data.get("error_message")
+        job.generation_metadata = data.get("generation_metadata") or {}
+        return job
+
+class JobStore(ABC):
+    """Storage interface for image generation jobs"""
+
+    backend_name = "base"
+
+    @abstractmethod
+    def save(self, job: ImageGenerationJob):
+        """Insert or update a job"""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[ImageGenerationJob]:
+        """Return the job, or None if it is unknown or an expired finished job"""
+
+    @abstractmethod
+    def delete(self, job_id: str):
+        """Remove a job"""
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """Remove expired finished jobs and return how many were removed"""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of jobs currently stored"""
+
+    def stats(self) -> Dict[str, Any]:
+        """Store statistics for health reporting"""
+        return {"backend": self.backend_name, "jobs": self.count()}
+
+class InMemoryJobStore(JobStore):
+    """Process-local job store with TTL expiry and LRU eviction of finished jobs"""
+
+    backend_name = "memory"
+
+    def __init__(self, max_jobs: int = 1000, ttl_seconds: float = 86400):
+        """
+        Initialize in-memory job store
+
+        Args:
+            max_jobs: Maximum number of jobs kept; the least recently used finished job is
+                evicted first, and new jobs are refused while every stored job is unfinished
+            ttl_seconds: Finished jobs not updated or read for this long are expired
+        """
+        self.max_jobs = max(1, int(max_jobs))
+        self.ttl_seconds = ttl_seconds
+        self._jobs = OrderedDict()  # job_id -> (job, last_touched)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def save(self, job: ImageGenerationJob):
+        """
+        Insert or update a job
+
+        Raises:
+            JobStoreFullError: If the job is new and no finished job can be evicted to make room
+        """
+        with self._lock:
+            is_new = job.job_id not in self._jobs
+            self._jobs[job.job_id] = (job, time.monotonic())
+            self._jobs.move_to_end(job.job_id)
+            self._purge_expired_locked()
+            while len(self._jobs) > self.max_jobs:
+                if not self._evict_finished_locked(job.job_id):
+                    if is_new:
+                        del self._jobs[job.job_id]
+                        raise JobStoreFullError(self.max_jobs)
+                    break
+
+    def _evict_finished_locked(self, keep_job_id: str) -> bool:
+        # Oldest first; unfinished jobs are skipped since a worker will still look them up
+        for job_id, (job, _) in self._jobs.items():
+            if job_id != keep_job_id and job.status in FINISHED_STATUSES:
+                del self._jobs[job_id]
+                self.evictions += 1
+                return True
+        return False
+
+    def get(self, job_id: str) -> Optional[ImageGenerationJob]:
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is None:
+                return None
+            job, last_touched = entry
+            if job.status in FINISHED_STATUSES and time.monotonic() - last_touched > self.ttl_seconds:
+                del self._jobs[job_id]
+                return None
+            self._jobs[job_id] = (job, time.monotonic())
+            self._jobs.move_to_end(job_id)
+            return job
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._purge_expired_locked()
+
+    def _purge_expired_locked(self) -> int:
+        # Entries are ordered by last touch, so expired jobs sit at the front; unfinished ones are kept
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = []
+        for job_id, (job, last_touched) in self._jobs.items():
+            if last_touched >= cutoff:
+                break
+            if job.status in FINISHED_STATUSES:
+                expired.append(job_id)
+        for job_id in expired:
+            del self._jobs[job_id]
+        return len(expired)
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend_name,
+            "jobs": self.count(),
+            "max_jobs": self.max_jobs,
+            "ttl_seconds": self.ttl_seconds,
+            "evictions": self.evictions
+        }
+
+class SQLiteJobStore(JobStore):
+    """SQLite-backed job store in WAL mode, shared across worker processes, with TTL expiry and a row cap"""
+
+    backend_name = "sqlite"
+
+    # Expired rows are purged once every this many writes
+    PURGE_INTERVAL = 100
+
+    def __init__(self, db_path: str = "image_generation_jobs.db", max_jobs: int = 1000, ttl_seconds: float = 86400):
+        """
+        Initialize SQLite job store
+
+        Args:
+            db_path: Path of the SQLite database file
+            max_jobs: Maximum number of rows; the least recently updated finished job is evicted
+                first, and new jobs are refused while every stored job is unfinished
+            ttl_seconds: Finished jobs not updated for this long are expired
+        """
+        self.db_path = os.path.abspath(db_path)
+        self.max_jobs = max(1, int(max_jobs))
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._local = threading.local()
+        self._writes = 0
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS image_generation_jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_image_generation_jobs_updated ON image_generation_jobs (updated_at)")
+        conn.commit()
+        logger.info(f"SQLite job store ready at {self.db_path}")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def save(self, job: ImageGenerationJob):
+        """
+        Insert or update a job
+
+        Raises:
+            JobStoreFullError: If the job is new and no finished job can be evicted to make room
+        """
+        conn = self._connection()
+        # IMMEDIATE takes the write lock up front, so the cap check and insert are atomic across processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            is_new = conn.execute(
+                "SELECT 1 FROM image_generation_jobs WHERE job_id = ?", (job.job_id,)
+            ).fetchone() is None
+            if is_new:
+                self._make_room(conn)
+            conn.execute(
+                "INSERT OR REPLACE INTO image_generation_jobs (job_id, status, data, updated_at) VALUES (?, ?, ?, ?)",
+                (job.job_id, job.status, json.dumps(job.to_dict(), default=str), time.time())
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._writes += 1
+        if self._writes % self.PURGE_INTERVAL == 0:
+            self.purge_expired()
+
+    def _make_room(self, conn: sqlite3.Connection):
+        excess = conn.execute("SELECT COUNT(*) FROM image_generation_jobs").fetchone()[0] - self.max_jobs + 1
+        if excess <= 0:
+            return
+        cursor = conn.execute(
+            f"DELETE FROM image_generation_jobs WHERE job_id IN ("
+            f"SELECT job_id FROM image_generation_jobs WHERE status IN ({FINISHED_PLACEHOLDERS}) "
+            f"ORDER BY updated_at LIMIT ?)",
+            (*FINISHED_STATUSES, excess)
+        )
+        self.evictions += cursor.rowcount
+        if cursor.rowcount < excess:
+            raise JobStoreFullError(self.max_jobs)
+
+    def get(self, job_id: str) -> Optional[ImageGenerationJob]:
+        row = self._connection().execute(
+            "SELECT status, data, updated_at FROM image_generation_jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        status, data, updated_at = row
+        if status in FINISHED_STATUSES and time.time() - updated_at > self.ttl_seconds:
+            self.delete(job_id)
+            return None
+        return ImageGenerationJob.from_dict(json.loads(data))
+
+    def delete(self, job_id: str):
+        self._connection().execute("DELETE FROM image_generation_jobs WHERE job_id = ?", (job_id,))
+
+    def purge_expired(self) -> int:
+        cursor = self._connection().execute(
+            f"DELETE FROM image_generation_jobs WHERE status IN ({FINISHED_PLACEHOLDERS}) AND updated_at < ?",
+            (*FINISHED_STATUSES, time.time() - self.ttl_seconds)
+        )
+        return cursor.rowcount
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM image_generation_jobs").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend_name,
+            "jobs": self.count(),
+            "db_path": self.db_path,
+            "max_jobs": self.max_jobs,
+            "ttl_seconds": self.ttl_seconds,
+            "evictions": self.evictions
+        }
+
+def create_job_store(backend: str = "memory", **options) -> JobStore:
+    """
+    Create a job store for the configured backend
+
+    Args:
+        backend: "memory" or "sqlite"
+        options: Backend-specific constructor arguments
+    """
+    backend = (backend or "memory").lower()
+    if backend == "sqlite":
+        return SQLiteJobStore(
+            db_path=options.get("db_path", "image_generation_jobs.db"),
+            max_jobs=options.get("max_jobs", 1000),
+            ttl_seconds=options.get("ttl_seconds", 86400)
+        )
+    if backend != "memory":
+        logger.warning(f"Unknown job store backend '{backend}', using in-memory store")
+    return InMemoryJobStore(
+        max_jobs=options.get("max_jobs", 1000),
+        ttl_seconds=options.get("ttl_seconds", 86400)
+    )
@@ -0,0 +1,112 @@
+"""
+Model Warm-up Module
+Tracks background model loading so readiness can be reported per component.
+
+Each component goes through pending -> loading -> warming -> ready (or failed).
+Load and warm-up durations are recorded so slow cold starts are visible from
+the readiness probe.
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+class ReadinessTracker:
+    """Thread-safe registry of component load state and timings"""
+
+    def __init__(self):
+        """Initialize readiness tracker"""
+        self._components: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def register(self, name: str, required: bool = True):
+        """
+        Register a component
+
+        Args:
+            name: Component name reported by the readiness probe
+            required: Whether the service is unready until this component is ready;
+                      optional components only mark the service as degraded when they fail
+        """
+        with self._lock:
+            self._components[name] = {
+                "state": "pending",
+                "required": required,
+                "load_seconds": None,
+                "warmup_seconds": None,
+                "error": None
+            }
+
+    def run(self, name: str, load: Callable[[], Any], warm_up: Optional[Callable[[Any], Any]] = None) -> Any:
+        """
+        Load a component, optionally run its warm-up, and record the timings
+
+        Args:
+            name: Registered component name
+            load: Loads the component and returns it
+            warm_up: Called with the loaded component, e.g. to run a dummy inference
+
+        Returns:
+            The loaded component, or None if loading failed
+        """
+        self._update(name, state="loading")
+        started = time.perf_counter()
+        try:
+            component = load()
+            self._update(name, load_seconds=round(time.perf_counter() - started, 3))
+
+            if warm_up is not None:
+                self._update(name, state="warming")
+                started = time.perf_counter()
+                warm_up(component)
+                self._update(name, warmup_seconds=round(time.perf_counter() - started, 3))
+
+            self._update(name, state="ready")
+            logger.info(f"{name} ready")
+            return component
+        except Exception as e:
+            logger.error(f"{name} failed to load: {e}", exc_info=True)
+            self._update(name, state="failed", error=str(e))
+            return None
+
+    def mark_ready(self, name: str, load_seconds: Optional[float] = None):
+        """Record a component that was loaded outside of run()"""
+        self._update(name, state="ready", load_seconds=load_seconds)
+
+    def mark_skipped(self, name: str):
+        """Record a component whose warm-up is disabled (it loads on first use)"""
+        self._update(name, state="skipped")
+
+    def state(self, name: str) -> Optional[str]:
+        """Current state of a component, None if it is not registered"""
+        with self._lock:
+            component = self._components.get(name)
+            return component.get("state") if component else None
+
+    def is_ready(self) -> bool:
+        """Whether every required component is ready"""
+        with self._lock:
+            return all(
+                component["state"] == "ready"
+                for component in self._components.values() if component["required"]
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Readiness report with per-component state and timings"""
+        with self._lock:
+            components = {name: dict(component) for name, component in self._components.items()}
+        ready = all(c["state"] == "ready" for c in components.values() if c["required"])
+        return {
+            "ready": ready,
+            "degraded": any(c["state"] == "failed" for c in components.values()),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "components": components
+        }
+
+    def _update(self, name: str, **fields):
+        with self._lock:
+            self._components.setdefault(name, {"required": True}).update(fields)
@@ -6,7 +6,9 @@ This module focuses on detecting major interior items relevant to room improveme
 bed, sofa, chair, table, wardrobe, TV, window, door, etc.
 """
 
+import os
 import cv2
+import threading
 import numpy as np
 from ultralytics import YOLO
 import logging
@@ -14,21 +16,6 @@ from typing import List, Dict, Any, Tuple
 
 logger = logging.getLogger(__name__)
 
-def convert_numpy_types(obj):
-    """Convert NumPy types to native Python types for JSON serialization"""
-    if isinstance(obj, np.integer):
-        return int(obj)
-    elif isinstance(obj, np.floating):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, dict):
-        return {key: convert_numpy_types(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_numpy_types(item) for item in obj]
-    else:
-        return obj
-
 class ObjectDetector:
     """Object detector using YOLOv8 with COCO dataset weights"""
     
@@ -80,19 +67,53 @@ class ObjectDetector:
         'toilet': 'fixture'
     }
     
-    def __init__(self, confidence_threshold: float = 0.5):
+    # Per-class-id lookup tables for vectorized post-processing
+    CLASS_LOOKUP_SIZE = max(INTERIOR_CLASSES) + 1
+    INTERIOR_MASK = np.zeros(CLASS_LOOKUP_SIZE, dtype=bool)
+    INTERIOR_MASK[list(INTERIOR_CLASSES)] = True
+    CLASS_NAMES = np.full(CLASS_LOOKUP_SIZE, '', dtype=object)
+    CLASS_NAMES[list(INTERIOR_CLASSES)] = list(INTERIOR_CLASSES.values())
+    CLASS_CATEGORIES = np.full(CLASS_LOOKUP_SIZE, 'other', dtype=object)
+    CLASS_CATEGORIES[list(INTERIOR_CLASSES)] = list(
+        map(FURNITURE_MAPPING.get, INTERIOR_CLASSES.values(), ['other'] * len(INTERIOR_CLASSES))
+    )
+    
+    # Area ratio above which an object is medium / large
+    SIZE_THRESHOLDS = (0.05, 0.15)
+    SIZE_LABELS = np.array(["small", "medium", "large"], dtype=object)
+    # Relative center below the first threshold is left/top, above the second right/bottom
+    POSITION_THRESHOLDS = (0.33, 0.67)
+    HORIZONTAL_LABELS = np.array(["left", "center", "right"], dtype=object)
+    VERTICAL_LABELS = np.array(["top", "middle", "bottom"], dtype=object)
+    
+    def __init__(self, confidence_threshold: float = 0.5, backend: str = None):
         """
         Initialize object detector
         
         Args:
             confidence_threshold: Minimum confidence for object detection
+            backend: Inference backend - "pytorch" (Ultralytics .pt), "onnx" (ONNX Runtime)
+                     or "openvino" (ONNX Runtime OpenVINO provider); defaults to DETECTOR_BACKEND
         """
         self.confidence_threshold = confidence_threshold
+        self.backend = (backend or os.getenv('DETECTOR_BACKEND', 'pytorch')).lower()
         self.model = None
+        self.onnx_runner = None
+        # Ultralytics predictors keep per-call state; ONNX Runtime sessions are safe to share
+        self._model_lock = threading.Lock()
         self._load_model()
     
     def _load_model(self):
         """Load YOLOv8 model with COCO weights"""
+        if self.backend in ('onnx', 'openvino'):
+            try:
+                self.onnx_runner = self._load_onnx_runner()
+                return
+            except Exception as e:
+                logger.error(f"Failed to load {self.backend} detector backend: {e}")
+                logger.info("Falling back to PyTorch backend")
+                self.backend = 'pytorch'
+        
         try:
             logger.info("Loading YOLOv8 model...")
             # Use YOLOv8 nano for faster inference
@@ -102,6 +123,54 @@ class ObjectDetector:
             logger.error(f"Failed to load YOLOv8 model: {e}")
             raise
     
+    def _load_onnx_runner(self):
+        """Load the exported ONNX model, exporting it from the .pt weights on first use"""
+        from .onnx_detector import OnnxYoloRunner, export_onnx_model
+        
+        model_path = os.getenv('DETECTOR_ONNX_PATH', 'yolov8n.onnx')
+        if not os.path.exists(model_path):
+            model_path = export_onnx_model('yolov8n.pt')
+        
+        return OnnxYoloRunner(
+            model_path,
+            intra_op_threads=int(os.getenv('DETECTOR_INTRA_OP_THREADS', '0')),
+            use_openvino=self.backend == 'openvino'
+        )
+    
+    def _infer(self, images: List[np.ndarray]) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Run the selected backend and return (boxes xyxy, confidences, class ids) per image"""
+        if self.onnx_runner is not None:
+            return self.onnx_runner.predict(images, self.confidence_threshold)
+        
+        detections = []
+        with self._model_lock:
+            predictions = self.model(images, conf=self.confidence_threshold, verbose=False)
+        for results in predictions:
+            if results.boxes is None:
+                detections.append((np.zeros((0, 4)), np.zeros(0), np.zeros(0, dtype=int)))
+                continue
+            detections.append((
+                results.boxes.xyxy.cpu().numpy(),  # x1, y1, x2, y2
+                results.boxes.conf.cpu().numpy(),
+                results.boxes.cls.cpu().numpy().astype(int)
+            ))
+        return detections
+    
+    def warm_up(self, image_size: int = 640):
+        """
+        Fuse the model layers and run one dummy inference
+        
+        The first real request otherwise pays for layer fusion, predictor setup
+        and kernel initialization.
+        
+        Args:
+            image_size: Side length of the blank warm-up image
+        """
+        if self.model is not None:
+            self.model.fuse()
+        dummy_image = np.zeros((image_size, image_size, 3), dtype=np.uint8)
+        self._infer([dummy_image])
+    
     def detect_objects(self, image_path: str) -> Dict[str, Any]:
         """
         Detect objects in room image
@@ -109,142 +178,190 @@ class ObjectDetector:
         Args:
             image_path: Path to the room image
             
+        Returns:
+            Dictionary containing detected objects and metadata
+        """
+        return self.detect_objects_in_image(cv2.imread(image_path), source=image_path)
+    
+    def detect_objects_in_image(self, image: np.ndarray, source: str = "uploaded image") -> Dict[str, Any]:
+        """
+        Detect objects in an already decoded room image
+        
+        Args:
+            image: Decoded BGR image (e.g. ImageContext.image)
+            source: Origin of the image, used in error messages
+            
         Returns:
             Dictionary containing detected objects and metadata
         """
         try:
-            # Load and validate image
-            image = cv2.imread(image_path)
+            # Validate image
             if image is None:
-                raise ValueError(f"Could not load image from {image_path}")
-            
-            height, width = image.shape[:2]
+                raise ValueError(f"Could not load image from {source}")
             
             # Run inference
-            results = self.model(image, conf=self.confidence_threshold, verbose=False)
+            detections = self._infer([image])[0]
             
-            # Process detections
-            detected_objects = self._process_detections(results[0], width, height)
-            
-            # Generate summary
-            detection_summary = self._generate_detection_summary(detected_objects)
-            
-            result = {
-                "objects": detected_objects,
-                "summary": detection_summary,
-                "image_dimensions": {"width": width, "height": height},
-                "detection_metadata": {
-                    "total_objects": len(detected_objects),
-                    "confidence_threshold": self.confidence_threshold,
-                    "model": "yolov8n",
-                    "dataset": "coco"
-                }
-            }
-            
-            # Convert all NumPy types to native Python types
-            return convert_numpy_types(result)
+            return self._build_result(detections, image)
             
         except Exception as e:
             logger.error(f"Object detection failed: {e}")
-            result = {
-                "objects": [],
-                "summary": {"error": str(e)},
-                "image_dimensions": {"width": 0, "height": 0},
-                "detection_metadata": {
-                    "total_objects": 0,
-                    "confidence_threshold": self.confidence_threshold,
-                    "error": str(e)
-                }
+            return self._error_result(e)
+    
+    def detect_objects_batch(self, images: List[np.ndarray], batch_size: int = 16) -> List[Dict[str, Any]]:
+        """
+        Detect objects in several decoded room images with batched forward passes
+        
+        Args:
+            images: Decoded BGR images; None entries yield an error result
+            batch_size: Maximum number of images per forward pass
+            
+        Returns:
+            One result per input image, in input order, in the detect_objects schema
+        """
+        results = [None] * len(images)
+        valid_indices = []
+        for index, image in enumerate(images):
+            if image is None:
+                results[index] = self._error_result(ValueError(f"Could not load image {index}"))
+            else:
+                valid_indices.append(index)
+        
+        for start in range(0, len(valid_indices), max(1, batch_size)):
+            chunk = valid_indices[start:start + batch_size]
+            chunk_images = [images[index] for index in chunk]
+            try:
+                # Each image is letterboxed and the list runs as one batch
+                chunk_detections = self._infer(chunk_images)
+                for index, image, detections in zip(chunk, chunk_images, chunk_detections):
+                    results[index] = self._build_result(detections, image)
+            except Exception as e:
+                logger.error(f"Batched object detection failed: {e}")
+                for index in chunk:
+                    results[index] = self._error_result(e)
+        
+        return results
+    
+    def _build_result(self, detections: Tuple[np.ndarray, np.ndarray, np.ndarray], image: np.ndarray) -> Dict[str, Any]:
+        """Structure the detections of one image"""
+        height, width = image.shape[:2]
+        
+        # Process detections
+        detected_objects = self._process_detections(detections, width, height)
+        
+        # Generate summary
+        detection_summary = self._generate_detection_summary(detected_objects)
+        
+        result = {
+            "objects": detected_objects,
+            "summary": detection_summary,
+            "image_dimensions": {"width": width, "height": height},
+            "detection_metadata": {
+                "total_objects": len(detected_objects),
+                "confidence_threshold": self.confidence_threshold,
+                "model": "yolov8n",
+                "backend": self.backend,
+                "dataset": "coco"
+            }
+        }
+        
+        return result
+    
+    def _error_result(self, error: Exception) -> Dict[str, Any]:
+        """Empty detection result describing a failure"""
+        result = {
+            "objects": [],
+            "summary": {"error": str(error)},
+            "image_dimensions": {"width": 0, "height": 0},
+            "detection_metadata": {
+                "total_objects": 0,
+                "confidence_threshold": self.confidence_threshold,
+                "error": str(error)
             }
-            return convert_numpy_types(result)
+        }
+        return result
     
-    def _process_detections(self, results, image_width: int, image_height: int) -> List[Dict[str, Any]]:
-        """Process YOLO detection results into structured format"""
-        detected_objects = []
+    def _process_detections(self, detections: Tuple[np.ndarray, np.ndarray, np.ndarray],
+                            image_width: int, image_height: int) -> List[Dict[str, Any]]:
+        """
+        Process detections (boxes xyxy, confidences, class ids) into structured format
         
-        if results.boxes is None:
-            return detected_objects
+        Filtering, geometry and categorization run as array operations over all
+        boxes; the arrays are converted to Python types once, when the per-object
+        dictionaries are built. Rounding stays on Python floats so values match
+        round() exactly.
+        """
+        boxes, confidences, class_ids = detections
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        confidences = np.asarray(confidences, dtype=np.float64).reshape(-1)
+        class_ids = np.asarray(class_ids).astype(int).reshape(-1)
         
-        boxes = results.boxes.xyxy.cpu().numpy()  # x1, y1, x2, y2
-        confidences = results.boxes.conf.cpu().numpy()
-        class_ids = results.boxes.cls.cpu().numpy().astype(int)
+        # Only process interior-relevant classes; object ids keep the original box index
+        in_range = (class_ids >= 0) & (class_ids < self.CLASS_LOOKUP_SIZE)
+        keep = np.zeros(len(class_ids), dtype=bool)
+        keep[in_range] = self.INTERIOR_MASK[class_ids[in_range]]
+        indices = np.flatnonzero(keep)
+        if len(indices) == 0:
+            return []
         
-        for i, (box, confidence, class_id) in enumerate(zip(boxes, confidences, class_ids)):
-            # Only process interior-relevant classes
-            if class_id not in self.INTERIOR_CLASSES:
-                continue
-            
-            class_name = self.INTERIOR_CLASSES[class_id]
-            furniture_category = self.FURNITURE_MAPPING.get(class_name, 'other')
-            
-            x1, y1, x2, y2 = box
-            
-            # Calculate relative positions and dimensions
-            center_x = (x1 + x2) / 2 / image_width
-            center_y = (y1 + y2) / 2 / image_height
-            width_ratio = (x2 - x1) / image_width
-            height_ratio = (y2 - y1) / image_height
-            
-            # Calculate area
-            area_ratio = width_ratio * height_ratio
-            
-            detected_object = {
+        boxes, confidences, class_ids = boxes[indices], confidences[indices], class_ids[indices]
+        
+        # Calculate relative positions, dimensions and area
+        center_x = (boxes[:, 0] + boxes[:, 2]) / 2 / image_width
+        center_y = (boxes[:, 1] + boxes[:, 3]) / 2 / image_height
+        width_ratio = (boxes[:, 2] - boxes[:, 0]) / image_width
+        height_ratio = (boxes[:, 3] - boxes[:, 1]) / image_height
+        area_ratio = width_ratio * height_ratio
+        
+        # Categorize size and position
+        medium, large = self.SIZE_THRESHOLDS
+        low, high = self.POSITION_THRESHOLDS
+        size_categories = self.SIZE_LABELS[(area_ratio > medium).astype(int) + (area_ratio > large)]
+        horizontal = self.HORIZONTAL_LABELS[(center_x >= low).astype(int) + (center_x > high)]
+        vertical = self.VERTICAL_LABELS[(center_y >= low).astype(int) + (center_y > high)]
+        
+        # Sort by rounded confidence (highest first), ties in detection order
+        rounded_confidences = np.array([round(c, 3) for c in confidences.tolist()])
+        order = np.argsort(-rounded_confidences, kind="stable")
+        
+        columns = zip(
+            indices[order].tolist(),
+            self.CLASS_NAMES[class_ids[order]].tolist(),
+            self.CLASS_CATEGORIES[class_ids[order]].tolist(),
+            rounded_confidences[order].tolist(),
+            boxes[order].astype(int).tolist(),
+            center_x[order].tolist(),
+            center_y[order].tolist(),
+            width_ratio[order].tolist(),
+            height_ratio[order].tolist(),
+            area_ratio[order].tolist(),
+            size_categories[order].tolist(),
+            vertical[order].tolist(),
+            horizontal[order].tolist()
+        )
+        
+        return [
+            {
                 "object_id": f"obj_{i}",
                 "class_name": class_name,
                 "furniture_category": furniture_category,
-                "confidence": round(float(confidence), 3),
-                "bounding_box": {
-                    "x1": int(x1), "y1": int(y1),
-                    "x2": int(x2), "y2": int(y2)
-                },
+                "confidence": confidence,
+                "bounding_box": {"x1": x1, "y1": y1, "x2": x2, "y2": y2},
                 "relative_position": {
-                    "center_x": round(center_x, 3),
-                    "center_y": round(center_y, 3)
+                    "center_x": round(cx, 3),
+                    "center_y": round(cy, 3)
                 },
                 "relative_size": {
-                    "width_ratio": round(width_ratio, 3),
-                    "height_ratio": round(height_ratio, 3),
-                    "area_ratio": round(area_ratio, 3)
+                    "width_ratio": round(wr, 3),
+                    "height_ratio": round(hr, 3),
+                    "area_ratio": round(ar, 3)
                 },
-                "size_category": self._categorize_size(area_ratio),
-                "position_description": self._describe_position(center_x, center_y)
+                "size_category": size_category,
+                "position_description": f"{v_pos}_{h_pos}"
             }
-            
-            detected_objects.append(detected_object)
-        
-        # Sort by confidence (highest first)
-        detected_objects.sort(key=lambda x: x['confidence'], reverse=True)
-        
-        return detected_objects
-    
-    def _categorize_size(self, area_ratio: float) -> str:
-        """Categorize object size based on area ratio"""
-        if area_ratio > 0.15:
-            return "large"
-        elif area_ratio > 0.05:
-            return "medium"
-        else:
-            return "small"
-    
-    def _describe_position(self, center_x: float, center_y: float) -> str:
-        """Generate human-readable position description"""
-        # Horizontal position
-        if center_x < 0.33:
-            h_pos = "left"
-        elif center_x > 0.67:
-            h_pos = "right"
-        else:
-            h_pos = "center"
-        
-        # Vertical position
-        if center_y < 0.33:
-            v_pos = "top"
-        elif center_y > 0.67:
-            v_pos = "bottom"
-        else:
-            v_pos = "middle"
-        
-        return f"{v_pos}_{h_pos}"
+            for (i, class_name, furniture_category, confidence, (x1, y1, x2, y2),
+                 cx, cy, wr, hr, ar, size_category, v_pos, h_pos) in columns
+        ]
     
     def _generate_detection_summary(self, detected_objects: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Generate summary of detected objects"""
@@ -288,7 +405,7 @@ class ObjectDetector:
             "furniture_categories": furniture_categories,
             "size_distribution": size_distribution,
             "confidence_stats": {
-                "average": round(np.mean(confidences), 3) if confidences else 0,
+                "average": round(float(np.mean(confidences)), 3) if confidences else 0,
                 "max": round(max(confidences), 3) if confidences else 0,
                 "min": round(min(confidences), 3) if confidences else 0
             },
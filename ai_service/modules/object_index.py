@@ -0,0 +1,94 @@
+"""
+Object Index Module
+Id lookup and pairwise geometry for the objects of one detection result.
+
+Built once per analysis and shared by SpatialAnalyzer and EnhancedRuleEngine,
+so zone lists of object ids resolve through a dict instead of list scans and
+pairwise distances come from a single NumPy distance matrix.
+"""
+
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+import numpy as np
+
+class ObjectIndex:
+    """Id -> object index with object centers as arrays"""
+
+    def __init__(self, objects: List[Dict[str, Any]]):
+        """
+        Initialize object index
+
+        Args:
+            objects: 'objects' list of an ObjectDetector result
+        """
+        self.objects = objects
+        self.by_id = {obj['object_id']: obj for obj in objects}
+        self.positions = {obj['object_id']: i for i, obj in enumerate(objects)}
+        self.centers = np.array(
+            [[obj['relative_position']['center_x'], obj['relative_position']['center_y']] for obj in objects],
+            dtype=np.float64
+        ).reshape(-1, 2)
+        self._offsets: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._distances: Optional[np.ndarray] = None
+        self._groups: Dict[str, Dict[Any, List[int]]] = {}
+
+    @classmethod
+    def for_result(cls, detected_objects: Dict[str, Any], object_index: Optional["ObjectIndex"] = None) -> "ObjectIndex":
+        """Reuse a shared index if it was built for this result's objects, otherwise build one"""
+        objects = detected_objects.get('objects', [])
+        if object_index is not None and object_index.objects is objects:
+            return object_index
+        return cls(objects)
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def __contains__(self, object_id: str) -> bool:
+        return object_id in self.by_id
+
+    def get(self, object_id: str) -> Optional[Dict[str, Any]]:
+        return self.by_id.get(object_id)
+
+    def resolve(self, object_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """Objects for a list of ids, in detection order; unknown ids are skipped"""
+        positions = sorted({self.positions[i] for i in object_ids if i in self.positions})
+        return [self.objects[p] for p in positions]
+
+    def group(self, attribute: str) -> Dict[Any, List[int]]:
+        """Object positions by value of a top-level attribute (e.g. 'furniture_category')"""
+        if attribute not in self._groups:
+            groups: Dict[Any, List[int]] = {}
+            for position, obj in enumerate(self.objects):
+                groups.setdefault(obj.get(attribute), []).append(position)
+            self._groups[attribute] = groups
+        return self._groups[attribute]
+
+    def offsets(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Matrices dx, dy with dx[i, j] = center_x[j] - center_x[i]"""
+        if self._offsets is None:
+            self._offsets = (
+                self.centers[None, :, 0] - self.centers[:, None, 0],
+                self.centers[None, :, 1] - self.centers[:, None, 1]
+            )
+        return self._offsets
+
+    def distances(self) -> np.ndarray:
+        """Pairwise center distance matrix in relative image units"""
+        if self._distances is None:
+            dx, dy = self.offsets()
+            self._distances = np.sqrt(dx ** 2 + dy ** 2)
+        return self._distances
+
+    def distance(self, id1: str, id2: str) -> float:
+        return float(self.distances()[self.positions[id1], self.positions[id2]])
+
+    def pairs_within(self, max_distance: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Index pairs (i < j) whose centers are at most max_distance apart
+
+        Pairs are returned in row-major order, the order of a nested loop over
+        the objects.
+        """
+        rows, cols = np.triu_indices(len(self.objects), k=1)
+        close = self.distances()[rows, cols] <= max_distance
+        return rows[close], cols[close]
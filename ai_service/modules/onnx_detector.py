@@ -0,0 +1,145 @@
+"""
+ONNX Detector Module
+Runs an exported YOLOv8 model with ONNX Runtime for CPU-only deployments.
+
+The runner reproduces the Ultralytics pipeline around the network:
+1. Letterbox resize to the model input size (gray padding, centered)
+2. One session run per batch of images
+3. Confidence filtering and class-aware NMS, with boxes mapped back to the image
+
+The OpenVINO backend uses the same runner through ONNX Runtime's OpenVINO
+execution provider (onnxruntime-openvino package).
+"""
+
+import os
+import logging
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# (boxes xyxy, confidences, class ids) for one image
+Detections = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+def export_onnx_model(weights: str = "yolov8n.pt", image_size: int = 640) -> str:
+    """
+    Export Ultralytics weights to ONNX with a dynamic batch axis
+
+    Returns:
+        Path of the exported .onnx file
+    """
+    from ultralytics import YOLO
+
+    logger.info(f"Exporting {weights} to ONNX...")
+    return YOLO(weights).export(format="onnx", imgsz=image_size, dynamic=True, simplify=False)
+
+class OnnxYoloRunner:
+    """YOLOv8 inference through an ONNX Runtime session"""
+
+    def __init__(self, model_path: str, intra_op_threads: int = 0, image_size: int = 640,
+                 iou_threshold: float = 0.7, max_detections: int = 300, use_openvino: bool = False):
+        """
+        Initialize ONNX runner
+
+        Args:
+            model_path: Path of the exported YOLOv8 .onnx model
+            intra_op_threads: Threads per operator (0 lets ONNX Runtime use every physical core)
+            image_size: Square model input size used at export time
+            iou_threshold: NMS IoU threshold (Ultralytics default)
+            max_detections: Maximum detections kept per image
+            use_openvino: Run through the OpenVINO execution provider
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = max(0, int(intra_op_threads))
+        options.inter_op_num_threads = 1
+
+        providers = ["CPUExecutionProvider"]
+        if use_openvino:
+            if "OpenVINOExecutionProvider" not in ort.get_available_providers():
+                raise RuntimeError("OpenVINOExecutionProvider not available, install onnxruntime-openvino")
+            providers.insert(0, "OpenVINOExecutionProvider")
+
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+        self.image_size = image_size
+        self.iou_threshold = iou_threshold
+        self.max_detections = max_detections
+        self.providers = self.session.get_providers()
+        logger.info(f"ONNX detector loaded from {os.path.basename(model_path)} with {self.providers}")
+
+    def predict(self, images: List[np.ndarray], confidence_threshold: float) -> List[Detections]:
+        """
+        Detect objects in a batch of BGR images
+
+        Returns:
+            Per-image (boxes, confidences, class_ids) in original image coordinates
+        """
+        letterboxed = [self._letterbox(image) for image in images]
+        batch = np.stack([tensor for tensor, _, _ in letterboxed])
+        outputs = self.session.run(None, {self.input_name: batch})[0]  # (batch, 4 + classes, anchors)
+
+        return [
+            self._postprocess(prediction, ratio, padding, image.shape[:2], confidence_threshold)
+            for prediction, (_, ratio, padding), image in zip(outputs, letterboxed, images)
+        ]
+
+    def _letterbox(self, image: np.ndarray):
+        # Same geometry as ultralytics LetterBox(auto=False): scale to fit, pad evenly with 114
+        height, width = image.shape[:2]
+        ratio = min(self.image_size / height, self.image_size / width)
+        new_width, new_height = int(round(width * ratio)), int(round(height * ratio))
+        pad_x, pad_y = (self.image_size - new_width) / 2, (self.image_size - new_height) / 2
+
+        if (new_width, new_height) != (width, height):
+            image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+        top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+        left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+        image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+
+        # BGR HWC uint8 -> RGB CHW float32 in [0, 1]
+        tensor = cv2.dnn.blobFromImage(image, scalefactor=1 / 255.0, swapRB=True)[0]
+        return tensor, ratio, (left, top)
+
+    def _postprocess(self, prediction: np.ndarray, ratio: float, padding: Tuple[int, int],
+                     image_shape: Tuple[int, int], confidence_threshold: float) -> Detections:
+        prediction = prediction.T  # (anchors, 4 + classes)
+        scores = prediction[:, 4:]
+        class_ids = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(scores)), class_ids]
+
+        keep = confidences > confidence_threshold
+        if not keep.any():
+            return np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, int)
+
+        centers = prediction[keep, :4]
+        confidences = confidences[keep]
+        class_ids = class_ids[keep]
+
+        boxes = np.empty_like(centers)
+        boxes[:, 0] = centers[:, 0] - centers[:, 2] / 2
+        boxes[:, 1] = centers[:, 1] - centers[:, 3] / 2
+        boxes[:, 2] = centers[:, 0] + centers[:, 2] / 2
+        boxes[:, 3] = centers[:, 1] + centers[:, 3] / 2
+
+        # Class-aware NMS: offset boxes per class so different classes never overlap
+        offsets = class_ids[:, None].astype(np.float32) * 7680
+        shifted = boxes + offsets
+        nms_boxes = np.column_stack([shifted[:, :2], shifted[:, 2:] - shifted[:, :2]])
+        kept = cv2.dnn.NMSBoxes(nms_boxes.tolist(), confidences.tolist(), confidence_threshold, self.iou_threshold)
+        kept = np.array(kept, dtype=int).reshape(-1)
+        kept = kept[np.argsort(-confidences[kept])][:self.max_detections]
+
+        boxes, confidences, class_ids = boxes[kept], confidences[kept], class_ids[kept]
+
+        # Undo the letterbox and clip to the image
+        height, width = image_shape
+        boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - padding[0]) / ratio).clip(0, width)
+        boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - padding[1]) / ratio).clip(0, height)
+
+        return boxes, confidences, class_ids.astype(int)
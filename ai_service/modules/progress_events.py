@@ -0,0 +1,205 @@
+"""
+Progress Events Module
+Publishes pipeline progress to Server-Sent Events subscribers.
+
+Each analysis or generation job gets a channel identified by its job id (or a
+client-chosen progress id). Stages publish events to the channel as they
+finish, from the event loop or from worker threads, and every subscriber of
+the channel receives them in order:
+1. Events are kept in a bounded per-channel history, so late subscribers and
+   reconnecting clients (Last-Event-ID) replay what they missed
+2. A terminal event (completed / failed) closes the channel; closed and idle
+   channels are dropped after a TTL
+3. Over the channel limit, the least recently active channel without
+   subscribers or a running job is dropped; live channels are never evicted
+
+Channels live in the process that runs the job; other uvicorn workers fall
+back to job store polling.
+"""
+
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Any, Optional, AsyncIterator, Callable
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_EVENTS = ("completed", "failed")
+
+class ProgressEvent:
+    """One event of a channel"""
+
+    def __init__(self, event_id: int, event: str, data: Dict[str, Any]):
+        self.id = event_id
+        self.event = event
+        self.data = data
+        self.timestamp = time.time()
+
+    def to_sse(self) -> str:
+        """Server-Sent Events wire format"""
+        payload = json.dumps(dict(self.data, timestamp=self.timestamp), default=str)
+        return f"id: {self.id}\nevent: {self.event}\ndata: {payload}\n\n"
+
+class _Channel:
+    """Event history and waiting subscribers of one channel"""
+
+    def __init__(self, history_size: int):
+        self.events = deque(maxlen=history_size)
+        self.next_id = 1
+        self.closed = False
+        self.last_activity = time.monotonic()
+        self.waiters = set()  # (loop, asyncio.Event)
+
+class ProgressEventBus:
+    """Thread-safe publish/subscribe hub for pipeline progress events"""
+
+    def __init__(self, history_size: int = 200, max_channels: int = 1000, ttl_seconds: float = 3600):
+        """
+        Initialize progress event bus
+
+        Args:
+            history_size: Events kept per channel for replay
+            max_channels: Channel limit; beyond it the least recently active channel that has no
+                subscribers and no running job is dropped (live channels may exceed the limit)
+            ttl_seconds: Closed or idle channels are dropped after this many seconds
+        """
+        self.history_size = max(1, int(history_size))
+        self.max_channels = max(1, int(max_channels))
+        self.ttl_seconds = ttl_seconds
+        self._channels: "OrderedDict[str, _Channel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.events_published = 0
+        self.active_subscribers = 0
+        self.evictions = 0
+
+    def publish(self, channel_id: str, event: str, data: Optional[Dict[str, Any]] = None):
+        """
+        Append an event to a channel and wake its subscribers
+
+        Safe to call from any thread. Events published after the terminal
+        event of a channel are ignored.
+        """
+        with self._lock:
+            channel = self._channel_locked(channel_id)
+            if channel.closed:
+                return
+            channel.events.append(ProgressEvent(channel.next_id, event, data or {}))
+            channel.next_id += 1
+            channel.closed = event in TERMINAL_EVENTS
+            waiters = list(channel.waiters)
+            self.events_published += 1
+
+        for loop, wakeup in waiters:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass  # Subscriber's loop already closed
+
+    def publisher(self, channel_id: str) -> Callable[..., None]:
+        """publish() bound to one channel, for passing into pipeline stages"""
+        return lambda event, data=None: self.publish(channel_id, event, data)
+
+    def has_channel(self, channel_id: str) -> bool:
+        with self._lock:
+            return channel_id in self._channels
+
+    async def subscribe(self, channel_id: str, last_event_id: Optional[int] = None,
+                        heartbeat_seconds: float = 15.0,
+                        idle_timeout: float = 300.0) -> AsyncIterator[Optional[ProgressEvent]]:
+        """
+        Yield the events of a channel until its terminal event
+
+        Events in the history newer than last_event_id are replayed first.
+        None is yielded every heartbeat_seconds without events so the caller
+        can keep the connection alive; the stream ends if nothing is published
+        for idle_timeout seconds.
+
+        Args:
+            channel_id: Job or progress id
+            last_event_id: Id of the last event the client received
+            heartbeat_seconds: Interval of keep-alive yields
+            idle_timeout: Seconds without events after which the stream ends
+        """
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        with self._lock:
+            channel = self._channel_locked(channel_id)
+            channel.waiters.add((loop, wakeup))
+            self.active_subscribers += 1
+
+        cursor = last_event_id or 0
+        idle_since = time.monotonic()
+        try:
+            while True:
+                wakeup.clear()
+                with self._lock:
+                    pending = [event for event in channel.events if event.id > cursor]
+                    closed = channel.closed
+
+                for event in pending:
+                    cursor = event.id
+                    yield event
+                if pending:
+                    idle_since = time.monotonic()
+                if closed:
+                    return
+                if time.monotonic() - idle_since >= idle_timeout:
+                    logger.info(f"Progress stream for {channel_id} idle for {idle_timeout:.0f}s, closing")
+                    return
+
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                channel.waiters.discard((loop, wakeup))
+                self.active_subscribers -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Bus statistics for health reporting"""
+        with self._lock:
+            open_channels = sum(1 for channel in self._channels.values() if not channel.closed)
+            return {
+                "channels": len(self._channels),
+                "open_channels": open_channels,
+                "active_subscribers": self.active_subscribers,
+                "events_published": self.events_published,
+                "evictions": self.evictions
+            }
+
+    def _channel_locked(self, channel_id: str) -> _Channel:
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            self._purge_locked()
+            channel = _Channel(self.history_size)
+            self._channels[channel_id] = channel
+            while len(self._channels) > self.max_channels and self._evict_locked(channel_id):
+                pass
+        channel.last_activity = time.monotonic()
+        self._channels.move_to_end(channel_id)
+        return channel
+
+    def _evict_locked(self, keep_channel_id: str) -> bool:
+        # Oldest first; a channel with subscribers, or with events but no terminal event
+        # (a job still publishing), must survive or its subscribers would never hear the end
+        for channel_id, channel in self._channels.items():
+            if channel_id == keep_channel_id or channel.waiters:
+                continue
+            if channel.closed or not channel.events:
+                del self._channels[channel_id]
+                self.evictions += 1
+                return True
+        return False
+
+    def _purge_locked(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [
+            channel_id for channel_id, channel in self._channels.items()
+            if channel.last_activity < cutoff and not channel.waiters
+        ]
+        for channel_id in expired:
+            del self._channels[channel_id]
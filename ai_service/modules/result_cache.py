@@ -0,0 +1,185 @@
+"""
+Result Cache Module
+Reuses whole concept generations for repeated submissions.
+
+Requests are reduced to an analysis fingerprint: a perceptual hash of the room
+photo (when there is one) plus the room type, notes and serialized suggestions.
+Finished results are indexed by fingerprint in a small SQLite database with LRU
+eviction bounded by entry count and by the size of the generated images.
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Only images inside these upload directories are ever removed on eviction
+MANAGED_UPLOAD_DIRS = ("room_improvements", "conceptual_images")
+
+def image_fingerprint(image: np.ndarray, hash_size: int = 16) -> str:
+    """
+    Difference hash (dHash) of an image
+
+    Re-encoded or resized copies of the same photo hash identically, unlike a
+    byte hash of the upload.
+
+    Args:
+        image: BGR or grayscale image
+        hash_size: Hash grid size; the hash has hash_size * hash_size bits
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    resized = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (resized[:, 1:] > resized[:, :-1]).flatten()
+    return np.packbits(bits).tobytes().hex()
+
+def analysis_fingerprint(**parts) -> str:
+    """Canonical sha256 over the inputs that determine a generation result"""
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """SQLite index of finished generations with LRU eviction"""
+
+    def __init__(self, db_path: str = "concept_result_cache.db", max_entries: int = 500,
+                 max_bytes: int = 2 * 1024 ** 3, delete_evicted_images: bool = False):
+        """
+        Initialize result cache
+
+        Args:
+            db_path: Path of the SQLite index
+            max_entries: Maximum number of cached results
+            max_bytes: Maximum combined size of the cached images
+            delete_evicted_images: Remove evicted images from the managed upload directories
+        """
+        self.db_path = os.path.abspath(db_path)
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max_bytes
+        self.delete_evicted_images = delete_evicted_images
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS concept_results (
+                fingerprint TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                result TEXT NOT NULL,
+                image_path TEXT,
+                image_bytes INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_concept_results_last_used ON concept_results (last_used)")
+        logger.info(f"Concept result cache ready at {self.db_path}")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, fingerprint: str, kind: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached result for a fingerprint
+
+        Entries whose image has disappeared from disk are dropped and reported as misses.
+        """
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT result, image_path FROM concept_results WHERE fingerprint = ? AND kind = ?",
+            (fingerprint, kind)
+        ).fetchone()
+
+        if row is not None and row[1] and not os.path.exists(row[1]):
+            conn.execute("DELETE FROM concept_results WHERE fingerprint = ?", (fingerprint,))
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        conn.execute("UPDATE concept_results SET last_used = ? WHERE fingerprint = ?", (time.time(), fingerprint))
+        return json.loads(row[0])
+
+    def put(self, fingerprint: str, kind: str, result: Dict[str, Any], image_path: Optional[str] = None):
+        """Store a finished result and evict least recently used entries beyond the limits"""
+        image_bytes = os.path.getsize(image_path) if image_path and os.path.exists(image_path) else 0
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO concept_results "
+            "(fingerprint, kind, result, image_path, image_bytes, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (fingerprint, kind, json.dumps(result, default=str), image_path, image_bytes, now, now)
+        )
+        self._evict(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache statistics for health reporting"""
+        entries, total_bytes = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(image_bytes), 0) FROM concept_results"
+        ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "image_bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions
+        }
+
+    def _evict(self, conn: sqlite3.Connection):
+        entries, total_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(image_bytes), 0) FROM concept_results"
+        ).fetchone()
+        if entries <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+
+        for fingerprint, image_path, image_bytes in conn.execute(
+            "SELECT fingerprint, image_path, image_bytes FROM concept_results ORDER BY last_used"
+        ).fetchall():
+            if entries <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM concept_results WHERE fingerprint = ?", (fingerprint,))
+            entries -= 1
+            total_bytes -= image_bytes
+            with self._lock:
+                self.evictions += 1
+            if self.delete_evicted_images and image_path:
+                self._remove_image(conn, image_path)
+
+    def _remove_image(self, conn: sqlite3.Connection, image_path: str):
+        # Never touch files outside the upload directories or still referenced by another entry
+        if os.path.basename(os.path.dirname(image_path)) not in MANAGED_UPLOAD_DIRS:
+            return
+        if conn.execute("SELECT 1 FROM concept_results WHERE image_path = ?", (image_path,)).fetchone():
+            return
+        try:
+            os.remove(image_path)
+        except OSError as e:
+            logger.warning(f"Could not remove evicted image {image_path}: {e}")
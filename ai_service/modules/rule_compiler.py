@@ -0,0 +1,385 @@
+"""
+Rule Compiler Module
+Compiles declarative spatial rules (JSON) into indexed matchers.
+
+Rules are grouped by output section and room type when the rule file is
+loaded, and each object rule is keyed by the most selective attribute it
+requires (zone, class, furniture category or size). A request therefore only
+evaluates the rules for its room type, and only against the objects that can
+possibly match them.
+
+Rule scopes:
+- object: fires once per matching object
+- pair: fires once per matching (first, second) object pair
+- room: fires once when all of its conditions on room facts hold
+"""
+
+import json
+import logging
+import operator
+import string
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .object_index import ObjectIndex
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = ("placement_guidance", "improvement_suggestions", "layout_recommendations", "safety_considerations")
+
+# Room type of rules that apply to rooms without rules of their own in a section
+DEFAULT_ROOM = "default"
+
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "in": lambda value, options: value in options,
+    "not_in": lambda value, options: value not in options
+}
+
+# Operators that work element-wise on distance matrices
+COMPARISON_OPERATORS = {OPERATORS[name] for name in ("eq", "ne", "gt", "gte", "lt", "lte")}
+
+# Operators that make sense on zone membership
+ZONE_OPERATORS = {OPERATORS[name] for name in ("eq", "ne", "in", "not_in")}
+
+# Attributes objects can be looked up by, most selective first
+INDEXED_ATTRIBUTES = ("zone", "class_name", "furniture_category", "size_category")
+
+_MISSING = object()
+
+class RuleError(ValueError):
+    """Raised when a rule file does not compile"""
+
+class RuleContext:
+    """Per-request view of the objects, zones and room facts shared by all rules"""
+
+    def __init__(self, index: ObjectIndex, zones: Dict[str, Any], room_type: str,
+                 fact_providers: Dict[str, Callable[["RuleContext"], Any]]):
+        """
+        Initialize rule context
+
+        Args:
+            index: ObjectIndex of the detected objects
+            zones: 'spatial_zones' of a SpatialAnalyzer result
+            room_type: Type of room being analyzed
+            fact_providers: Room fact name -> function computing it from this context
+        """
+        self.index = index
+        self.zones = zones
+        self.room_type = room_type
+        self.zone_members = {
+            name: set(data['objects']) for name, data in zones.items()
+            if isinstance(data, dict) and 'objects' in data
+        }
+        self._fact_providers = fact_providers
+        self._facts: Dict[str, Any] = {}
+        self._matches: Dict[str, List[Dict[str, Any]]] = {}
+
+    def fact(self, name: str) -> Any:
+        """Room fact, computed on first use"""
+        if name not in self._facts:
+            self._facts[name] = self._fact_providers[name](self)
+        return self._facts[name]
+
+    def matches(self, matcher: "ObjectMatcher") -> List[Dict[str, Any]]:
+        """Objects matching a matcher; rules with identical conditions share the result"""
+        if matcher.signature not in self._matches:
+            candidates = self.candidates(matcher.key)
+            if matcher.checks:
+                candidates = [obj for obj in candidates if all(check(obj, self) for check in matcher.checks)]
+            self._matches[matcher.signature] = candidates
+        return self._matches[matcher.signature]
+
+    def candidates(self, key: Optional[Tuple[str, Tuple[Any, ...]]]) -> List[Dict[str, Any]]:
+        """Objects with one of the given values of an indexed attribute, in detection order"""
+        if key is None:
+            return self.index.objects
+        attribute, values = key
+        if attribute == "zone":
+            ids = set()
+            for zone in values:
+                ids |= self.zone_members.get(zone, set())
+            return self.index.resolve(ids)
+        groups = self.index.group(attribute)
+        if len(values) == 1:
+            positions = groups.get(values[0], ())
+        else:
+            positions = sorted(p for value in set(values) for p in groups.get(value, ()))
+        return [self.index.objects[p] for p in positions]
+
+class ObjectMatcher:
+    """Compiled conditions on object attributes, with the index key used to find candidates"""
+
+    def __init__(self, rule_id: str, conditions: Dict[str, Any]):
+        if not isinstance(conditions, dict):
+            raise RuleError(f"Rule '{rule_id}': object conditions must be an object")
+        self.signature = json.dumps(conditions, sort_keys=True)
+        self.key = None
+        self.checks: List[Callable[[Dict[str, Any], RuleContext], bool]] = []
+
+        for attribute in INDEXED_ATTRIBUTES:
+            if attribute in conditions:
+                values = _lookup_values(conditions[attribute])
+                if values is not None:
+                    self.key = (attribute, values)
+                    break
+
+        for attribute, test in conditions.items():
+            if self.key is not None and attribute == self.key[0]:
+                continue  # Guaranteed by the candidate lookup
+            tests = _compile_tests(rule_id, attribute, test)
+            if attribute == "zone":
+                if any(op not in ZONE_OPERATORS for op, _ in tests):
+                    raise RuleError(f"Rule '{rule_id}': zone conditions support eq, ne, in and not_in")
+                self.checks.extend(_zone_check(op, operand) for op, operand in tests)
+            else:
+                getter = _attribute_getter(attribute)
+                self.checks.extend(_attribute_check(getter, op, operand) for op, operand in tests)
+
+    def matches(self, ctx: RuleContext) -> List[Dict[str, Any]]:
+        return ctx.matches(self)
+
+class CompiledRule:
+    """A rule compiled from its JSON definition"""
+
+    def __init__(self, definition: Dict[str, Any], fact_names: Iterable[str]):
+        self.id = definition.get("id")
+        if not self.id:
+            raise RuleError(f"Rule without id: {definition}")
+        self.scope = definition.get("scope", "object")
+        self.description = definition.get("description", "")
+
+        room_types = definition.get("room_types")
+        if room_types is not None and not isinstance(room_types, list):
+            raise RuleError(f"Rule '{self.id}': room_types must be a list")
+        self.room_types = set(room_types) if room_types is not None else None
+
+        emit = definition.get("emit")
+        if not isinstance(emit, dict):
+            raise RuleError(f"Rule '{self.id}': emit must be an object")
+        # Constant fields are copied from a prebuilt dict; only templated fields render per match
+        self.emit_base = {}
+        self.emit_fields = []
+        for field, value in emit.items():
+            render = _compile_template(self.id, value)
+            self.emit_base[field] = value if render is None else None
+            if render is not None:
+                self.emit_fields.append((field, render))
+
+        if self.scope == "object":
+            self.matcher = ObjectMatcher(self.id, definition.get("match", {}))
+        elif self.scope == "pair":
+            self.first = ObjectMatcher(self.id, definition.get("first", {}))
+            self.second = ObjectMatcher(self.id, definition.get("second", {}))
+            self.distance_tests = _compile_tests(self.id, "distance", definition.get("distance", {}))
+            if any(op not in COMPARISON_OPERATORS for op, _ in self.distance_tests):
+                raise RuleError(f"Rule '{self.id}': distance conditions support comparison operators only")
+        elif self.scope == "room":
+            self.conditions = [
+                _compile_room_condition(self.id, condition, set(fact_names))
+                for condition in definition.get("when", [])
+            ]
+        else:
+            raise RuleError(f"Rule '{self.id}': unknown scope '{self.scope}'")
+
+    def applies_to(self, room_type: str) -> bool:
+        return self.room_types is None or room_type in self.room_types
+
+    def evaluate(self, ctx: RuleContext) -> List[Dict[str, Any]]:
+        """Output entries of this rule for one request"""
+        if self.scope == "object":
+            return [self._render(obj, ctx) for obj in self.matcher.matches(ctx)]
+
+        if self.scope == "pair":
+            firsts, seconds = self.first.matches(ctx), self.second.matches(ctx)
+            if not firsts or not seconds:
+                return []
+            rows = np.array([ctx.index.positions[obj['object_id']] for obj in firsts])
+            cols = np.array([ctx.index.positions[obj['object_id']] for obj in seconds])
+            
+            # Distance tests run on the (first, second) block of the distance matrix
+            keep = rows[:, None] != cols[None, :]
+            if self.distance_tests:
+                distances = ctx.index.distances()[np.ix_(rows, cols)]
+                for op, operand in self.distance_tests:
+                    keep &= op(distances, operand)
+            return [
+                self._render({"first": firsts[i], "second": seconds[j]}, ctx)
+                for i, j in zip(*(axis.tolist() for axis in np.nonzero(keep)))
+            ]
+
+        if all(condition(ctx) for condition in self.conditions):
+            return [self._render({"room_type": ctx.room_type}, ctx)]
+        return []
+
+    def _render(self, values: Dict[str, Any], ctx: RuleContext) -> Dict[str, Any]:
+        result = self.emit_base.copy()
+        for field, render in self.emit_fields:
+            result[field] = render(values, ctx)
+        return result
+
+class RuleSet:
+    """Compiled rules indexed by section and room type"""
+
+    def __init__(self, definition: Dict[str, Any], fact_names: Iterable[str]):
+        """
+        Compile a rule set
+
+        Args:
+            definition: Parsed rule file with a list of rules per section
+            fact_names: Room facts that room-scope rules may refer to
+        """
+        fact_names = list(fact_names)
+        self.version = str(definition.get("version", "1"))
+        self.sections: Dict[str, List[CompiledRule]] = {}
+
+        seen_ids = set()
+        for section in SECTIONS:
+            rules = [CompiledRule(rule, fact_names) for rule in definition.get(section, [])]
+            for rule in rules:
+                if rule.id in seen_ids:
+                    raise RuleError(f"Duplicate rule id '{rule.id}'")
+                seen_ids.add(rule.id)
+            self.sections[section] = rules
+
+        unknown = set(definition) - set(SECTIONS) - {"version", "description"}
+        if unknown:
+            raise RuleError(f"Unknown rule sections: {sorted(unknown)}")
+
+        # Rule lists per room type, precomputed so lookups never filter at request time
+        self._by_room: Dict[str, Dict[str, List[CompiledRule]]] = {}
+        self._default: Dict[str, List[CompiledRule]] = {}
+        for section, rules in self.sections.items():
+            room_types = set().union(*(rule.room_types or set() for rule in rules)) - {DEFAULT_ROOM}
+            self._by_room[section] = {
+                room_type: [rule for rule in rules if rule.applies_to(room_type)]
+                for room_type in room_types
+            }
+            self._default[section] = [rule for rule in rules if rule.applies_to(DEFAULT_ROOM)]
+
+    @classmethod
+    def from_file(cls, path: str, fact_names: Iterable[str]) -> "RuleSet":
+        with open(path, "r", encoding="utf-8") as f:
+            try:
+                definition = json.load(f)
+            except json.JSONDecodeError as e:
+                raise RuleError(f"Invalid rule file {path}: {e}") from e
+        return cls(definition, fact_names)
+
+    def __len__(self) -> int:
+        return sum(len(rules) for rules in self.sections.values())
+
+    def rules_for(self, section: str, room_type: str) -> List[CompiledRule]:
+        return self._by_room[section].get(room_type, self._default[section])
+
+    def count_for(self, room_type: str) -> int:
+        """Number of rules evaluated for a room type across all sections"""
+        return sum(len(self.rules_for(section, room_type)) for section in SECTIONS)
+
+    def evaluate(self, section: str, ctx: RuleContext) -> List[Dict[str, Any]]:
+        """Outputs of every rule of a section for the request's room type, in rule order"""
+        results = []
+        for rule in self.rules_for(section, ctx.room_type):
+            results.extend(rule.evaluate(ctx))
+        return results
+
+def _lookup_values(test: Any) -> Optional[Tuple[Any, ...]]:
+    # Plain equality or membership tests can be answered from the index
+    if isinstance(test, list):
+        return tuple(test)
+    if isinstance(test, dict):
+        if len(test) == 1 and "eq" in test:
+            return (test["eq"],)
+        if len(test) == 1 and "in" in test and isinstance(test["in"], list):
+            return tuple(test["in"])
+        return None
+    return (test,)
+
+def _compile_tests(rule_id: str, attribute: str, test: Any) -> List[Tuple[Callable[[Any, Any], bool], Any]]:
+    # Scalar -> eq, list -> in, object -> one or more operators (all must hold)
+    if isinstance(test, list):
+        return [(OPERATORS["in"], set(test))]
+    if not isinstance(test, dict):
+        return [(OPERATORS["eq"], test)]
+
+    tests = []
+    for name, operand in test.items():
+        if name not in OPERATORS:
+            raise RuleError(f"Rule '{rule_id}': unknown operator '{name}' on '{attribute}'")
+        if name in ("in", "not_in"):
+            if not isinstance(operand, list):
+                raise RuleError(f"Rule '{rule_id}': '{name}' on '{attribute}' needs a list")
+            operand = set(operand)
+        tests.append((OPERATORS[name], operand))
+    return tests
+
+def _attribute_getter(attribute: str) -> Callable[[Dict[str, Any]], Any]:
+    path = attribute.split(".")
+
+    def get(obj: Dict[str, Any]) -> Any:
+        value = obj
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                return _MISSING
+            value = value[key]
+        return value
+    return get
+
+def _attribute_check(getter, op, operand):
+    def check(obj: Dict[str, Any], ctx: RuleContext) -> bool:
+        value = getter(obj)
+        return value is not _MISSING and op(value, operand)
+    return check
+
+def _zone_check(op, operand):
+    # Zone tests compare against the names of the zones an object belongs to
+    zones = operand if isinstance(operand, set) else {operand}
+    negate = op in (OPERATORS["ne"], OPERATORS["not_in"])
+
+    def check(obj: Dict[str, Any], ctx: RuleContext) -> bool:
+        member = any(obj['object_id'] in ctx.zone_members.get(zone, ()) for zone in zones)
+        return not member if negate else member
+    return check
+
+def _compile_room_condition(rule_id: str, condition: Dict[str, Any], fact_names) -> Callable[[RuleContext], bool]:
+    if not isinstance(condition, dict):
+        raise RuleError(f"Rule '{rule_id}': room conditions must be objects")
+    condition = dict(condition)
+
+    if "fact" in condition:
+        name = condition.pop("fact")
+        if name not in fact_names:
+            raise RuleError(f"Rule '{rule_id}': unknown fact '{name}'")
+        value = lambda ctx: ctx.fact(name)
+    elif "count" in condition:
+        matcher = ObjectMatcher(rule_id, condition.pop("count"))
+        value = lambda ctx: len(matcher.matches(ctx))
+    else:
+        raise RuleError(f"Rule '{rule_id}': room conditions need 'fact' or 'count'")
+
+    tests = _compile_tests(rule_id, "condition", condition)
+    if not tests:
+        raise RuleError(f"Rule '{rule_id}': room condition without an operator")
+    return lambda ctx: all(op(value(ctx), operand) for op, operand in tests)
+
+def _compile_template(rule_id: str, value: Any) -> Optional[Callable[[Dict[str, Any], RuleContext], Any]]:
+    # Strings with {placeholders} are formatted against the matched object(s);
+    # {"$class_names": conditions} lists the classes of the matching objects.
+    # Returns None for constants.
+    if isinstance(value, str):
+        if not any(field for _, field, _, _ in string.Formatter().parse(value)):
+            return None
+        return lambda values, ctx: value.format_map(values)
+    if isinstance(value, dict) and "$class_names" in value:
+        matcher = ObjectMatcher(rule_id, value["$class_names"])
+        return lambda values, ctx: [obj['class_name'] for obj in matcher.matches(ctx)]
+    if isinstance(value, list):
+        # Lists get a fresh copy per output entry
+        return lambda values, ctx: list(value)
+    return None
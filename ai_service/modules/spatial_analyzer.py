@@ -8,25 +8,12 @@ focusing on relative positioning and zone-based analysis.
 
 import cv2
 import numpy as np
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any
 import logging
 
-logger = logging.getLogger(__name__)
+from .object_index import ObjectIndex
 
-def convert_numpy_types(obj):
-    """Convert NumPy types to native Python types for JSON serialization"""
-    if isinstance(obj, np.integer):
-        return int(obj)
-    elif isinstance(obj, np.floating):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, dict):
-        return {key: convert_numpy_types(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_numpy_types(item) for item in obj]
-    else:
-        return obj
+logger = logging.getLogger(__name__)
 
 class SpatialAnalyzer:
     """Analyzes spatial relationships and zones in room images"""
@@ -43,26 +30,51 @@ class SpatialAnalyzer:
             image_path: Path to the room image
             detected_objects: Output from ObjectDetector
             
+        Returns:
+            Dictionary containing spatial analysis results
+        """
+        return self.analyze_spatial_zones_in_image(cv2.imread(image_path), detected_objects, source=image_path)
+    
+    def analyze_spatial_zones_in_image(self, image: np.ndarray, detected_objects: Dict[str, Any],
+                                       source: str = "uploaded image",
+                                       image_dimensions: Dict[str, int] = None,
+                                       object_index: ObjectIndex = None) -> Dict[str, Any]:
+        """
+        Analyze spatial zones for an already decoded room image
+        
+        Only the image dimensions are used, so the pixels are never copied or re-read.
+        
+        Args:
+            image: Decoded BGR image (e.g. ImageContext.image)
+            detected_objects: Output from ObjectDetector
+            source: Origin of the image, used in error messages
+            image_dimensions: Dimensions to report instead of the image shape,
+                              e.g. the upload size when analyzing a downscaled copy
+            object_index: ObjectIndex of detected_objects to reuse (e.g. shared with
+                          EnhancedRuleEngine); built here when omitted
+            
         Returns:
             Dictionary containing spatial analysis results
         """
         try:
-            # Load image for spatial context
-            image = cv2.imread(image_path)
+            # Image dimensions provide the spatial context
             if image is None:
-                raise ValueError(f"Could not load image from {image_path}")
+                raise ValueError(f"Could not load image from {source}")
             
             height, width = image.shape[:2]
-            objects = detected_objects.get('objects', [])
+            if image_dimensions:
+                width, height = image_dimensions['width'], image_dimensions['height']
+            index = ObjectIndex.for_result(detected_objects, object_index)
+            objects = index.objects
             
             # Analyze spatial zones
-            spatial_zones = self._analyze_zones(objects, width, height)
+            spatial_zones = self._analyze_zones(objects, width, height, index)
             
             # Analyze object relationships
-            object_relationships = self._analyze_relationships(objects)
+            object_relationships = self._analyze_relationships(index)
             
             # Detect potential spatial issues
-            spatial_issues = self._detect_spatial_issues(objects, spatial_zones)
+            spatial_issues = self._detect_spatial_issues(index, spatial_zones)
             
             # Generate spatial insights
             spatial_insights = self._generate_spatial_insights(objects, spatial_zones, object_relationships)
@@ -79,8 +91,7 @@ class SpatialAnalyzer:
                 }
             }
             
-            # Convert all NumPy types to native Python types
-            return convert_numpy_types(result)
+            return result
             
         except Exception as e:
             logger.error(f"Spatial analysis failed: {e}")
@@ -93,9 +104,10 @@ class SpatialAnalyzer:
                     "error": str(e)
                 }
             }
-            return convert_numpy_types(result)
+            return result
     
-    def _analyze_zones(self, objects: List[Dict[str, Any]], width: int, height: int) -> Dict[str, Any]:
+    def _analyze_zones(self, objects: List[Dict[str, Any]], width: int, height: int,
+                       index: ObjectIndex) -> Dict[str, Any]:
         """Analyze objects by spatial zones"""
         
         # Define zone boundaries (relative coordinates)
@@ -154,22 +166,21 @@ class SpatialAnalyzer:
             if isinstance(zone_data, dict) and 'objects' in zone_data:
                 zone_stats[zone_name] = {
                     "object_count": len(zone_data['objects']),
-                    "density": self._calculate_zone_density(zone_name, zone_data['objects'], objects)
+                    "density": self._calculate_zone_density(zone_name, zone_data['objects'], index)
                 }
         
         zones["zone_statistics"] = zone_stats
         
         return zones
     
-    def _calculate_zone_density(self, zone_name: str, object_ids: List[str], all_objects: List[Dict[str, Any]]) -> str:
+    def _calculate_zone_density(self, zone_name: str, object_ids: List[str], index: ObjectIndex) -> str:
         """Calculate zone density category"""
         object_count = len(object_ids)
         
         # Calculate total area of objects in zone
         total_area = 0
-        for obj in all_objects:
-            if obj['object_id'] in object_ids:
-                total_area += obj['relative_size']['area_ratio']
+        for obj in index.resolve(object_ids):
+            total_area += obj['relative_size']['area_ratio']
         
         if total_area > 0.3:
             return "high"
@@ -178,63 +189,46 @@ class SpatialAnalyzer:
         else:
             return "low"
     
-    def _analyze_relationships(self, objects: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _analyze_relationships(self, index: ObjectIndex) -> List[Dict[str, Any]]:
         """Analyze spatial relationships between objects"""
-        relationships = []
-        
-        for i, obj1 in enumerate(objects):
-            for j, obj2 in enumerate(objects[i+1:], i+1):
-                relationship = self._calculate_relationship(obj1, obj2)
-                if relationship:
-                    relationships.append(relationship)
-        
-        return relationships
-    
-    def _calculate_relationship(self, obj1: Dict[str, Any], obj2: Dict[str, Any]) -> Dict[str, Any]:
-        """Calculate relationship between two objects"""
-        x1, y1 = obj1['relative_position']['center_x'], obj1['relative_position']['center_y']
-        x2, y2 = obj2['relative_position']['center_x'], obj2['relative_position']['center_y']
-        
-        # Calculate distance
-        distance = np.sqrt((x2 - x1)**2 + (y2 - y1)**2)
-        
         # Only analyze close relationships
-        if distance > 0.5:
-            return None
+        rows, cols = index.pairs_within(0.5)
+        if len(rows) == 0:
+            return []
         
-        # Determine relative position
-        dx = x2 - x1
-        dy = y2 - y1
+        dx, dy = index.offsets()
+        dx, dy = dx[rows, cols], dy[rows, cols]
+        distances = index.distances()[rows, cols]
         
-        if abs(dx) > abs(dy):
-            if dx > 0:
-                relative_pos = "right_of"
-            else:
-                relative_pos = "left_of"
-        else:
-            if dy > 0:
-                relative_pos = "below"
-            else:
-                relative_pos = "above"
+        # Determine relative position
+        relative_positions = np.where(
+            np.abs(dx) > np.abs(dy),
+            np.where(dx > 0, "right_of", "left_of"),
+            np.where(dy > 0, "below", "above")
+        )
         
         # Categorize distance
-        if distance < 0.2:
-            distance_category = "very_close"
-        elif distance < 0.35:
-            distance_category = "close"
-        else:
-            distance_category = "moderate"
+        distance_categories = np.select(
+            [distances < 0.2, distances < 0.35], ["very_close", "close"], default="moderate"
+        )
         
-        return {
-            "object1": obj1['object_id'],
-            "object2": obj2['object_id'],
-            "object1_class": obj1['class_name'],
-            "object2_class": obj2['class_name'],
-            "relationship": relative_pos,
-            "distance": round(distance, 3),
-            "distance_category": distance_category,
-            "potential_interaction": self._assess_interaction_potential(obj1, obj2, distance)
-        }
+        relationships = []
+        for i, j, relative_pos, distance, rounded_distance, distance_category in zip(
+                rows.tolist(), cols.tolist(), relative_positions.tolist(), distances.tolist(),
+                np.round(distances, 3).tolist(), distance_categories.tolist()):
+            obj1, obj2 = index.objects[i], index.objects[j]
+            relationships.append({
+                "object1": obj1['object_id'],
+                "object2": obj2['object_id'],
+                "object1_class": obj1['class_name'],
+                "object2_class": obj2['class_name'],
+                "relationship": relative_pos,
+                "distance": rounded_distance,
+                "distance_category": distance_category,
+                "potential_interaction": self._assess_interaction_potential(obj1, obj2, distance)
+            })
+        
+        return relationships
     
     def _assess_interaction_potential(self, obj1: Dict[str, Any], obj2: Dict[str, Any], distance: float) -> str:
         """Assess if objects might interact functionally"""
@@ -258,14 +252,14 @@ class SpatialAnalyzer:
         else:
             return 'independent'
     
-    def _detect_spatial_issues(self, objects: List[Dict[str, Any]], spatial_zones: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _detect_spatial_issues(self, index: ObjectIndex, spatial_zones: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Detect potential spatial arrangement issues"""
         issues = []
         
         # Issue 1: Center blocking
         center_blocking_objects = spatial_zones.get('center_blocking', {}).get('objects', [])
         if center_blocking_objects:
-            blocking_objects = [obj for obj in objects if obj['object_id'] in center_blocking_objects]
+            blocking_objects = index.resolve(center_blocking_objects)
             issues.append({
                 "issue_type": "center_blocking",
                 "severity": "medium",
@@ -277,9 +271,8 @@ class SpatialAnalyzer:
         # Issue 2: Potential window blocking
         near_window_objects = spatial_zones.get('near_window', {}).get('objects', [])
         if near_window_objects:
-            window_blocking = [obj for obj in objects 
-                             if obj['object_id'] in near_window_objects and 
-                             obj['size_category'] == 'large']
+            window_blocking = [obj for obj in index.resolve(near_window_objects)
+                             if obj['size_category'] == 'large']
             if window_blocking:
                 issues.append({
                     "issue_type": "potential_window_blocking",
@@ -312,7 +305,7 @@ class SpatialAnalyzer:
         insights = []
         
         # Insight 1: Wall alignment opportunities
-        wall_aligned = spatial_zones.get('wall_aligned', {}).get('objects', [])
+        wall_aligned = set(spatial_zones.get('wall_aligned', {}).get('objects', []))
         non_wall_large_objects = [obj for obj in objects 
                                 if obj['object_id'] not in wall_aligned and 
                                 obj['size_category'] == 'large' and
@@ -29,6 +29,52 @@ def convert_numpy_types(obj):
     else:
         return obj
 
+class FeatureIntermediates:
+    """
+    Per-image intermediate arrays shared by the feature analyzers
+    
+    Each array is computed on first use and reused afterwards, so the gradient
+    field, Laplacian and color-space conversions are produced once per image.
+    Derived arrays are float32; statistics over them accumulate in float64.
+    """
+    
+    def __init__(self, image: np.ndarray):
+        self.image = image
+        self._cache = {}
+    
+    def _get(self, name: str, compute):
+        if name not in self._cache:
+            self._cache[name] = compute()
+        return self._cache[name]
+    
+    @property
+    def gray(self) -> np.ndarray:
+        return self._get("gray", lambda: cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY))
+    
+    @property
+    def gray_f32(self) -> np.ndarray:
+        return self._get("gray_f32", lambda: self.gray.astype(np.float32))
+    
+    @property
+    def hsv(self) -> np.ndarray:
+        return self._get("hsv", lambda: cv2.cvtColor(self.image, cv2.COLOR_BGR2HSV))
+    
+    @property
+    def lab(self) -> np.ndarray:
+        return self._get("lab", lambda: cv2.cvtColor(self.image, cv2.COLOR_BGR2LAB))
+    
+    @property
+    def gradient_magnitude(self) -> np.ndarray:
+        def compute():
+            grad_x = cv2.Sobel(self.gray, cv2.CV_32F, 1, 0, ksize=3)
+            grad_y = cv2.Sobel(self.gray, cv2.CV_32F, 0, 1, ksize=3)
+            return cv2.magnitude(grad_x, grad_y)
+        return self._get("gradient_magnitude", compute)
+    
+    @property
+    def laplacian(self) -> np.ndarray:
+        return self._get("laplacian", lambda: cv2.Laplacian(self.gray, cv2.CV_32F))
+
 class VisualProcessor:
     """Enhanced visual processing using OpenCV"""
     
@@ -44,6 +90,21 @@ class VisualProcessor:
             image_path: Path to the room image
             existing_features: Visual features from PHP system
             
+        Returns:
+            Enhanced visual features combining PHP and CV analysis
+        """
+        return self.enhance_visual_analysis_in_image(cv2.imread(image_path), existing_features, source=image_path)
+    
+    def enhance_visual_analysis_in_image(self, image: np.ndarray, existing_features: Dict[str, Any],
+                                         source: str = "uploaded image") -> Dict[str, Any]:
+        """
+        Enhance existing visual features using an already decoded room image
+        
+        Args:
+            image: Decoded BGR image (e.g. ImageContext.image)
+            existing_features: Visual features from PHP system
+            source: Origin of the image, used in error messages
+            
         Returns:
             Enhanced visual features combining PHP and CV analysis
         """
@@ -53,10 +114,9 @@ class VisualProcessor:
                 logger.warning(f"existing_features is not a dict, got {type(existing_features)}: {existing_features}")
                 existing_features = {}
             
-            # Load image
-            image = cv2.imread(image_path)
+            # Validate image
             if image is None:
-                raise ValueError(f"Could not load image from {image_path}")
+                raise ValueError(f"Could not load image from {source}")
             
             # Extract CV-based features
             cv_features = self._extract_cv_features(image)
@@ -91,39 +151,37 @@ class VisualProcessor:
     def _extract_cv_features(self, image: np.ndarray) -> Dict[str, Any]:
         """Extract visual features using OpenCV"""
         
-        # Convert to different color spaces for analysis
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-        lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
+        # Color spaces, gradients and the Laplacian are computed once and shared
+        intermediates = FeatureIntermediates(image)
         
         features = {}
         
         # Enhanced brightness analysis
-        features['brightness_analysis'] = self._analyze_brightness_cv(gray, lab)
+        features['brightness_analysis'] = self._analyze_brightness_cv(intermediates)
         
         # Enhanced contrast analysis
-        features['contrast_analysis'] = self._analyze_contrast_cv(gray)
+        features['contrast_analysis'] = self._analyze_contrast_cv(intermediates)
         
         # Enhanced color analysis
-        features['color_analysis'] = self._analyze_colors_cv(image, hsv)
+        features['color_analysis'] = self._analyze_colors_cv(intermediates)
         
         # Texture analysis
-        features['texture_analysis'] = self._analyze_texture(gray)
+        features['texture_analysis'] = self._analyze_texture(intermediates)
         
         # Edge density (indicates detail level)
-        features['edge_analysis'] = self._analyze_edges(gray)
+        features['edge_analysis'] = self._analyze_edges(intermediates)
         
         return features
     
-    def _analyze_brightness_cv(self, gray: np.ndarray, lab: np.ndarray) -> Dict[str, Any]:
+    def _analyze_brightness_cv(self, intermediates: FeatureIntermediates) -> Dict[str, Any]:
         """Enhanced brightness analysis using multiple methods"""
+        gray = intermediates.gray
         
         # Method 1: Mean brightness
         mean_brightness = np.mean(gray)
         
         # Method 2: L channel from LAB color space (perceptually uniform)
-        l_channel = lab[:, :, 0]
-        perceptual_brightness = np.mean(l_channel)
+        perceptual_brightness = cv2.mean(intermediates.lab)[0]
         
         # Method 3: Histogram analysis
         hist = cv2.calcHist([gray], [0], None, [256], [0, 256])
@@ -150,24 +208,22 @@ class VisualProcessor:
             "lighting_quality": self._assess_lighting_quality(dark_pixels, mid_pixels, bright_pixels)
         }
     
-    def _analyze_contrast_cv(self, gray: np.ndarray) -> Dict[str, Any]:
+    def _analyze_contrast_cv(self, intermediates: FeatureIntermediates) -> Dict[str, Any]:
         """Enhanced contrast analysis"""
+        gray = intermediates.gray
         
         # Method 1: Standard deviation (global contrast)
-        std_contrast = np.std(gray)
+        std_contrast = cv2.meanStdDev(gray)[1][0][0]
         
-        # Method 2: RMS contrast
-        mean_val = np.mean(gray)
-        rms_contrast = np.sqrt(np.mean((gray - mean_val) ** 2))
+        # Method 2: RMS contrast (the root mean squared deviation, i.e. the standard deviation)
+        rms_contrast = std_contrast
         
         # Method 3: Michelson contrast (for periodic patterns)
-        max_val = np.max(gray)
-        min_val = np.min(gray)
+        min_val, max_val = cv2.minMaxLoc(gray)[:2]
         michelson_contrast = (max_val - min_val) / (max_val + min_val) if (max_val + min_val) > 0 else 0
         
         # Method 4: Local contrast using Laplacian
-        laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-        local_contrast = np.var(laplacian)
+        local_contrast = cv2.meanStdDev(intermediates.laplacian)[1][0][0] ** 2
         
         return {
             "std_contrast": round(float(std_contrast), 2),
@@ -178,23 +234,20 @@ class VisualProcessor:
             "contrast_quality": self._assess_contrast_quality(std_contrast, local_contrast)
         }
     
-    def _analyze_colors_cv(self, image: np.ndarray, hsv: np.ndarray) -> Dict[str, Any]:
+    def _analyze_colors_cv(self, intermediates: FeatureIntermediates) -> Dict[str, Any]:
         """Enhanced color analysis using HSV color space"""
-        
-        # Extract HSV channels
-        h_channel = hsv[:, :, 0]
-        s_channel = hsv[:, :, 1]
-        v_channel = hsv[:, :, 2]
+        hsv = intermediates.hsv
         
         # Color temperature analysis
-        color_temp_analysis = self._analyze_color_temperature_cv(image)
+        color_temp_analysis = self._analyze_color_temperature_cv(intermediates.image)
         
-        # Saturation analysis
-        mean_saturation = np.mean(s_channel)
-        saturation_std = np.std(s_channel)
+        # Saturation analysis (per-channel statistics without copying the channel out)
+        hsv_mean, hsv_std = cv2.meanStdDev(hsv)
+        mean_saturation = hsv_mean[1][0]
+        saturation_std = hsv_std[1][0]
         
         # Hue distribution
-        hue_hist = cv2.calcHist([h_channel], [0], None, [180], [0, 180])
+        hue_hist = cv2.calcHist([hsv], [0], None, [180], [0, 180])
         dominant_hues = self._find_dominant_hues(hue_hist)
         
         # Color harmony analysis
@@ -218,9 +271,7 @@ class VisualProcessor:
         """Analyze color temperature using RGB channel analysis"""
         
         # Calculate mean RGB values
-        b_mean = np.mean(image[:, :, 0])  # Blue
-        g_mean = np.mean(image[:, :, 1])  # Green
-        r_mean = np.mean(image[:, :, 2])  # Red
+        b_mean, g_mean, r_mean = cv2.mean(image)[:3]  # BGR channel order
         
         # Color temperature indicators
         warm_indicator = (r_mean + g_mean) / 2 - b_mean
@@ -249,24 +300,23 @@ class VisualProcessor:
             "cool_indicator": round(float(cool_indicator), 2)
         }
     
-    def _analyze_texture(self, gray: np.ndarray) -> Dict[str, Any]:
+    def _analyze_texture(self, intermediates: FeatureIntermediates) -> Dict[str, Any]:
         """Analyze image texture using various methods"""
         
         # Method 1: Local Binary Pattern approximation
-        # Calculate gradient magnitude
-        grad_x = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
-        grad_y = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
-        gradient_magnitude = np.sqrt(grad_x**2 + grad_y**2)
-        
-        texture_strength = np.mean(gradient_magnitude)
-        texture_std = np.std(gradient_magnitude)
+        # Gradient magnitude statistics
+        gradient_mean, gradient_std = cv2.meanStdDev(intermediates.gradient_magnitude)
+        texture_strength = gradient_mean[0][0]
+        texture_std = gradient_std[0][0]
         
         # Method 2: Gray Level Co-occurrence Matrix approximation
         # Calculate local variance as texture measure
+        gray_f32 = intermediates.gray_f32
         kernel = np.ones((5, 5), np.float32) / 25
-        local_mean = cv2.filter2D(gray.astype(np.float32), -1, kernel)
-        local_variance = cv2.filter2D((gray.astype(np.float32) - local_mean)**2, -1, kernel)
-        texture_variance = np.mean(local_variance)
+        local_mean = cv2.filter2D(gray_f32, -1, kernel)
+        deviation = cv2.subtract(gray_f32, local_mean)
+        local_variance = cv2.filter2D(cv2.multiply(deviation, deviation), -1, kernel)
+        texture_variance = cv2.mean(local_variance)[0]
         
         return {
             "texture_strength": round(float(texture_strength), 2),
@@ -276,19 +326,15 @@ class VisualProcessor:
             "surface_character": self._assess_surface_character(texture_strength, texture_variance)
         }
     
-    def _analyze_edges(self, gray: np.ndarray) -> Dict[str, Any]:
+    def _analyze_edges(self, intermediates: FeatureIntermediates) -> Dict[str, Any]:
         """Analyze edge density and characteristics"""
         
         # Canny edge detection
-        edges = cv2.Canny(gray, 50, 150)
-        edge_density = np.sum(edges > 0) / edges.size
-        
-        # Sobel edge detection for gradient analysis
-        sobel_x = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
-        sobel_y = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
-        sobel_magnitude = np.sqrt(sobel_x**2 + sobel_y**2)
+        edges = cv2.Canny(intermediates.gray, 50, 150)
+        edge_density = cv2.countNonZero(edges) / edges.size
         
-        edge_strength = np.mean(sobel_magnitude)
+        # Sobel gradient magnitude, shared with the texture analysis
+        edge_strength = cv2.mean(intermediates.gradient_magnitude)[0]
         
         return {
             "edge_density": round(float(edge_density), 4),
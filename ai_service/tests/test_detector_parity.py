@@ -0,0 +1,87 @@
+"""
+Unit tests for the detector parity comparison (no model files needed)
+"""
+
+import os
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detector_parity_test import SAMPLE_IMAGES_DIR, box_iou, compare_detections
+
+def detection(class_name, x1, y1, x2, y2, confidence=0.8, size_category="medium"):
+    return {
+        "class_name": class_name,
+        "confidence": confidence,
+        "size_category": size_category,
+        "bounding_box": {"x1": x1, "y1": y1, "x2": x2, "y2": y2}
+    }
+
+def result(*objects):
+    return {"objects": list(objects)}
+
+class BoxIouTest(unittest.TestCase):
+
+    def test_identical_boxes(self):
+        box = {"x1": 10, "y1": 10, "x2": 50, "y2": 30}
+        self.assertAlmostEqual(box_iou(box, box), 1.0)
+
+    def test_disjoint_boxes(self):
+        self.assertEqual(box_iou({"x1": 0, "y1": 0, "x2": 10, "y2": 10},
+                                 {"x1": 20, "y1": 20, "x2": 30, "y2": 30}), 0.0)
+
+    def test_partial_overlap(self):
+        # 10x10 boxes overlapping in a 5x10 strip: 50 / (100 + 100 - 50)
+        self.assertAlmostEqual(box_iou({"x1": 0, "y1": 0, "x2": 10, "y2": 10},
+                                       {"x1": 5, "y1": 0, "x2": 15, "y2": 10}), 1 / 3)
+
+    def test_degenerate_boxes(self):
+        empty = {"x1": 5, "y1": 5, "x2": 5, "y2": 5}
+        self.assertEqual(box_iou(empty, empty), 0.0)
+
+class CompareDetectionsTest(unittest.TestCase):
+
+    def test_matching_results_have_no_problems(self):
+        reference = result(detection("bed", 100, 200, 400, 420), detection("chair", 10, 10, 60, 90))
+        # Order differs and boxes are off by a pixel
+        candidate = result(detection("chair", 10, 11, 60, 90, confidence=0.82),
+                           detection("bed", 101, 200, 400, 421, confidence=0.79))
+        self.assertEqual(compare_detections(reference, candidate), [])
+
+    def test_missing_and_extra_objects(self):
+        reference = result(detection("bed", 100, 200, 400, 420))
+        candidate = result(detection("couch", 100, 200, 400, 420))
+        problems = compare_detections(reference, candidate)
+        self.assertEqual(len(problems), 2)
+        self.assertTrue(problems[0].startswith("missing bed"))
+        self.assertTrue(problems[1].startswith("extra couch"))
+
+    def test_shifted_box_is_not_a_match(self):
+        reference = result(detection("tv", 0, 0, 100, 100))
+        candidate = result(detection("tv", 20, 0, 120, 100))
+        problems = compare_detections(reference, candidate)
+        self.assertEqual([p.split()[0] for p in problems], ["missing", "extra"])
+
+    def test_confidence_and_size_differences(self):
+        reference = result(detection("bed", 0, 0, 100, 100, confidence=0.9, size_category="large"))
+        candidate = result(detection("bed", 0, 0, 100, 100, confidence=0.7, size_category="medium"))
+        problems = compare_detections(reference, candidate)
+        self.assertEqual(len(problems), 2)
+        self.assertIn("confidence", problems[0])
+        self.assertIn("size", problems[1])
+
+    def test_each_candidate_matches_only_once(self):
+        reference = result(detection("chair", 0, 0, 50, 50), detection("chair", 0, 0, 50, 50))
+        candidate = result(detection("chair", 0, 0, 50, 50))
+        problems = compare_detections(reference, candidate)
+        self.assertEqual(len(problems), 1)
+        self.assertTrue(problems[0].startswith("missing chair"))
+
+    def test_sample_images_are_present(self):
+        images = sorted(Path(SAMPLE_IMAGES_DIR).glob("*.jpg"))
+        self.assertGreaterEqual(len(images), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+"""
+GeminiClient tests against a local stub server
+
+The stub speaks just enough of generateContent to script responses per
+request: each test queues (status, headers, body) tuples and points the
+client's base_url at the stub.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import unittest
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.gemini_client import GeminiClient
+
+def gemini_body(text: str) -> bytes:
+    return json.dumps({
+        "candidates": [{"content": {"parts": [{"text": text}]}}],
+        "usageMetadata": {"promptTokenCount": 3, "candidatesTokenCount": 5}
+    }).encode()
+
+OK = (200, {}, gemini_body("A bright room"))
+
+class StubGemini:
+    """Threaded HTTP server answering POSTs from a scripted response queue"""
+
+    def __init__(self):
+        self.responses = []
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stub.requests += 1
+                status, headers, body = stub.responses.pop(0) if stub.responses else OK
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1beta"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class GeminiClientStubServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = StubGemini()
+
+    def tearDown(self):
+        self.stub.close()
+
+    def client(self, **kwargs) -> GeminiClient:
+        options = dict(api_key="test", base_url=self.stub.base_url, timeout=5,
+                       max_retries=2, backoff_base=0.01, backoff_max=1.0)
+        options.update(kwargs)
+        client = GeminiClient(**options)
+        self.addCleanup(client.close)
+        return client
+
+    def generate(self, client: GeminiClient):
+        return client.generate_content("Describe the room", {}, [])
+
+    def generate_async(self, client: GeminiClient):
+        async def run():
+            try:
+                return await client.generate_content_async("Describe the room", {}, [])
+            finally:
+                await client.aclose()
+        return asyncio.run(run())
+
+    def test_success(self):
+        result = self.generate(self.client())
+        self.assertTrue(result["success"])
+        self.assertEqual(result["description"], "A bright room")
+        self.assertEqual(result["output_tokens"], 5)
+
+    def test_429_waits_for_retry_after(self):
+        self.stub.responses = [(429, {"Retry-After": "0.3"}, b"slow down"), OK]
+        started = time.monotonic()
+        result = self.generate(self.client())
+        self.assertTrue(result["success"])
+        self.assertEqual(self.stub.requests, 2)
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)
+
+    def test_429_retry_after_beyond_backoff_limit_is_not_retried(self):
+        self.stub.responses = [(429, {"Retry-After": "120"}, b"quota exhausted")]
+        started = time.monotonic()
+        result = self.generate(self.client())
+        self.assertFalse(result["success"])
+        self.assertIn("429", result["error"])
+        self.assertEqual(self.stub.requests, 1)
+        self.assertLess(time.monotonic() - started, 1.0)
+
+    def test_5xx_then_success(self):
+        self.stub.responses = [(503, {}, b"unavailable"), (500, {}, b"boom"), OK]
+        client = self.client()
+        result = self.generate(client)
+        self.assertTrue(result["success"])
+        self.assertEqual(self.stub.requests, 3)
+        self.assertEqual(client.retries, 2)
+        self.assertEqual(client.breaker.state, "closed")
+
+    def test_5xx_then_success_async(self):
+        self.stub.responses = [(502, {}, b"bad gateway"), OK]
+        result = self.generate_async(self.client())
+        self.assertTrue(result["success"])
+        self.assertEqual(self.stub.requests, 2)
+
+    def test_malformed_200_bodies_fail_without_raising(self):
+        malformed = [
+            (200, {}, b"<html>proxy error</html>"),
+            (200, {}, json.dumps({"candidates": [{"content": {"parts": []}}]}).encode()),
+            (200, {}, json.dumps(["not", "an", "object"]).encode())
+        ]
+        for response in malformed:
+            with self.subTest(body=response[2][:30]):
+                self.stub.responses = [response]
+                result = self.generate(self.client(max_retries=0))
+                self.assertFalse(result["success"])
+                self.assertNotIn("retryable", result)
+
+    def test_malformed_200_async(self):
+        self.stub.responses = [(200, {}, b"not json")]
+        result = self.generate_async(self.client(max_retries=0))
+        self.assertFalse(result["success"])
+
+    def test_breaker_opens_and_recovers_through_half_open(self):
+        client = self.client(max_retries=0, failure_threshold=2, reset_timeout=0.2)
+        self.stub.responses = [(500, {}, b"down"), (500, {}, b"down")]
+        self.generate(client)
+        self.generate(client)
+        self.assertEqual(client.breaker.state, "open")
+
+        # Open: calls are short-circuited without reaching the server
+        result = self.generate(client)
+        self.assertTrue(result.get("circuit_open"))
+        self.assertEqual(self.stub.requests, 2)
+
+        # Half-open trial fails -> open again
+        time.sleep(0.25)
+        self.stub.responses = [(503, {}, b"still down")]
+        self.assertFalse(self.generate(client)["success"])
+        self.assertEqual(client.breaker.state, "open")
+
+        # Half-open trial succeeds -> closed
+        time.sleep(0.25)
+        self.assertTrue(self.generate(client)["success"])
+        self.assertEqual(client.breaker.state, "closed")
+
+    def test_malformed_half_open_trial_does_not_wedge_breaker(self):
+        client = self.client(max_retries=0, failure_threshold=1, reset_timeout=0.2)
+        self.stub.responses = [(500, {}, b"down")]
+        self.generate(client)
+        self.assertEqual(client.breaker.state, "open")
+
+        time.sleep(0.25)
+        self.stub.responses = [(200, {}, b"garbage")]
+        self.assertFalse(self.generate(client)["success"])
+        self.assertEqual(client.breaker.state, "open")
+
+        time.sleep(0.25)
+        self.assertTrue(self.generate(client)["success"])
+        self.assertEqual(client.breaker.state, "closed")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+GenerationScheduler tests: outcome accounting and the duration window behind the ETA
+"""
+
+import os
+import sys
+import asyncio
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.job_scheduler import GenerationScheduler, JobFailedError
+
+class GenerationSchedulerOutcomeTest(unittest.TestCase):
+
+    def run_jobs(self, *jobs):
+        """Submit the coroutine functions in order and wait until all of them have finished"""
+        async def run():
+            scheduler = GenerationScheduler(concurrency=1, default_job_seconds=45.0)
+            for index, job in enumerate(jobs):
+                await scheduler.submit(f"job-{index}", job)
+            while scheduler.stats()["queue_depth"] or scheduler.stats()["running"]:
+                await asyncio.sleep(0.01)
+            await scheduler.shutdown()
+            return scheduler
+        return asyncio.run(run())
+
+    def test_successful_job_is_counted_and_timed(self):
+        async def job():
+            await asyncio.sleep(0.05)
+            return True
+
+        scheduler = self.run_jobs(job)
+        self.assertEqual(scheduler.completed_jobs, 1)
+        self.assertEqual(scheduler.failed_jobs, 0)
+        self.assertLess(scheduler.average_job_seconds(), 1.0)
+
+    def test_failures_are_counted_and_not_timed(self):
+        async def recorded_failure():
+            raise JobFailedError("diffusion failed")
+
+        async def crash():
+            raise RuntimeError("boom")
+
+        scheduler = self.run_jobs(recorded_failure, crash)
+        self.assertEqual(scheduler.failed_jobs, 2)
+        self.assertEqual(scheduler.completed_jobs, 0)
+        self.assertEqual(scheduler.average_job_seconds(), 45.0)
+        self.assertEqual(scheduler.stats()["failed_jobs"], 2)
+
+    def test_unrepresentative_run_is_completed_but_not_timed(self):
+        async def placeholder():
+            return False
+
+        scheduler = self.run_jobs(placeholder)
+        self.assertEqual(scheduler.completed_jobs, 1)
+        self.assertEqual(scheduler.average_job_seconds(), 45.0)
+
+if __name__ == "__main__":
+    unittest.main()
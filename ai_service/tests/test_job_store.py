@@ -0,0 +1,144 @@
+"""
+Job store tests: the abstract interface, and TTL expiry and eviction of finished jobs only
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.job_store import ImageGenerationJob, InMemoryJobStore, JobStore, JobStoreFullError, SQLiteJobStore
+
+def make_job(job_id: str, status: str = "pending") -> ImageGenerationJob:
+    job = ImageGenerationJob(job_id)
+    job.status = status
+    return job
+
+class JobStoreInterfaceTest(unittest.TestCase):
+
+    def test_base_class_is_abstract(self):
+        with self.assertRaises(TypeError):
+            JobStore()
+
+    def test_incomplete_backend_cannot_be_instantiated(self):
+        class NoCount(JobStore):
+            def save(self, job): pass
+            def get(self, job_id): return None
+            def delete(self, job_id): pass
+            def purge_expired(self): return 0
+
+        with self.assertRaises(TypeError):
+            NoCount()
+
+class InMemoryJobStoreEvictionTest(unittest.TestCase):
+
+    def test_evicts_least_recent_finished_job(self):
+        store = InMemoryJobStore(max_jobs=3)
+        store.save(make_job("done-old", "completed"))
+        store.save(make_job("active", "processing"))
+        store.save(make_job("done-new", "failed"))
+        store.save(make_job("new"))
+
+        self.assertIsNone(store.get("done-old"))
+        for job_id in ("active", "done-new", "new"):
+            self.assertIsNotNone(store.get(job_id))
+        self.assertEqual(store.evictions, 1)
+
+    def test_active_jobs_are_never_evicted(self):
+        store = InMemoryJobStore(max_jobs=2)
+        store.save(make_job("a", "pending"))
+        store.save(make_job("b", "processing"))
+
+        with self.assertRaises(JobStoreFullError):
+            store.save(make_job("c"))
+
+        self.assertIsNone(store.get("c"))
+        self.assertEqual(store.count(), 2)
+        self.assertEqual(store.evictions, 0)
+
+    def test_updates_to_stored_jobs_are_accepted_when_full(self):
+        store = InMemoryJobStore(max_jobs=2)
+        store.save(make_job("a"))
+        job = make_job("b")
+        store.save(job)
+
+        job.status = "processing"
+        store.save(job)
+        self.assertEqual(store.get("b").status, "processing")
+
+    def test_finishing_a_job_frees_room(self):
+        store = InMemoryJobStore(max_jobs=1)
+        job = make_job("a")
+        store.save(job)
+        with self.assertRaises(JobStoreFullError):
+            store.save(make_job("b"))
+
+        job.status = "completed"
+        store.save(job)
+        store.save(make_job("b"))
+        self.assertIsNone(store.get("a"))
+        self.assertIsNotNone(store.get("b"))
+
+    def test_ttl_expires_only_finished_jobs(self):
+        store = InMemoryJobStore(ttl_seconds=0.05)
+        store.save(make_job("done", "completed"))
+        store.save(make_job("active", "processing"))
+        time.sleep(0.1)
+
+        self.assertEqual(store.purge_expired(), 1)
+        self.assertIsNone(store.get("done"))
+        self.assertIsNotNone(store.get("active"))
+
+class SQLiteJobStoreTest(unittest.TestCase):
+
+    def store(self, **kwargs) -> SQLiteJobStore:
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        return SQLiteJobStore(db_path=os.path.join(directory, "jobs.db"), **kwargs)
+
+    def test_round_trip(self):
+        store = self.store()
+        job = make_job("a", "completed")
+        job.image_url = "/uploads/a.png"
+        store.save(job)
+        self.assertEqual(store.get("a").image_url, "/uploads/a.png")
+
+    def test_row_cap_evicts_oldest_finished_job(self):
+        store = self.store(max_jobs=2)
+        store.save(make_job("done", "failed"))
+        store.save(make_job("active", "processing"))
+        store.save(make_job("new"))
+
+        self.assertIsNone(store.get("done"))
+        self.assertIsNotNone(store.get("active"))
+        self.assertIsNotNone(store.get("new"))
+        self.assertEqual(store.stats()["evictions"], 1)
+
+    def test_full_of_active_jobs_refuses_new_jobs(self):
+        store = self.store(max_jobs=1)
+        job = make_job("a")
+        store.save(job)
+        with self.assertRaises(JobStoreFullError):
+            store.save(make_job("b"))
+        self.assertIsNone(store.get("b"))
+
+        job.status = "processing"
+        store.save(job)
+        self.assertEqual(store.get("a").status, "processing")
+
+    def test_ttl_expires_only_finished_jobs(self):
+        store = self.store(ttl_seconds=0.05)
+        store.save(make_job("done", "completed"))
+        store.save(make_job("active", "pending"))
+        time.sleep(0.1)
+
+        self.assertEqual(store.purge_expired(), 1)
+        self.assertIsNone(store.get("done"))
+        self.assertIsNotNone(store.get("active"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""
+ProgressEventBus tests: channel eviction must never drop live channels
+"""
+
+import os
+import sys
+import asyncio
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.progress_events import ProgressEventBus
+
+class ProgressEventBusEvictionTest(unittest.TestCase):
+
+    def test_finished_and_empty_channels_are_evicted_first(self):
+        bus = ProgressEventBus(max_channels=2)
+        bus.publish("running", "processing")
+        bus.publish("done", "completed")
+        bus.publish("new", "queued")
+
+        self.assertTrue(bus.has_channel("running"))
+        self.assertFalse(bus.has_channel("done"))
+        self.assertTrue(bus.has_channel("new"))
+        self.assertEqual(bus.stats()["evictions"], 1)
+
+    def test_running_jobs_are_kept_over_the_limit(self):
+        bus = ProgressEventBus(max_channels=1)
+        bus.publish("job-1", "processing")
+        bus.publish("job-2", "processing")
+
+        self.assertTrue(bus.has_channel("job-1"))
+        self.assertTrue(bus.has_channel("job-2"))
+
+    def test_subscriber_receives_terminal_event_after_channel_flood(self):
+        bus = ProgressEventBus(max_channels=2)
+
+        async def run():
+            received = []
+
+            async def listen():
+                async for event in bus.subscribe("job", heartbeat_seconds=0.05, idle_timeout=2.0):
+                    if event is not None:
+                        received.append(event.event)
+
+            listener = asyncio.create_task(listen())
+            await asyncio.sleep(0.05)
+
+            # Other clients open and abandon channels for arbitrary ids
+            for index in range(10):
+                bus.publish(f"other-{index}", "completed")
+            self.assertTrue(bus.has_channel("job"))
+
+            bus.publish("job", "completed")
+            await asyncio.wait_for(listener, timeout=1.0)
+            return received
+
+        self.assertEqual(asyncio.run(run()), ["completed"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,8 @@ from flask_cors import CORS
 import json
 import os
 import sys
-from architect_recommendation_engine import get_architect_recommendations, initialize_recommendation_engine
+from architect_recommendation_engine import get_architect_recommendations, get_engine_manager
+from db_pool import get_pool
 import logging
 
 # Configure logging
@@ -18,6 +19,14 @@ CORS(app, origins=['http://localhost:3000', 'http://127.0.0.1:3000'],
      allow_headers=['Content-Type', 'Authorization', 'Access-Control-Allow-Credentials'],
      supports_credentials=True)
 
+# One engine per process: loaded at startup, swapped on /train and reloaded when the model file changes;
+# architect changes are applied incrementally in the background, with a scheduled full rebuild
+# (run by whichever worker process holds the scheduler lock file next to the model)
+logger.info("Initializing architect recommendation engine...")
+engine_manager = get_engine_manager()
+engine_manager.start_watcher()
+engine_manager.start_scheduler()
+
 @app.route('/api/architect-recommendations', methods=['POST', 'OPTIONS'])
 def get_recommendations():
     """
@@ -151,22 +160,22 @@ def get_recommendations():
 def health_check():
     """Health check endpoint"""
     try:
-        # Try to initialize the engine
-        engine = initialize_recommendation_engine()
+        engine_stats = engine_manager.stats()
+        engine_stats['db_pool'] = get_pool().stats()
         
-        if engine and engine.is_trained:
+        if engine_stats['model_trained']:
             response = jsonify({
                 'success': True,
                 'status': 'healthy',
                 'message': 'Architect recommendation engine is ready',
-                'model_trained': True
+                **engine_stats
             })
         else:
             response = jsonify({
                 'success': False,
                 'status': 'unhealthy',
                 'message': 'Architect recommendation engine is not ready',
-                'model_trained': False
+                **engine_stats
             })
             response.status_code = 503
             
@@ -187,17 +196,22 @@ def health_check():
 
 @app.route('/api/architect-recommendations/train', methods=['POST'])
 def train_model():
-    """Manually trigger model training"""
+    """
+    Retrain the model and swap it in; requests keep using the current engine until then
+    
+    Body (optional): {"mode": "incremental"} applies only architect changes since the
+    last build (falling back to a full rebuild when needed); the default is a full rebuild.
+    """
     try:
-        logger.info("Manual model training requested")
-        
-        engine = initialize_recommendation_engine()
+        mode = (request.get_json(silent=True) or {}).get('mode', 'full')
+        logger.info(f"Manual model training requested ({mode})")
         
-        if engine and engine.is_trained:
+        trained = engine_manager.update() if mode == 'incremental' else engine_manager.retrain()
+        if trained:
             return jsonify({
                 'success': True,
                 'message': 'Model trained successfully',
-                'model_trained': True
+                **engine_manager.stats()
             })
         else:
             return jsonify({
@@ -247,11 +261,7 @@ def get_sample_recommendations():
         }), 500
 
 if __name__ == '__main__':
-    # Initialize the recommendation engine on startup
-    logger.info("Initializing architect recommendation engine...")
-    engine = initialize_recommendation_engine()
-    
-    if engine and engine.is_trained:
+    if engine_manager.engine and engine_manager.engine.is_trained:
         logger.info("Architect recommendation engine ready!")
     else:
         logger.warning("Architect recommendation engine not ready - some features may not work")
@@ -4,15 +4,77 @@ from sklearn.neighbors import NearestNeighbors
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics.pairwise import cosine_similarity
 import json
-import pymysql
 import os
-from typing import List, Dict, Any, Tuple
+import copy
+import time
+import tempfile
+import threading
+from typing import List, Dict, Any, Tuple, Optional
 import logging
 
+from db_pool import DEFAULT_DB_CONFIG, get_pool
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Approved architects with their review and assignment statistics.
+# Reviews and assignments are aggregated once per architect in GROUP BY derived tables and
+# joined on architect_id, instead of running correlated subqueries for every architect row.
+# With the (architect_id, rating) index from database/add_architect_stats_indexes.sql both forms
+# cost about the same (benchmark_architect_queries.py); without it this form avoids rescanning reviews.
+# stats_filter / user_filter narrow the query to one architect (get_architect_details).
+ARCHITECT_FEATURES_QUERY = """
+SELECT 
+    u.id,
+    CONCAT(u.first_name, ' ', u.last_name) as name,
+    u.email,
+    u.specialization as specialty,
+    u.experience_years,
+    u.city,
+    u.state,
+    u.location,
+    u.company_name,
+    u.portfolio,
+    u.license,
+    u.created_at,
+    u.is_verified,
+    u.status,
+    COALESCE(rs.rating, 0) as rating,
+    COALESCE(rs.num_reviews, 0) as num_reviews,
+    COALESCE(la.portfolio_count, 0) as portfolio_count,
+    95.0 as success_rate,
+    24 as response_time_hours,
+    0 as price_range_min,
+    10000000 as price_range_max
+FROM users u
+LEFT JOIN (
+    SELECT architect_id, ROUND(AVG(rating), 2) as rating, COUNT(*) as num_reviews
+    FROM architect_reviews
+    {stats_filter}
+    GROUP BY architect_id
+) rs ON rs.architect_id = u.id
+LEFT JOIN (
+    SELECT architect_id, COUNT(*) as portfolio_count
+    FROM layout_request_assignments
+    {stats_filter}
+    GROUP BY architect_id
+) la ON la.architect_id = u.id
+WHERE u.role = 'architect' AND u.status = 'approved' {user_filter}
+"""
+
+# Architects whose features may have changed since a watermark (database time of the last build):
+# profile edits (users.updated_at), new reviews and new or updated assignments.
+# Inclusive comparison because MySQL timestamps have one-second resolution.
+CHANGED_ARCHITECTS_QUERY = """
+SELECT id AS architect_id FROM users
+WHERE role = 'architect' AND (updated_at >= %s OR created_at >= %s)
+UNION
+SELECT architect_id FROM architect_reviews WHERE created_at >= %s
+UNION
+SELECT architect_id FROM layout_request_assignments WHERE updated_at >= %s
+"""
+
 class ArchitectRecommendationEngine:
     """
     KNN-based Architect Recommendation Engine
@@ -24,81 +86,77 @@ class ArchitectRecommendationEngine:
     - Location preferences
     """
     
+    # Architect fields kept alongside the KNN index for building recommendations
+    METADATA_COLUMNS = [
+        'id', 'name', 'email', 'specialty', 'location', 'city', 'state', 'company_name',
+        'rating', 'num_reviews', 'experience_years', 'portfolio_count', 'success_rate',
+        'response_time_hours', 'price_range_min', 'price_range_max'
+    ]
+    
     def __init__(self, db_config: Dict[str, str] = None):
-        # Default MySQL connection config (matches your existing setup)
-        self.db_config = db_config or {
-            'host': 'localhost',
-            'user': 'root',
-            'password': '',
-            'database': 'buildhub',
-            'charset': 'utf8mb4'
-        }
+        # MySQL connection config (defaults to DB_* environment settings of db_pool)
+        self.db_config = db_config or dict(DEFAULT_DB_CONFIG)
         self.scaler = StandardScaler()
         self.knn_model = None
         self.architect_features = None
         self.project_features = None
         self.is_trained = False
+        self.n_neighbors = 5
+        self.feature_columns = None
+        self.architect_features_scaled = None
+        # Database time taken before the architects were last fetched; rows changed since are re-encoded
+        self.watermark = None
+        self.full_build_at = None
         
     def connect_db(self):
-        """Connect to MySQL database"""
-        try:
-            conn = pymysql.connect(
-                host=self.db_config['host'],
-                user=self.db_config['user'],
-                password=self.db_config['password'],
-                database=self.db_config['database'],
-                charset=self.db_config['charset']
-            )
-            return conn
-        except Exception as e:
-            logger.error(f"Database connection error: {e}")
-            return None
+        """Check out a pooled MySQL connection (use as a context manager)"""
+        return get_pool(self.db_config).connection()
     
-    def get_architects_data(self) -> pd.DataFrame:
-        """Fetch architects data from existing users table"""
-        conn = self.connect_db()
-        if not conn:
-            return pd.DataFrame()
-        
+    def get_architects_data(self, architect_ids: Optional[List[int]] = None) -> pd.DataFrame:
+        """Fetch architects data from existing users table (all approved architects, or only architect_ids)"""
         try:
-            query = """
-            SELECT 
-                u.id,
-                CONCAT(u.first_name, ' ', u.last_name) as name,
-                u.email,
-                u.specialization as specialty,
-                u.experience_years,
-                u.city,
-                u.state,
-                u.location,
-                u.company_name,
-                u.portfolio,
-                u.license,
-                u.created_at,
-                u.is_verified,
-                u.status,
-                COALESCE((SELECT ROUND(AVG(r.rating),2) FROM architect_reviews r WHERE r.architect_id = u.id), 0) as rating,
-                COALESCE((SELECT COUNT(*) FROM architect_reviews r2 WHERE r2.architect_id = u.id), 0) as num_reviews,
-                COALESCE((SELECT COUNT(*) FROM layout_request_assignments la WHERE la.architect_id = u.id), 0) as portfolio_count,
-                95.0 as success_rate,
-                24 as response_time_hours,
-                0 as price_range_min,
-                10000000 as price_range_max
-            FROM users u
-            WHERE u.role = 'architect' AND u.status = 'approved'
-            """
-            
-            df = pd.read_sql(query, conn)
-            conn.close()
-            
+            df = self._query_architects(architect_ids)
             logger.info(f"Fetched {len(df)} architects from existing database")
             return df
             
         except Exception as e:
             logger.error(f"Error fetching architects data: {e}")
-            conn.close()
             return pd.DataFrame()
     
+    def _query_architects(self, architect_ids: Optional[List[int]] = None) -> pd.DataFrame:
+        """Run ARCHITECT_FEATURES_QUERY; database errors are raised"""
+        if architect_ids is None:
+            query = ARCHITECT_FEATURES_QUERY.format(stats_filter='', user_filter='')
+            params = None
+        else:
+            placeholders = ', '.join(['%s'] * len(architect_ids))
+            query = ARCHITECT_FEATURES_QUERY.format(
+                stats_filter=f'WHERE architect_id IN ({placeholders})',
+                user_filter=f'AND u.id IN ({placeholders})'
+            )
+            params = list(architect_ids) * 3
+        
+        with self.connect_db() as conn:
+            return pd.read_sql(query, conn, params=params)
+    
+    def get_changed_architect_ids(self, since) -> List[int]:
+        """Ids of architects changed at or after `since` (database errors are raised)"""
+        with self.connect_db() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(CHANGED_ARCHITECTS_QUERY, [since] * 4)
+                return sorted({int(row[0]) for row in cursor.fetchall()})
+    
+    def _database_time(self):
+        """Current database time, used as the change watermark (None if unavailable)"""
+        try:
+            with self.connect_db() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT NOW()")
+                    return cursor.fetchone()[0]
+        except Exception as e:
+            logger.warning(f"Could not read database time for the change watermark: {e}")
+            return None
+    
     def preprocess_architect_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Preprocess architect features for ML model using existing data structure"""
         if df.empty:
@@ -411,9 +469,12 @@ class ArchitectRecommendationEngine:
         return features
     
     def train_model(self, n_neighbors: int = 5):
-        """Train the KNN model"""
+        """Train the KNN model (full rebuild: refetch every architect and refit the scaler)"""
         logger.info("Starting model training...")
         
+        # Take the watermark before fetching so changes made during the fetch are picked up next time
+        watermark = self._database_time()
+        
         # Get architects data
         architects_df = self.get_architects_data()
         if architects_df.empty:
@@ -421,7 +482,90 @@ class ArchitectRecommendationEngine:
             return False
         
         # Preprocess architect features
-        processed_df = self.preprocess_architect_features(architects_df)
+        processed_df = self.preprocess_architect_features(architects_df).reset_index(drop=True)
+        
+        # Extract features
+        self.architect_features = self._feature_matrix(processed_df)
+        self.feature_columns = list(self.architect_features.columns)
+        
+        # Scale features
+        self.architect_features_scaled = self.scaler.fit_transform(self.architect_features)
+        
+        # Train KNN model
+        self.n_neighbors = n_neighbors
+        self.knn_model = self._fit_index(self.architect_features_scaled)
+        
+        # Store architect metadata
+        # (carries every field a recommendation returns, so serving needs no database access)
+        self.architect_metadata = processed_df[self.METADATA_COLUMNS].copy()
+        
+        self.watermark = watermark
+        self.full_build_at = time.time()
+        self.is_trained = True
+        logger.info(f"Model trained successfully with {len(processed_df)} architects")
+        
+        return True
+    
+    def update_incremental(self) -> Optional[int]:
+        """
+        Apply architect changes made since the watermark without a full rebuild
+        
+        Only changed architects are refetched and re-encoded. Their rows in the
+        feature matrix and metadata are replaced (removed if no longer approved,
+        appended if new) using the existing scaler, and the cosine index is
+        refit on the updated matrix. Attributes are rebound rather than
+        modified, so this can run on a copy while the original keeps serving.
+        The scaler statistics and deleted reviews only refresh on a full rebuild.
+        
+        Returns:
+            Number of architects re-encoded (0 if nothing changed), or None if
+            a full rebuild is needed instead
+        """
+        if not self.is_trained or self.watermark is None or self.feature_columns is None:
+            return None
+        
+        watermark = self._database_time()
+        if watermark is None:
+            return None
+        
+        try:
+            changed_ids = self.get_changed_architect_ids(self.watermark)
+            changed_df = self._query_architects(changed_ids) if changed_ids else pd.DataFrame()
+        except Exception as e:
+            logger.error(f"Error fetching changed architects: {e}")
+            return None
+        
+        if changed_ids:
+            keep = ~self.architect_metadata['id'].isin(changed_ids).to_numpy()
+            features = self.architect_features[keep]
+            scaled = self.architect_features_scaled[keep]
+            metadata = self.architect_metadata[keep]
+            
+            if not changed_df.empty:
+                processed_df = self.preprocess_architect_features(changed_df).reset_index(drop=True)
+                new_features = self._feature_matrix(processed_df)
+                features = pd.concat([features, new_features])
+                scaled = np.vstack([scaled, self.scaler.transform(new_features)])
+                metadata = pd.concat([metadata, processed_df[self.METADATA_COLUMNS]])
+            
+            if len(metadata) == 0:
+                logger.error("No architects left after incremental update")
+                return None
+            
+            self.architect_features = features.reset_index(drop=True)
+            self.architect_features_scaled = scaled
+            self.architect_metadata = metadata.reset_index(drop=True)
+            self.knn_model = self._fit_index(scaled)
+            logger.info(f"Incremental update re-encoded {len(changed_df)} of {len(changed_ids)} changed architects "
+                        f"({len(self.architect_metadata)} indexed)")
+        
+        self.watermark = watermark
+        return len(changed_ids)
+    
+    def _feature_matrix(self, processed_df: pd.DataFrame) -> pd.DataFrame:
+        """Select the training features from preprocessed architect rows"""
+        if self.feature_columns is not None:
+            return processed_df.reindex(columns=self.feature_columns).fillna(0)
         
         # Select features for training
         feature_columns = [
@@ -438,28 +582,15 @@ class ArchitectRecommendationEngine:
         location_columns = ['is_kerala', 'is_urban', 'is_rural']
         feature_columns.extend(location_columns)
         
-        # Extract features
-        self.architect_features = processed_df[feature_columns].fillna(0)
-        
-        # Scale features
-        self.architect_features_scaled = self.scaler.fit_transform(self.architect_features)
-        
-        # Train KNN model
-        self.knn_model = NearestNeighbors(
-            n_neighbors=min(n_neighbors, len(processed_df)),
+        return processed_df[feature_columns].fillna(0)
+    
+    def _fit_index(self, features_scaled: np.ndarray) -> NearestNeighbors:
+        knn_model = NearestNeighbors(
+            n_neighbors=min(self.n_neighbors, len(features_scaled)),
             metric='cosine',
             algorithm='auto'
         )
-        
-        self.knn_model.fit(self.architect_features_scaled)
-        
-        # Store architect metadata
-        self.architect_metadata = processed_df[['id', 'name', 'email', 'specialty', 'location', 'rating', 'num_reviews']].copy()
-        
-        self.is_trained = True
-        logger.info(f"Model trained successfully with {len(processed_df)} architects")
-        
-        return True
+        return knn_model.fit(features_scaled)
     
     def recommend_architects(self, project_data: Dict[str, Any], n_recommendations: int = 5) -> List[Dict[str, Any]]:
         """Recommend architects based on project data"""
@@ -477,34 +608,19 @@ class ArchitectRecommendationEngine:
             # Find nearest neighbors
             distances, indices = self.knn_model.kneighbors(project_features_scaled)
             
+            # Look up the neighbours' details in the in-memory metadata (one vectorised row selection)
+            neighbours = indices[0][:n_recommendations]
+            neighbour_distances = distances[0][:n_recommendations]
+            architects = self.architect_metadata.iloc[neighbours].to_dict('records')
+            
             # Get recommendations
             recommendations = []
-            for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
-                if i >= n_recommendations:
-                    break
-                
-                architect_id = self.architect_metadata.iloc[idx]['id']
-                architect_info = self.architect_metadata.iloc[idx].to_dict()
+            for distance, architect_info in zip(neighbour_distances, architects):
+                architect_id = architect_info['id']
                 
                 # Calculate similarity score (1 - distance)
                 similarity_score = 1 - distance
                 
-                # Get additional architect details
-                conn = self.connect_db()
-                if conn:
-                    try:
-                        detail_query = """
-                        SELECT * FROM architects WHERE id = ?
-                        """
-                        detail_df = pd.read_sql_query(detail_query, conn, params=[architect_id])
-                        if not detail_df.empty:
-                            architect_details = detail_df.iloc[0].to_dict()
-                            architect_info.update(architect_details)
-                    except Exception as e:
-                        logger.error(f"Error fetching architect details: {e}")
-                    finally:
-                        conn.close()
-                
                 recommendation = {
                     'architect_id': architect_id,
                     'name': architect_info.get('name', ''),
@@ -582,35 +698,15 @@ class ArchitectRecommendationEngine:
     
     def get_architect_details(self, architect_id: int) -> Dict[str, Any]:
         """Get detailed information about a specific architect from existing users table"""
-        conn = self.connect_db()
-        if not conn:
-            return {}
-        
         try:
-            query = """
-            SELECT 
-                u.id,
-                CONCAT(u.first_name, ' ', u.last_name) as name,
-                u.email,
-                u.specialization as specialty,
-                u.experience_years,
-                u.city,
-                u.state,
-                u.location,
-                u.company_name,
-                u.portfolio,
-                u.license,
-                u.created_at,
-                u.is_verified,
-                u.status,
-                COALESCE((SELECT ROUND(AVG(r.rating),2) FROM architect_reviews r WHERE r.architect_id = u.id), 0) as rating,
-                COALESCE((SELECT COUNT(*) FROM architect_reviews r2 WHERE r2.architect_id = u.id), 0) as num_reviews,
-                COALESCE((SELECT COUNT(*) FROM layout_request_assignments la WHERE la.architect_id = u.id), 0) as portfolio_count
-            FROM users u
-            WHERE u.id = %s AND u.role = 'architect' AND u.status = 'approved'
-            """
+            # Aggregate only this architect's rows (index range scans on architect_id)
+            query = ARCHITECT_FEATURES_QUERY.format(
+                stats_filter='WHERE architect_id = %s',
+                user_filter='AND u.id = %s'
+            )
             
-            df = pd.read_sql(query, conn, params=[architect_id])
+            with self.connect_db() as conn:
+                df = pd.read_sql(query, conn, params=[architect_id, architect_id, architect_id])
             
             if not df.empty:
                 return df.iloc[0].to_dict()
@@ -620,8 +716,6 @@ class ArchitectRecommendationEngine:
         except Exception as e:
             logger.error(f"Error fetching architect details: {e}")
             return {}
-        finally:
-            conn.close()
     
     def save_model(self, filepath: str):
         """Save the trained model"""
@@ -636,10 +730,25 @@ class ArchitectRecommendationEngine:
                 'knn_model': self.knn_model,
                 'architect_features': self.architect_features,
                 'architect_metadata': self.architect_metadata,
-                'is_trained': self.is_trained
+                'is_trained': self.is_trained,
+                'feature_columns': self.feature_columns,
+                'n_neighbors': self.n_neighbors,
+                'watermark': self.watermark,
+                'full_build_at': self.full_build_at
             }
             
-            joblib.dump(model_data, filepath)
+            # Write to a temporary file unique to this writer, in the same directory so the
+            # rename is atomic; readers never see a half-written model
+            directory, name = os.path.split(os.path.abspath(filepath))
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f"{name}.", suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as temp_file:
+                    joblib.dump(model_data, temp_file)
+                os.replace(temp_path, filepath)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
             logger.info(f"Model saved to {filepath}")
             return True
             
@@ -658,6 +767,12 @@ class ArchitectRecommendationEngine:
             self.architect_features = model_data['architect_features']
             self.architect_metadata = model_data['architect_metadata']
             self.is_trained = model_data['is_trained']
+            # Incremental update state (absent in older model files, which then get a full rebuild)
+            self.feature_columns = model_data.get('feature_columns')
+            self.n_neighbors = model_data.get('n_neighbors', self.n_neighbors)
+            self.watermark = model_data.get('watermark')
+            self.full_build_at = model_data.get('full_build_at')
+            self.architect_features_scaled = self.scaler.transform(self.architect_features)
             
             logger.info(f"Model loaded from {filepath}")
             return True
@@ -667,13 +782,235 @@ class ArchitectRecommendationEngine:
             return False
 
 
+DEFAULT_MODEL_PATH = os.getenv('ARCHITECT_MODEL_PATH', 'backend/models/architect_recommendation_model.pkl')
+
+
+def _try_lock_file(path: str):
+    """Open path and take a non-blocking exclusive lock on it; returns the open file, or None if held elsewhere"""
+    lock_file = open(path, 'a+')
+    try:
+        try:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except ImportError:
+            import msvcrt
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        return lock_file
+    except OSError:
+        lock_file.close()
+        return None
+
+
+class RecommendationEngineManager:
+    """
+    Process-wide holder of the trained recommendation engine
+    
+    The engine is loaded once, replaced as a whole after retraining, and
+    reloaded when the model file changes on disk (e.g. trained by another
+    process). Requests only read the current engine reference, so they never
+    load the model or retrain inline.
+    
+    The update scheduler applies architect changes incrementally every
+    refresh_interval seconds and runs a full rebuild once the last one is
+    older than full_rebuild_interval. Every process may start it, but only the
+    one holding the lock file next to the model runs updates; the others pick
+    up its saved model through the reload watcher, and take over the lock if
+    that process exits.
+    """
+    
+    def __init__(self, model_path: str = DEFAULT_MODEL_PATH,
+                 reload_interval: float = float(os.getenv('ARCHITECT_MODEL_RELOAD_SECONDS', '30')),
+                 refresh_interval: float = float(os.getenv('ARCHITECT_INCREMENTAL_REFRESH_SECONDS', '300')),
+                 full_rebuild_interval: float = float(os.getenv('ARCHITECT_FULL_REBUILD_SECONDS', '86400'))):
+        self.model_path = model_path
+        self.reload_interval = reload_interval
+        self.refresh_interval = refresh_interval
+        self.full_rebuild_interval = full_rebuild_interval
+        self.incremental_updates = 0
+        self.full_rebuilds = 0
+        self._scheduler = None
+        self._scheduler_lock = None
+        self.engine: Optional[ArchitectRecommendationEngine] = None
+        self.loaded_mtime: Optional[float] = None
+        self.loaded_at: Optional[float] = None
+        self.swaps = 0
+        self._train_lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+    
+    def load(self, train_if_missing: bool = True) -> bool:
+        """Load the saved model, training and saving a new one if none exists"""
+        if self._reload_from_disk():
+            return True
+        if train_if_missing:
+            return self.retrain()
+        return False
+    
+    def retrain(self, n_neighbors: int = 5) -> bool:
+        """Train a new engine, save it and swap it in; the current engine keeps serving meanwhile"""
+        with self._train_lock:
+            return self._retrain_locked(n_neighbors)
+    
+    def update(self) -> bool:
+        """
+        Apply architect changes since the last build, or fully rebuild when due
+        
+        The incremental update runs on a shallow copy of the current engine,
+        which is saved and swapped in only if something changed.
+        """
+        with self._train_lock:
+            current = self.engine
+            if current is None or self._full_rebuild_due(current):
+                return self._retrain_locked(current.n_neighbors if current else 5)
+            
+            engine = copy.copy(current)
+            changed = engine.update_incremental()
+            if changed is None:
+                logger.info("Incremental update not possible, running a full rebuild")
+                return self._retrain_locked(current.n_neighbors)
+            if changed == 0:
+                # Nothing to swap; just move the watermark forward
+                current.watermark = engine.watermark
+                return True
+            
+            self._save_and_swap(engine)
+            self.incremental_updates += 1
+            return True
+    
+    def start_scheduler(self):
+        """Start the background thread running update() every refresh_interval seconds (in the lock holder only)"""
+        if self._scheduler is not None or self.refresh_interval <= 0:
+            return
+        self._scheduler = threading.Thread(target=self._schedule, name="model-updater", daemon=True)
+        self._scheduler.start()
+    
+    def _retrain_locked(self, n_neighbors: int) -> bool:
+        engine = ArchitectRecommendationEngine()
+        if not engine.train_model(n_neighbors):
+            logger.error("Retraining failed, keeping the current engine")
+            return False
+        
+        self._save_and_swap(engine)
+        self.full_rebuilds += 1
+        logger.info("New model trained and swapped in")
+        return True
+    
+    def _save_and_swap(self, engine: ArchitectRecommendationEngine):
+        os.makedirs(os.path.dirname(self.model_path) or '.', exist_ok=True)
+        saved = engine.save_model(self.model_path)
+        self._swap(engine, self._file_mtime() if saved else None)
+    
+    def _full_rebuild_due(self, engine: ArchitectRecommendationEngine) -> bool:
+        if engine.full_build_at is None:
+            return True
+        return self.full_rebuild_interval > 0 and time.time() - engine.full_build_at >= self.full_rebuild_interval
+    
+    def start_watcher(self):
+        """Start the background thread reloading the model when the file's mtime changes"""
+        if self._watcher is not None or self.reload_interval <= 0:
+            return
+        self._watcher = threading.Thread(target=self._watch, name="model-reloader", daemon=True)
+        self._watcher.start()
+    
+    def stop_watcher(self):
+        """Stop the reload watcher and the update scheduler"""
+        self._stop.set()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Engine state for health reporting"""
+        engine = self.engine
+        return {
+            'model_trained': bool(engine and engine.is_trained),
+            'architects_indexed': len(engine.architect_metadata) if engine and engine.is_trained else 0,
+            'model_path': self.model_path,
+            'model_mtime': self.loaded_mtime,
+            'loaded_at': self.loaded_at,
+            'engine_swaps': self.swaps,
+            'watermark': str(engine.watermark) if engine and engine.watermark is not None else None,
+            'last_full_build': engine.full_build_at if engine else None,
+            'incremental_updates': self.incremental_updates,
+            'full_rebuilds': self.full_rebuilds,
+            'scheduler_leader': self._scheduler_lock is not None
+        }
+    
+    def _reload_from_disk(self) -> bool:
+        mtime = self._file_mtime()
+        if mtime is None:
+            return False
+        engine = ArchitectRecommendationEngine()
+        if not engine.load_model(self.model_path):
+            return False
+        self._swap(engine, mtime)
+        return True
+    
+    def _swap(self, engine: ArchitectRecommendationEngine, mtime: Optional[float]):
+        # Rebinding the attribute is atomic; in-flight requests finish on the engine they started with
+        self.engine = engine
+        self.loaded_mtime = mtime
+        self.loaded_at = time.time()
+        self.swaps += 1
+    
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.model_path)
+        except OSError:
+            return None
+    
+    def _watch(self):
+        while not self._stop.wait(self.reload_interval):
+            mtime = self._file_mtime()
+            if mtime is None or mtime == self.loaded_mtime:
+                continue
+            with self._train_lock:
+                if self._file_mtime() != self.loaded_mtime:
+                    logger.info(f"Model file {self.model_path} changed, reloading")
+                    self._reload_from_disk()
+    
+    def _holds_scheduler_lock(self) -> bool:
+        if self._scheduler_lock is None:
+            try:
+                os.makedirs(os.path.dirname(self.model_path) or '.', exist_ok=True)
+                self._scheduler_lock = _try_lock_file(f"{self.model_path}.scheduler.lock")
+            except OSError as e:
+                logger.error(f"Cannot open model scheduler lock file: {e}")
+                return False
+            if self._scheduler_lock is not None:
+                logger.info(f"This process (pid {os.getpid()}) now runs the model update scheduler")
+        return self._scheduler_lock is not None
+    
+    def _schedule(self):
+        while not self._stop.wait(self.refresh_interval):
+            if not self._holds_scheduler_lock():
+                continue
+            try:
+                self.update()
+            except Exception as e:
+                logger.error(f"Scheduled model update failed: {e}")
+
+
+_engine_manager: Optional[RecommendationEngineManager] = None
+_engine_manager_lock = threading.Lock()
+
+
+def get_engine_manager() -> RecommendationEngineManager:
+    """Process-wide engine manager, loading the model on first use"""
+    global _engine_manager
+    with _engine_manager_lock:
+        if _engine_manager is None:
+            manager = RecommendationEngineManager()
+            manager.load()
+            _engine_manager = manager
+        return _engine_manager
+
+
 # API Functions for Flask integration
 def initialize_recommendation_engine():
     """Initialize the recommendation engine"""
     engine = ArchitectRecommendationEngine()
     
     # Try to load pre-trained model first
-    model_path = 'backend/models/architect_recommendation_model.pkl'
+    model_path = DEFAULT_MODEL_PATH
     if os.path.exists(model_path):
         if engine.load_model(model_path):
             logger.info("Pre-trained model loaded successfully")
@@ -692,8 +1029,8 @@ def initialize_recommendation_engine():
 
 
 def get_architect_recommendations(project_data: Dict[str, Any], n_recommendations: int = 5) -> List[Dict[str, Any]]:
-    """Get architect recommendations for a project"""
-    engine = initialize_recommendation_engine()
+    """Get architect recommendations for a project from the process-wide engine"""
+    engine = get_engine_manager().engine
     if not engine:
         return []
     
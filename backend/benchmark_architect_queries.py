@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Benchmark the architect statistics query on a synthetic SQLite stand-in
+
+Compares the old correlated-subquery form against ARCHITECT_FEATURES_QUERY
+(pre-aggregated GROUP BY joins) for training (all architects) and detail
+(single architect) fetches. MySQL-only syntax is translated for SQLite.
+
+Both schemas are timed so the gain is attributed correctly:
+- with the (architect_id, rating) index from add_architect_stats_indexes.sql
+- without it (the current schema); smaller by default, since the correlated
+  form then scans architect_reviews twice per architect
+
+Usage:
+    python benchmark_architect_queries.py [--architects 10000] [--reviews 1000000]
+                                          [--assignments 200000] [--unindexed-architects 500]
+                                          [--unindexed-reviews 50000] [--unindexed-assignments 10000]
+                                          [--skip-unindexed] [--db-dir path] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from architect_recommendation_engine import ARCHITECT_FEATURES_QUERY
+
+# Previous per-row form of the query, kept here as the baseline
+CORRELATED_QUERY = """
+SELECT 
+    u.id,
+    CONCAT(u.first_name, ' ', u.last_name) as name,
+    u.email,
+    u.specialization as specialty,
+    u.experience_years,
+    u.city,
+    u.state,
+    u.location,
+    u.company_name,
+    u.portfolio,
+    u.license,
+    u.created_at,
+    u.is_verified,
+    u.status,
+    COALESCE((SELECT ROUND(AVG(r.rating),2) FROM architect_reviews r WHERE r.architect_id = u.id), 0) as rating,
+    COALESCE((SELECT COUNT(*) FROM architect_reviews r2 WHERE r2.architect_id = u.id), 0) as num_reviews,
+    COALESCE((SELECT COUNT(*) FROM layout_request_assignments la WHERE la.architect_id = u.id), 0) as portfolio_count,
+    95.0 as success_rate,
+    24 as response_time_hours,
+    0 as price_range_min,
+    10000000 as price_range_max
+FROM users u
+WHERE u.role = 'architect' AND u.status = 'approved' {user_filter}
+"""
+
+SCHEMA = """
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY,
+    first_name TEXT, last_name TEXT, email TEXT,
+    role TEXT, status TEXT, is_verified INTEGER,
+    license TEXT, portfolio TEXT, specialization TEXT, experience_years INTEGER,
+    company_name TEXT, location TEXT, city TEXT, state TEXT,
+    created_at TEXT, updated_at TEXT
+);
+CREATE TABLE architect_reviews (
+    id INTEGER PRIMARY KEY,
+    architect_id INTEGER NOT NULL, homeowner_id INTEGER NOT NULL,
+    rating INTEGER NOT NULL, created_at TEXT
+);
+CREATE TABLE layout_request_assignments (
+    id INTEGER PRIMARY KEY,
+    layout_request_id INTEGER NOT NULL, homeowner_id INTEGER NOT NULL,
+    architect_id INTEGER NOT NULL, status TEXT, created_at TEXT, updated_at TEXT
+);
+CREATE INDEX idx_users_role_status ON users (role, status);
+CREATE INDEX idx_lra_architect ON layout_request_assignments (architect_id);
+"""
+
+# database/add_architect_stats_indexes.sql; without it every correlated review subquery is a full scan
+REVIEW_INDEX = "CREATE INDEX idx_ar_architect_rating ON architect_reviews (architect_id, rating);"
+
+SPECIALTIES = ['Modern', 'Traditional', 'Interior Design', 'Residential', 'Commercial', 'Sustainable']
+CITIES = [('Kochi', 'Kerala'), ('Thrissur', 'Kerala'), ('Bangalore', 'Karnataka'), ('Chennai', 'Tamil Nadu')]
+
+
+def to_sqlite(query: str) -> str:
+    """Translate the MySQL-specific parts of a query for SQLite"""
+    return (query
+            .replace("CONCAT(u.first_name, ' ', u.last_name)", "u.first_name || ' ' || u.last_name")
+            .replace('%s', '?'))
+
+
+def build_database(path: str, n_architects: int, n_reviews: int, n_assignments: int,
+                   review_index: bool = True, seed: int = 42):
+    """Create the synthetic database (architects plus some homeowners)"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    if review_index:
+        conn.execute(REVIEW_INDEX)
+
+    n_homeowners = max(1, n_architects // 2)
+    users = []
+    for i in range(1, n_architects + n_homeowners + 1):
+        is_architect = i <= n_architects
+        city, state = rng.choice(CITIES)
+        users.append((
+            i, f'First{i}', f'Last{i}', f'user{i}@example.com',
+            'architect' if is_architect else 'homeowner',
+            'approved' if not is_architect or rng.random() < 0.9 else 'pending',
+            1, '', '', rng.choice(SPECIALTIES), rng.randint(0, 30),
+            f'Studio {i}', state, city, state, '2024-01-01 00:00:00', '2024-01-01 00:00:00'
+        ))
+    conn.executemany('INSERT INTO users VALUES (' + ','.join('?' * 17) + ')', users)
+
+    homeowner_ids = (n_architects + 1, n_architects + n_homeowners)
+    conn.executemany(
+        'INSERT INTO architect_reviews (architect_id, homeowner_id, rating, created_at) VALUES (?, ?, ?, ?)',
+        ((rng.randint(1, n_architects), rng.randint(*homeowner_ids), rng.randint(1, 5), '2024-06-01 00:00:00')
+         for _ in range(n_reviews))
+    )
+    conn.executemany(
+        'INSERT INTO layout_request_assignments (layout_request_id, homeowner_id, architect_id, status, created_at, updated_at) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        ((i, rng.randint(*homeowner_ids), rng.randint(1, n_architects), 'sent', '2024-06-01 00:00:00', '2024-06-01 00:00:00')
+         for i in range(1, n_assignments + 1))
+    )
+    conn.commit()
+    conn.execute('ANALYZE')
+    return conn
+
+
+def time_query(conn, query: str, params=(), repeat: int = 3):
+    """Best-of-N wall time and the fetched rows"""
+    best = float('inf')
+    rows = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = conn.execute(query, params).fetchall()
+        best = min(best, time.perf_counter() - started)
+    return best, rows
+
+
+def run_schema(label: str, path: str, n_architects: int, n_reviews: int, n_assignments: int,
+               review_index: bool, repeat: int):
+    """Build one synthetic database, time both query forms and print the results"""
+    if os.path.exists(path):
+        os.remove(path)
+
+    print(f"{label}: {n_architects} architects, {n_reviews} reviews, {n_assignments} assignments")
+    started = time.perf_counter()
+    conn = build_database(path, n_architects, n_reviews, n_assignments, review_index=review_index)
+    print(f"  built {path} in {time.perf_counter() - started:.1f}s")
+
+    training_old = to_sqlite(CORRELATED_QUERY.format(user_filter=''))
+    training_new = to_sqlite(ARCHITECT_FEATURES_QUERY.format(stats_filter='', user_filter=''))
+    detail_old = to_sqlite(CORRELATED_QUERY.format(user_filter='AND u.id = %s'))
+    detail_new = to_sqlite(ARCHITECT_FEATURES_QUERY.format(stats_filter='WHERE architect_id = %s', user_filter='AND u.id = %s'))
+    architect_id = conn.execute(
+        "SELECT id FROM users WHERE role = 'architect' AND status = 'approved' ORDER BY id LIMIT 1"
+    ).fetchone()[0]
+
+    results = [
+        ('training: correlated subqueries', *time_query(conn, training_old, repeat=repeat)),
+        ('training: GROUP BY joins', *time_query(conn, training_new, repeat=repeat)),
+        ('detail: correlated subqueries', *time_query(conn, detail_old, (architect_id,), repeat=repeat)),
+        ('detail: GROUP BY joins', *time_query(conn, detail_new, (architect_id,) * 3, repeat=repeat)),
+    ]
+    conn.close()
+    os.remove(path)
+
+    for name, seconds, rows in results:
+        print(f"  {name:<34} {seconds * 1000:>10.1f} ms  ({len(rows)} rows)")
+
+    # Both forms must return the same statistics
+    same_training = sorted(results[0][2]) == sorted(results[1][2])
+    same_detail = results[2][2] == results[3][2]
+    print(f"  results identical: training={same_training}, detail={same_detail}")
+    print(f"  training speed-up of the rewrite: {results[0][1] / results[1][1]:.1f}x\n")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--architects', type=int, default=10000)
+    parser.add_argument('--reviews', type=int, default=1000000)
+    parser.add_argument('--assignments', type=int, default=200000)
+    parser.add_argument('--unindexed-architects', type=int, default=500)
+    parser.add_argument('--unindexed-reviews', type=int, default=50000)
+    parser.add_argument('--unindexed-assignments', type=int, default=10000)
+    parser.add_argument('--skip-unindexed', action='store_true',
+                        help='Only time the schema with the review index')
+    parser.add_argument('--db-dir', help='Directory for the SQLite files (default: temporary directory)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    directory = args.db_dir or tempfile.mkdtemp()
+    os.makedirs(directory, exist_ok=True)
+
+    run_schema('With review index', os.path.join(directory, 'architect_benchmark_indexed.db'),
+               args.architects, args.reviews, args.assignments, True, args.repeat)
+    if args.skip_unindexed:
+        return
+
+    # Same sizes on both schemas isolate the index from the rewrite
+    unindexed_sizes = (args.unindexed_architects, args.unindexed_reviews, args.unindexed_assignments)
+    unindexed = run_schema('Without review index', os.path.join(directory, 'architect_benchmark_unindexed.db'),
+                           *unindexed_sizes, False, args.repeat)
+    indexed = run_schema('With review index, same size', os.path.join(directory, 'architect_benchmark_indexed_small.db'),
+                         *unindexed_sizes, True, args.repeat)
+
+    print("Training query at the smaller size:")
+    print(f"  index only (correlated form)   {unindexed[0][1] / indexed[0][1]:>8.1f}x")
+    print(f"  rewrite only (no index)        {unindexed[0][1] / unindexed[1][1]:>8.1f}x")
+    print(f"  rewrite with the index         {indexed[0][1] / indexed[1][1]:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+-- Indexes for detecting architect changes since the last recommendation model build
+-- (backend/architect_recommendation_engine.py: CHANGED_ARCHITECTS_QUERY, used by incremental retraining)
+
+ALTER TABLE users
+ADD KEY idx_users_role_updated (role, updated_at);
+
+ALTER TABLE architect_reviews
+ADD KEY idx_ar_created (created_at);
+
+ALTER TABLE layout_request_assignments
+ADD KEY idx_lra_updated (updated_at);
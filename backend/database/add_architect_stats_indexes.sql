@@ -0,0 +1,9 @@
+-- Indexes for the architect statistics aggregation used by the KNN recommendation engine
+-- (backend/architect_recommendation_engine.py: ARCHITECT_FEATURES_QUERY)
+-- architect_reviews had no index on architect_id, so every aggregation scanned the whole table.
+-- (architect_id, rating) covers both AVG(rating) and COUNT(*) grouped by architect_id.
+
+ALTER TABLE architect_reviews
+ADD KEY idx_ar_architect_rating (architect_id, rating);
+
+-- layout_request_assignments already has KEY idx_lra_architect (architect_id)
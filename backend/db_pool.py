@@ -0,0 +1,180 @@
+"""
+Shared MySQL connection pool for the Python backend
+
+Keeps a small set of warm pymysql connections per database config so the
+Flask service and helper scripts reuse them instead of paying TCP setup and
+authentication on every query.
+- Connections are health-checked (ping with reconnect) when checked out
+- Connections that fail while in use are discarded and replaced on demand
+- At most `size` connections exist; extra callers wait up to `timeout` seconds
+"""
+
+import os
+import time
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+import pymysql
+
+logger = logging.getLogger(__name__)
+
+# Connection settings (default to the local XAMPP setup used by the PHP backend)
+DEFAULT_DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': int(os.getenv('DB_PORT', '3306')),
+    'user': os.getenv('DB_USER', 'root'),
+    'password': os.getenv('DB_PASSWORD', ''),
+    'database': os.getenv('DB_NAME', 'buildhub'),
+    'charset': 'utf8mb4'
+}
+
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', '5'))
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the pool timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe pool of pymysql connections for one database config"""
+
+    def __init__(self, db_config: Dict[str, Any] = None, size: int = DB_POOL_SIZE,
+                 timeout: float = DB_POOL_TIMEOUT):
+        self.db_config = dict(db_config or DEFAULT_DB_CONFIG)
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self._idle = []
+        self._open = 0
+        self._condition = threading.Condition()
+        self.connections_created = 0
+        self.connections_discarded = 0
+        self.checkouts = 0
+
+    def _connect(self):
+        """Open a new connection (autocommit, so pooled reads always see fresh data)"""
+        conn = pymysql.connect(
+            connect_timeout=DB_CONNECT_TIMEOUT,
+            autocommit=True,
+            **self.db_config
+        )
+        with self._condition:
+            self.connections_created += 1
+        return conn
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    conn = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(f"No database connection available within {self.timeout}s")
+                self._condition.wait(remaining)
+            self.checkouts += 1
+
+        if conn is not None:
+            # Health check on checkout; ping reconnects if the server dropped the connection
+            try:
+                conn.ping(reconnect=True)
+                return conn
+            except Exception as e:
+                logger.warning(f"Pooled connection failed health check, reconnecting: {e}")
+                self._close_quietly(conn)
+                with self._condition:
+                    self.connections_discarded += 1
+
+        try:
+            return self._connect()
+        except Exception:
+            self._discard(None)
+            raise
+
+    def _release(self, conn):
+        with self._condition:
+            self._idle.append(conn)
+            self._condition.notify()
+
+    def _discard(self, conn):
+        """Close a connection (None for a slot that never got one) and free its slot"""
+        if conn is not None:
+            self._close_quietly(conn)
+        with self._condition:
+            self._open -= 1
+            if conn is not None:
+                self.connections_discarded += 1
+            self._condition.notify()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def connection(self):
+        """
+        Check out a connection for the duration of a with-block
+
+        Connection errors raised inside the block discard the connection so
+        the next checkout opens a fresh one.
+        """
+        conn = self._acquire()
+        try:
+            yield conn
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            self._discard(conn)
+            raise
+        except BaseException:
+            self._release(conn)
+            raise
+        else:
+            self._release(conn)
+
+    def close_all(self):
+        """Close idle connections (checked-out ones are closed when returned and discarded)"""
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool statistics for health reporting"""
+        with self._condition:
+            return {
+                'size': self.size,
+                'open_connections': self._open,
+                'idle_connections': len(self._idle),
+                'in_use_connections': self._open - len(self._idle),
+                'checkouts': self.checkouts,
+                'connections_created': self.connections_created,
+                'connections_discarded': self.connections_discarded
+            }
+
+
+_pools: Dict[tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_config: Optional[Dict[str, Any]] = None) -> ConnectionPool:
+    """Return the process-wide pool for a database config, creating it on first use"""
+    config = dict(db_config or DEFAULT_DB_CONFIG)
+    key = tuple(sorted((k, str(v)) for k, v in config.items()))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(config)
+            _pools[key] = pool
+            logger.info(f"Created MySQL connection pool for {config.get('host')}/{config.get('database')} (size {pool.size})")
+        return pool
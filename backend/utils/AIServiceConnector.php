@@ -370,6 +370,20 @@ class AIServiceConnector {
      * Process conceptual visualization results
      */
     private function processConceptualVisualization($conceptual_results) {
+        // Stages 3-4 run as an asynchronous job; the image is fetched with checkImageGenerationStatus()
+        if (!empty($conceptual_results['job_id'])) {
+            return [
+                'success' => false,
+                'pending' => true,
+                'job_id' => $conceptual_results['job_id'],
+                'status' => $conceptual_results['status'] ?? 'pending',
+                'queue_position' => $conceptual_results['queue_position'] ?? null,
+                'estimated_completion_seconds' => $conceptual_results['estimated_completion_seconds'] ?? null,
+                'fallback_message' => 'Conceptual visualization is being generated',
+                'disclaimer' => 'Conceptual Visualization / Inspirational Preview - Not an exact reconstruction'
+            ];
+        }
+
         if (!$conceptual_results || !isset($conceptual_results['success']) || !$conceptual_results['success']) {
             return [
                 'success' => false,